@@ -1,13 +1,37 @@
+from bitboard import BitBoard
 from board import Board
 from constants import PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR
+from copy import deepcopy
+from evaluator import IncrementalEvaluator
 from game import Game
+from move import Move
+from ordering import MoveOrdering
+from position import Position
+from search_context import SearchContext, SearchTimeout
+from squares import ALL_DIRECTIONS, FORWARD_DIRECTIONS, SQUARE_TABLE
+from stats import SearchStats
+from tablebase import EndgameTablebase, generate, save
+from transposition import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable
+from zobrist import hash_board, position_key
 import board_configs
+import os
+import parallel
 import random
+import tempfile
+import threading
+import time
 import unittest
 
+NULL_WINDOW = 1e-6  # Width of the windows principal variation search tests moves with; any positive width is correct
+ASPIRATION_WINDOW = 0.5  # Half the width of the window around the previous iteration's score
+LATE_MOVE_INDEX = 3  # Moves searched at full depth at each node before late move reductions start
+LATE_MOVE_MIN_DEPTH = 3  # Shallowest remaining depth at which late moves are reduced
+NULL_MOVE_REDUCTION = 2  # How much shallower than a real move a null move is searched
+NULL_MOVE_MIN_PIECES = 6  # Fewer pieces than this for the side to move is an endgame, where passing is often best
+
 # TO DO: Implement this function. The four lines currently implemented including the return are in place to make the
 # gameplay visualization work. Replace all of it with your own code for the function.
-def minimax_alpha_beta(board, depth, alpha, beta, max_player, game, eval_params=None):
+def minimax_alpha_beta(board, depth, alpha, beta, max_player, game, eval_params=None, context=None, workers=1):
     """
         Executes the Minimax algorithm with Alpha-Beta pruning to determine the optimal move in a two-player game.
 
@@ -19,6 +43,9 @@ def minimax_alpha_beta(board, depth, alpha, beta, max_player, game, eval_params=
             max_player (bool): True if the current player is the maximizing player (AI), False if minimizing (human)
             game (Game): The game instance
             eval_params (tuple, optional): A tuple of weights for evaluating the board state.
+            context (SearchContext, optional): Shared search state, such as a transposition table.
+            workers (int, optional): The number of processes to split the root moves across. A full-window parallel
+            search returns the same move as the sequential one.
  
         Returns:
             tuple: A tuple (evaluation, best_move) where:
@@ -29,44 +56,558 @@ def minimax_alpha_beta(board, depth, alpha, beta, max_player, game, eval_params=
     if eval_params is None:
         eval_params = (1.0, 1.0, 0.0, 0.0, 0.0)  
 
-    #Base cases: depth is either reached or there is a game winner, in which case return the score from evaluate and the current
-    #state of the board 
-    if depth == 0 or game.winner() is not None: 
-        return evaluate(board, game, *eval_params), board
+    #Entries from earlier searches stay usable but are the first to be replaced
+    if context is not None and context.table is not None:
+        context.table.new_search()
+
+    #The whole search plays and takes back moves on a single private copy of the board
+    search_board = deepcopy(board)
+    if (workers > 1 and depth > 0 and alpha == float('-inf') and beta == float('inf')
+            and game.winner(board) is None):
+        best_score, best_move = parallel.parallel_root_search(search_board, depth, max_player, game, eval_params,
+                                                              workers, context)
+    else:
+        if context is not None and context.evaluator is not None:
+            context.evaluator.reset(search_board)
+        best_score, best_move = alpha_beta_search(search_board, depth, alpha, beta, max_player, game, eval_params,
+                                                  context)
+
+    #Leaves and terminal positions return the board they were given, as before
+    if best_move is None:
+        return best_score, board
+
+    search_board.apply_move(best_move)
+    return best_score, search_board
+
+def iterative_deepening(board, game, time_budget_ms, max_player=True, eval_params=None, max_depth=64, context=None,
+                        workers=1, principal_variation=False):
+    """
+        Searches depth 1, 2, 3, ... with minimax_alpha_beta() until a wall-clock budget is used up, so the time taken
+        per move stays predictable whatever the position. Each iteration leaves its best moves in the transposition
+        table, where the next iteration finds them and searches them first.
+
+        Args:
+            board (Board): The current board state
+            game (Game): The game instance
+            time_budget_ms (float): The time budget in milliseconds. Depth 1 is always completed, even if it takes longer.
+            max_player (bool, optional): True if the maximizing player (AI) is to move
+            eval_params (tuple, optional): A tuple of weights for evaluating the board state
+            max_depth (int, optional): The deepest iteration to run
+            context (SearchContext, optional): Shared search state. A transposition table and move ordering are added
+            if it has none.
+            workers (int, optional): The number of processes each iteration splits the root moves across
+            principal_variation (bool, optional): Run each iteration as a principal variation search in an aspiration
+            window around the score of the previous one. The search then runs in this process, whatever workers is.
+
+        Returns:
+            tuple: A tuple (score, best_move, depth) from the last completed iteration, where best_move is the board
+            state after the best move and depth is the depth that iteration searched to, or None if the context's
+            stop_requested flag ended the search before depth 1 was completed
+    """
+
+    if context is None:
+        context = SearchContext()
+    if context.table is None:
+        context.table = TranspositionTable()
+    if context.ordering is None:
+        context.ordering = MoveOrdering()
+    context.ordering.new_search()
+
+    deadline = time.perf_counter() + time_budget_ms / 1000
+    context.deadline = None
+    result = None
+
+    try:
+        for depth in range(1, max_depth + 1):
+            nodes_before, started = context.nodes, time.perf_counter()
+            try:
+                if principal_variation:
+                    score, new_board = principal_variation_search(board, depth, max_player, game, eval_params, context,
+                                                                  result[0] if result is not None else None)
+                else:
+                    score, new_board = minimax_alpha_beta(board, depth, float('-inf'), float('inf'), max_player, game,
+                                                          eval_params, context, workers)
+            except SearchTimeout:
+                break
+
+            result = (score, new_board, depth)
+            context.deadline = deadline
+            if context.stats is not None:
+                context.stats.record_iteration(depth, context.nodes - nodes_before, time.perf_counter() - started)
+
+            #Stop once time is up, the position has no moves, or a win or loss is certain
+            if time.perf_counter() >= deadline or new_board is board or abs(score) >= 10000:
+                break
+    finally:
+        context.deadline = None
+
+    return result
+
+def principal_variation_search(board, depth, max_player, game, eval_params=None, context=None, previous_score=None,
+                               window=ASPIRATION_WINDOW):
+    """
+        Runs minimax_alpha_beta() as a principal variation search: at every node the first move is searched with the
+        full window and the others with a null window, which only proves that they are no better. A move that turns
+        out better is searched again with the full window. The root window is narrowed to an aspiration window around
+        an expected score, and opened up on the side the score falls outside of. The best move is the same one
+        minimax_alpha_beta() finds with the same context, since both keep the first move with the best score.
+
+        Args:
+            board (Board): The current board state
+            depth (int): The maximum depth to go to on the search tree
+            max_player (bool): True if the maximizing player (AI) is to move
+            game (Game): The game instance
+            eval_params (tuple, optional): A tuple of weights for evaluating the board state
+            context (SearchContext, optional): Shared search state, such as a transposition table and move ordering
+            previous_score (float, optional): The expected score, usually that of the previous iteration. Without it,
+            the root is searched with the full window.
+            window (float, optional): How far the score may be from previous_score without a re-search
+
+        Returns:
+            tuple: A tuple (score, best_move) like minimax_alpha_beta()
+    """
 
-    #Get all possible moves, this will be used for the recursive searching 
-    possible_moves = game.generate_all_moves(board, PLAYER2_PIECE_COLOR if max_player else PLAYER1_PIECE_COLOR)
+    if context is None:
+        context = SearchContext()
+    alpha, beta = float('-inf'), float('inf')
+    if previous_score is not None:
+        alpha, beta = previous_score - window, previous_score + window
+
+    principal_variation, context.principal_variation = context.principal_variation, True
+    try:
+        while True:
+            score, new_board = minimax_alpha_beta(board, depth, alpha, beta, max_player, game, eval_params, context)
+            if score <= alpha and alpha != float('-inf'):
+                alpha = float('-inf')
+            elif score >= beta and beta != float('inf'):
+                beta = float('inf')
+            else:
+                return score, new_board
+    finally:
+        context.principal_variation = principal_variation
+
+def alpha_beta_search(board, depth, alpha, beta, max_player, game, eval_params, context=None, ply=0):
+    """
+        Runs the Minimax search with Alpha-Beta pruning on a single mutable board. Every child position is reached with
+        board.apply_move() and left with board.undo_move(), so the board is unchanged when the search returns.
 
-    #Another base case: no more possible moves indicates a loss, so return an arbitrarily large number as the score 
-    if not possible_moves:
-        return (-10000, board) if max_player else (10000, board)
+        Args:
+            board (Board): The board to search, which may be a Board or a BitBoard
+            depth (int): The remaining depth to search
+            alpha (float): The best value that the maximizing player can guarantee
+            beta (float): The best value that the minimizing player can guarantee
+            max_player (bool): True if the player to move is the maximizing player (AI)
+            game (Game): The game instance
+            eval_params (tuple): A tuple of weights for evaluating the board state.
+            context (SearchContext, optional): Shared search state. If it has a transposition table, the table is
+            probed before the node is expanded and the result is stored in it afterwards. If it has a move ordering,
+            moves are generated in stages by staged_moves() and searched in its order, and cutoffs are recorded in it.
+            If it has an incremental evaluator, the evaluator follows every move and scores the leaves. If it has an
+            endgame tablebase, positions below the root that it covers are scored exactly without being searched. If it
+            has stats, they are updated at every node.
+            If it asks for a principal variation search, moves after the first are searched with a null window first.
+            If it has a quiescence node cap, positions at depth 0 are scored by quiescence_search() instead. If it has a
+            batch evaluator (and neither quiescence nor a tablebase), the children of a node at depth 1 are evaluated
+            together. If it asks for late move reductions or null move pruning, the search becomes selective and may
+            return a different score than the plain search.
+            ply (int, optional): The distance of this node from the root of the search
+
+        Returns:
+            tuple: A tuple (score, best_move) where best_move is a Move, or None at leaves and terminal positions
+    """
 
-    best_next_state = None 
+    stats = None
+    if context is not None:
+        context.check_time()
+        context.nodes += 1
+        stats = context.stats
+        if stats is not None:
+            stats.enter(ply)
+
+        #Base case: few enough pieces are left for the tablebase to know the exact result. The root is still searched so
+        #that there is a move to return.
+        if context.tablebase is not None and ply > 0:
+            score = context.tablebase.score(board, max_player, ply)
+            if score is not None:
+                if stats is not None:
+                    stats.tablebase_hits += 1
+                return score, None
+
+    #Base case: depth is reached, in which case return the score from evaluate, or from a quiescence search if the
+    #position still has captures to play out
+    evaluator = context.evaluator if context is not None else None
+    if depth == 0: 
+        if context is not None and context.quiescence_nodes is not None:
+            context.quiescence_left = context.quiescence_nodes
+            return quiescence_search(board, alpha, beta, max_player, game, eval_params, context), None
+        return leaf_score(board, game, eval_params, context), None
+
+    #Another base case: a side without pieces on the searched board has lost, which the board's piece counts tell in
+    #constant time. The score matches that of a side left without moves.
+    winner = game.winner(board)
+    if winner is not None:
+        return (10000, None) if winner == PLAYER2_PIECE_COLOR else (-10000, None)
+    color = PLAYER2_PIECE_COLOR if max_player else PLAYER1_PIECE_COLOR
+
+    #A stored result for this position is reused if it was searched at least as deep and its bound settles the window
+    table = context.table if context is not None else None
+    if table is not None:
+        key = position_key(board, max_player)
+        entry = table.probe(key, ply)
+        if stats is not None:
+            stats.record_probe(entry is not None)
+        if entry is not None and entry.depth >= depth:
+            if (entry.bound == EXACT or (entry.bound == LOWER_BOUND and entry.score >= beta)
+                    or (entry.bound == UPPER_BOUND and entry.score <= alpha)):
+                if stats is not None:
+                    stats.table_cutoffs += 1
+                return entry.score, entry.best_move
+        alpha_original, beta_original = alpha, beta
+
+    #Another base case: no more possible moves indicates a loss, so return an arbitrarily large number as the score.
+    #This stops at the first legal move found rather than generating them all.
+    if not game.has_any_move(board, color):
+        score = -10000 if max_player else 10000
+        if table is not None:
+            table.store(key, depth, score, EXACT, None, ply)
+        return score, None
+
+    #Just above the horizon, all children can be evaluated in one call instead of one at a time at depth 0
+    batched = (depth == 1 and context is not None and context.batch_evaluator is not None
+               and context.quiescence_nodes is None and context.tablebase is None)
+
+    #Get all possible moves, this will be used for the recursive searching. With a move ordering, only the captures are
+    #generated here and the quiet moves are left to staged_moves(), so a cutoff among the first moves skips them.
+    ordering = context.ordering if context is not None else None
+    staged = ordering is not None and not batched
+    started = time.perf_counter() if stats is not None else 0.0
+    possible_moves = game.generate_captures(board, color) if staged else game.generate_moves(board, color)
+    if stats is not None:
+        stats.record_movegen(len(possible_moves), time.perf_counter() - started)
+
+    #Null move pruning: if the side to move could pass and still score beyond the window, its best move will too.
+    #Passing is a bad guess in zugzwang, so it is not tried with captures on the board or in endgames, and a cutoff is
+    #only taken once a shallower search of the real moves confirms it.
+    if (context is not None and context.null_move and not context.null_move_active and ply > 0
+            and depth > NULL_MOVE_REDUCTION and (beta if max_player else alpha) not in (float('inf'), float('-inf'))
+            and board.piece_count(color) >= NULL_MOVE_MIN_PIECES
+            and not any(move.captures for move in possible_moves)):
+        score = null_move_search(board, depth, alpha, beta, max_player, game, eval_params, context, ply)
+        if score is not None:
+            return score
+
+    #The best move found for this position by an earlier (e.g. shallower) search is tried first
+    hash_move = entry.best_move if table is not None and entry is not None else None
+    if staged:
+        possible_moves = staged_moves(board, game, color, possible_moves, ordering, ply, hash_move, stats)
+    elif ordering is not None:
+        possible_moves = ordering.order(possible_moves, ply, hash_move)
+    elif hash_move in possible_moves:
+        possible_moves.remove(hash_move)
+        possible_moves.insert(0, hash_move)
+
+    best_move = None 
+    principal_variation = context is not None and context.principal_variation
+
+    #Late move reductions only below the root, so every root move is searched to the full depth. Like the null window
+    #searches of a principal variation search, they need a finite bound from the moves before to test a move against:
+    #a null window at an infinite bound is empty, and every move would fail it and be searched again.
+    late_move_reductions = (context is not None and context.late_move_reductions and ply > 0
+                            and depth >= LATE_MOVE_MIN_DEPTH)
+
+    leaf_scores = None
+    if batched:
+        started = time.perf_counter() if stats is not None else 0.0
+        leaf_scores = context.batch_evaluator.evaluate_moves(board, possible_moves, eval_params)
+        context.nodes += len(leaf_scores)
+        if stats is not None:
+            for _ in leaf_scores:
+                stats.enter(ply + 1)
+            stats.record_evaluation(time.perf_counter() - started, len(leaf_scores))
 
     #For max: try to maximize the score, decrement depth and switch roles with each recursive call, use and update alpha for pruning
     if max_player:  
         best_score = -float('inf')
-        for move in possible_moves:
-            candidate_score, _ = minimax_alpha_beta(move, depth - 1, alpha, beta, False, game, eval_params)
+        for index, move in enumerate(possible_moves):
+            if leaf_scores is not None:
+                candidate_score = leaf_scores[index]
+            else:
+                board.apply_move(move)
+                if evaluator is not None:
+                    evaluator.update(board, move)
+                bounded = alpha != float('-inf')
+                reduced = (late_move_reductions and bounded and index >= LATE_MOVE_INDEX and not move.captures
+                           and not move.promotes)
+                if reduced:
+                    #A quiet move this late in the order rarely beats alpha, which a shallower null window search tells
+                    candidate_score, _ = alpha_beta_search(board, depth - 2, alpha, alpha + NULL_WINDOW, False, game,
+                                                           eval_params, context, ply + 1)
+                    if stats is not None:
+                        stats.reductions += 1
+                        stats.researches += candidate_score > alpha
+                if reduced and candidate_score <= alpha:
+                    pass
+                elif principal_variation and bounded and index > 0:
+                    #Only a move that beats alpha needs an exact score, which a null window tells cheaply
+                    candidate_score, _ = alpha_beta_search(board, depth - 1, alpha, alpha + NULL_WINDOW, False, game,
+                                                           eval_params, context, ply + 1)
+                    if alpha < candidate_score < beta:
+                        candidate_score, _ = alpha_beta_search(board, depth - 1, alpha, beta, False, game,
+                                                               eval_params, context, ply + 1)
+                else:
+                    candidate_score, _ = alpha_beta_search(board, depth - 1, alpha, beta, False, game, eval_params,
+                                                           context, ply + 1)
+                if evaluator is not None:
+                    evaluator.revert()
+                board.undo_move(move)
             if candidate_score > best_score:
-                best_score, best_next_state = candidate_score, move 
+                best_score, best_move = candidate_score, move 
             
             alpha = max(alpha, best_score)
             if beta <= alpha: 
+                if ordering is not None:
+                    ordering.record_cutoff(move, ply, depth)
+                if stats is not None:
+                    stats.record_cutoff(ply, index)
                 break 
     #For min: try to minimize the score, decrement depth and switch roles with each recursive call, use and update beta for pruning
     else:  
         best_score = float('inf')
-        for move in possible_moves:
-            candidate_score, _ = minimax_alpha_beta(move, depth - 1, alpha, beta, True, game, eval_params)
+        for index, move in enumerate(possible_moves):
+            if leaf_scores is not None:
+                candidate_score = leaf_scores[index]
+            else:
+                board.apply_move(move)
+                if evaluator is not None:
+                    evaluator.update(board, move)
+                bounded = beta != float('inf')
+                reduced = (late_move_reductions and bounded and index >= LATE_MOVE_INDEX and not move.captures
+                           and not move.promotes)
+                if reduced:
+                    #A quiet move this late in the order rarely beats beta, which a shallower null window search tells
+                    candidate_score, _ = alpha_beta_search(board, depth - 2, beta - NULL_WINDOW, beta, True, game,
+                                                           eval_params, context, ply + 1)
+                    if stats is not None:
+                        stats.reductions += 1
+                        stats.researches += candidate_score < beta
+                if reduced and candidate_score >= beta:
+                    pass
+                elif principal_variation and bounded and index > 0:
+                    #Only a move that beats beta needs an exact score, which a null window tells cheaply
+                    candidate_score, _ = alpha_beta_search(board, depth - 1, beta - NULL_WINDOW, beta, True, game,
+                                                           eval_params, context, ply + 1)
+                    if alpha < candidate_score < beta:
+                        candidate_score, _ = alpha_beta_search(board, depth - 1, alpha, beta, True, game,
+                                                               eval_params, context, ply + 1)
+                else:
+                    candidate_score, _ = alpha_beta_search(board, depth - 1, alpha, beta, True, game, eval_params,
+                                                           context, ply + 1)
+                if evaluator is not None:
+                    evaluator.revert()
+                board.undo_move(move)
             if candidate_score < best_score:
-                best_score, best_next_state = candidate_score, move
+                best_score, best_move = candidate_score, move
             
             beta = min(beta, best_score)
             if beta <= alpha: 
+                if ordering is not None:
+                    ordering.record_cutoff(move, ply, depth)
+                if stats is not None:
+                    stats.record_cutoff(ply, index)
                 break 
+
+    #Remember the result, recording whether the score is exact or only a bound because of a cutoff
+    if table is not None:
+        if best_score <= alpha_original:
+            bound = UPPER_BOUND
+        elif best_score >= beta_original:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        table.store(key, depth, best_score, bound, best_move, ply)
+
     #Return results of minimax recursive searching
-    return best_score, best_next_state
+    return best_score, best_move
+
+def staged_moves(board, game, color, captures, ordering, ply, hash_move=None, stats=None):
+    """
+        Yields the moves of a position in the order MoveOrdering.order() ranks them, generating them in stages like
+        Game.iter_moves(): the hash move first if it is legal here, then the captures, then the quiet moves. The quiet
+        moves are only generated and ordered once every earlier move has been searched without a cutoff, so their
+        order also reflects the history gathered in the meantime.
+
+        Args:
+            board (Board): The board being searched, restored to the position before each move is asked for
+            game (Game): The game instance
+            color (tuple): The RGB color of the side to move
+            captures (list): The capture moves of the position, as made by Game.generate_captures()
+            ordering (MoveOrdering): Killer and history state used to order each stage
+            ply (int): The distance of the node from the root of the search
+            hash_move (Move, optional): The best move stored for this position in the transposition table
+            stats (SearchStats, optional): Records the generation of the quiet moves
+
+        Yields:
+            Move: The next move to search
+    """
+
+    #A stored move is checked before it is played, in case its entry belongs to another position with the same key
+    if hash_move is not None and (hash_move in captures if hash_move.captures
+                                  else game.is_quiet_move(board, color, hash_move)):
+        yield hash_move
+    else:
+        hash_move = None
+
+    captures = ordering.order(captures, ply)
+    if hash_move is not None and hash_move.captures:
+        captures.remove(hash_move)
+    yield from captures
+
+    started = time.perf_counter() if stats is not None else 0.0
+    quiet_moves = game.generate_quiet_moves(board, color)
+    if stats is not None:
+        stats.record_movegen(len(quiet_moves), time.perf_counter() - started)
+    quiet_moves = ordering.order(quiet_moves, ply)
+    if hash_move is not None and not hash_move.captures:
+        quiet_moves.remove(hash_move)
+    yield from quiet_moves
+
+def null_move_search(board, depth, alpha, beta, max_player, game, eval_params, context, ply):
+    """
+        Tries to prune a node with a verified null move: the opponent is let to move twice in a row, and if the side to
+        move still scores at least beta (at most alpha for the minimizing player), the real moves are searched
+        NULL_MOVE_REDUCTION plies less deep to confirm it. Neither search may pass again.
+
+        Args:
+            board (Board): The board to search, which may be a Board or a BitBoard
+            depth (int): The remaining depth to search at the node
+            alpha (float): The best value that the maximizing player can guarantee
+            beta (float): The best value that the minimizing player can guarantee
+            max_player (bool): True if the player to move is the maximizing player (AI)
+            game (Game): The game instance
+            eval_params (tuple): A tuple of weights for evaluating the board state.
+            context (SearchContext): Shared search state
+            ply (int): The distance of the node from the root of the search
+
+        Returns:
+            tuple: A tuple (score, best_move) from the verification search if the node can be pruned, otherwise None
+    """
+
+    if context.stats is not None:
+        context.stats.null_move_tries += 1
+    window = (beta - NULL_WINDOW, beta) if max_player else (alpha, alpha + NULL_WINDOW)
+
+    context.null_move_active = True
+    try:
+        score, _ = alpha_beta_search(board, depth - 1 - NULL_MOVE_REDUCTION, *window, not max_player, game,
+                                     eval_params, context, ply + 1)
+        if (score < beta) if max_player else (score > alpha):
+            return None
+        result = alpha_beta_search(board, depth - NULL_MOVE_REDUCTION, *window, max_player, game, eval_params,
+                                   context, ply)
+    finally:
+        context.null_move_active = False
+
+    score = result[0]
+    if (score < beta) if max_player else (score > alpha):
+        return None
+    if context.stats is not None:
+        context.stats.null_move_cutoffs += 1
+    return result
+
+def quiescence_search(board, alpha, beta, max_player, game, eval_params, context):
+    """
+        Scores a position at the search horizon by playing out captures until the position is quiet, so that the
+        evaluation is not taken in the middle of an exchange. Captures are not forced, so the side to move can always
+        stand pat with the static evaluation instead. The search stops expanding once context.quiescence_left nodes
+        have been used.
+
+        Args:
+            board (Board): The board to search, which may be a Board or a BitBoard
+            alpha (float): The best value that the maximizing player can guarantee
+            beta (float): The best value that the minimizing player can guarantee
+            max_player (bool): True if the player to move is the maximizing player (AI)
+            game (Game): The game instance
+            eval_params (tuple): A tuple of weights for evaluating the board state.
+            context (SearchContext): Shared search state, with the remaining node budget in quiescence_left
+
+        Returns:
+            float: The score of the position
+    """
+
+    context.check_time()
+    context.nodes += 1
+    context.quiescence_left -= 1
+    if context.stats is not None:
+        context.stats.quiescence_nodes += 1
+
+    winner = game.winner(board)
+    if winner is not None:
+        return 10000 if winner == PLAYER2_PIECE_COLOR else -10000
+    if context.quiescence_left <= 0:
+        return leaf_score(board, game, eval_params, context)
+
+    color = PLAYER2_PIECE_COLOR if max_player else PLAYER1_PIECE_COLOR
+    if not game.has_any_move(board, color):
+        return -10000 if max_player else 10000
+
+    #Longer capture chains first
+    captures = sorted(game.generate_captures(board, color), key=lambda move: len(move.captures), reverse=True)
+    evaluator = context.evaluator
+
+    #Standing pat: the static evaluation is the least the side to move can get
+    best_score = leaf_score(board, game, eval_params, context)
+    if max_player:
+        alpha = max(alpha, best_score)
+    else:
+        beta = min(beta, best_score)
+
+    for move in captures:
+        if beta <= alpha:
+            break
+        board.apply_move(move)
+        if evaluator is not None:
+            evaluator.update(board, move)
+        score = quiescence_search(board, alpha, beta, not max_player, game, eval_params, context)
+        if evaluator is not None:
+            evaluator.revert()
+        board.undo_move(move)
+
+        if max_player and score > best_score:
+            best_score = score
+            alpha = max(alpha, best_score)
+        elif not max_player and score < best_score:
+            best_score = score
+            beta = min(beta, best_score)
+
+    return best_score
+
+def leaf_score(board, game, eval_params, context=None):
+    """
+        Evaluates a position for the search, with the incremental evaluator of the context if it has one, and records
+        the evaluation in its stats.
+
+        Args:
+            board (Board): The current board state
+            game (Game): The game instance
+            eval_params (tuple): A tuple of weights for evaluating the board state.
+            context (SearchContext, optional): Shared search state
+
+        Returns:
+            float: A score representing the board's goodness for Player 2
+    """
+
+    if context is None:
+        return evaluate(board, game, *eval_params)
+
+    stats = context.stats
+    started = time.perf_counter() if stats is not None else 0.0
+    if context.evaluator is not None:
+        score = context.evaluator.evaluate(*eval_params)
+    else:
+        score = evaluate(board, game, *eval_params)
+    if stats is not None:
+        stats.record_evaluation(time.perf_counter() - started)
+    return score
 
 #HELPER FUNCTIONS: find_single_moves replaces find_moves (assuming no more multi hops), new traverse_single function 
 
@@ -75,41 +616,32 @@ def minimax_alpha_beta(board, depth, alpha, beta, max_player, game, eval_params=
 #it can move in both directions. 
 def find_single_moves(board, piece):
     all_moves = []
-    # Moves UPWARDS for upward facing player (player 1) including kings 
-    if piece.color == PLAYER1_PIECE_COLOR or piece.king:
-        all_moves.extend(traverse_single(board, piece, piece.row, piece.col, -1, -1)) 
-        all_moves.extend(traverse_single(board, piece, piece.row, piece.col, -1, 1))  
-    #Moves DOWNWARDS for downward facing player (player 2) including kings 
-    if piece.color == PLAYER2_PIECE_COLOR or piece.king:
-        all_moves.extend(traverse_single(board, piece, piece.row, piece.col, 1, -1)) 
-        all_moves.extend(traverse_single(board, piece, piece.row, piece.col, 1, 1))   
+    #Kings move in all four directions, men only forward: UPWARDS for player 1, DOWNWARDS for player 2
+    for direction in (ALL_DIRECTIONS if piece.king else FORWARD_DIRECTIONS[piece.side]):
+        all_moves.extend(traverse_single(board, piece, piece.row, piece.col, direction))
 
     return all_moves
 
 #Checks if a piece can move to a specific diagonal position. 
 #If the target square is empty, the move is valid. If an opponent’s piece 
 #is in the way and the space beyond it is empty, it returns a potential jump move, 
-#returns list of possible moves and includes captures
-def traverse_single(board, piece, row, col, row_change, col_change):
+#returns list of possible moves and includes captures.
+#The neighbouring and landing squares come from the precomputed SQUARE_TABLE, None meaning off the board
+def traverse_single(board, piece, row, col, direction):
     moves = []
-    nr, nc = row +row_change, col + col_change
+    neighbour, landing, _, _ = SQUARE_TABLE[row][col][direction]
 
     # First of all, must be within the board 8 x 8 bounds 
-    if 0 <= nr < 8 and 0 <= nc < 8:
-        next_piece = board.get_piece(nr, nc)
+    if neighbour is not None:
+        next_piece = board.get_piece(neighbour[0], neighbour[1])
 
         # If the target square is empty, it's a valid single move
         if next_piece == 0:
-            moves.append((nr, nc,[]))  
-        else:
-            # Otherwise, check if a capture move is possible
-            captured_row, captured_col = nr, nc
-            jump_row = row + 2 * row_change
-            jump_col =col + 2 * col_change
-
-            # Ensure the landing square is within bounds and empty, and the piece can be captured
-            if (0 <=jump_row < 8 and 0 <= jump_col <8 and board.get_piece(jump_row, jump_col) == 0 and next_piece.color != piece.color):
-                moves.append((jump_row, jump_col, [(captured_row, captured_col)]))
+            moves.append((neighbour[0], neighbour[1], []))
+        # Otherwise, check if a capture move is possible: the landing square is on the board and empty, and the piece
+        # can be captured
+        elif landing is not None and board.get_piece(landing[0], landing[1]) == 0 and next_piece.side != piece.side:
+            moves.append((landing[0], landing[1], [neighbour]))
 
     return moves
 
@@ -179,6 +711,10 @@ def counts(board, game, color):
         - num_opportunities (int): The total number of capture opportunities across all pieces of the specified color
         - num_king_hopefuls (int): The total number of moves that lead to king promotions for the specified color.
     """
+
+    if isinstance(board, BitBoard):
+        return board.counts(color)
+
     num_pieces, num_kings, num_moves, num_opportunities, num_king_hopefuls = 0, 0, 0, 0, 0
     pieces_for_color = board.get_all_pieces(color)
 
@@ -214,6 +750,7 @@ def counts(board, game, color):
 def compare_boards(board1, board2):
     """
     Compares two board objects to determine if they are identical in piece layout, piece color, and piece status (king or non-king).
+    Board and BitBoard positions can be compared with each other.
 
     Args:
         board1 (Board): The first board object to compare.
@@ -222,34 +759,14 @@ def compare_boards(board1, board2):
     Returns:
         bool: True if the boards are identical in terms of piece layout, piece color, and king status at each position; False otherwise
 
-    The function checks each position (row, col) on an 8x8 board grid:
-    - If both positions are empty (denoted by 0), it continues to the next position.
-    - If only one position is empty, it returns False.
-    - If both positions contain a piece, it checks that the pieces have the same color and king status. If any discrepancy is found, it returns False.
-
-    Assumptions:
-        - `board1` and `board2` are expected to have a `get_piece(row, col)` method that  returns either a piece object
-        (with `color` and `king` attributes) or 0 if the position is empty.
+    Both boards are packed into a Position, whose equality is a single integer comparison. For a BitBoard this takes
+    constant time; a Board is read square by square once.
     """
 
-    if not isinstance(board1, Board) or not isinstance(board2, Board):
+    if not isinstance(board1, (Board, BitBoard)) or not isinstance(board2, (Board, BitBoard)):
         return False
 
-    for row in range(8):
-        for col in range(8):
-            piece1 = board1.get_piece(row, col)
-            piece2 = board2.get_piece(row, col)
-
-            if piece1 == 0 and piece2 == 0:
-                continue
-
-            if (piece1 == 0) != (piece2 == 0):
-                return False
-
-            if piece1.color != piece2.color or piece1.king != piece2.king:
-                return False
-
-    return True
+    return Position.from_board(board1) == Position.from_board(board2)
 
 class AiTest(unittest.TestCase):
 
@@ -510,3 +1027,476 @@ class AiTest(unittest.TestCase):
         true_board = Board(board_configs.board_config28)
 
         self.assertTrue(compare_boards(new_board, true_board))
+
+    def test_counts_with_bitboards(self):
+        game = Game()
+        for b in range(0, 12):
+            config = getattr(board_configs, f'board_config{b + 1}')
+            for color in [PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR]:
+                self.assertEqual(counts(BitBoard(config), game, color), counts(Board(config), game, color))
+
+    def test_generate_all_moves_with_bitboards(self):
+        game = Game()
+        for b in range(0, 12):
+            config = getattr(board_configs, f'board_config{b + 1}')
+            for color in [PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR]:
+                bitboard_moves = game.generate_all_moves(BitBoard(config), color)
+                board_moves = game.generate_all_moves(Board(config), color)
+
+                self.assertEqual(len(bitboard_moves), len(board_moves))
+                for bitboard_move, board_move in zip(bitboard_moves, board_moves):
+                    self.assertTrue(compare_boards(bitboard_move, board_move))
+
+    def test_find_moves(self):
+        game = Game()
+        #(board config, piece square, expected [destination, captured squares, king hopeful] entries): multi-hop
+        #captures, a king turning back and jumping in a circle, and a capture that promotes
+        cases = [
+            (board_configs.board_config1, (7, 4), [((3, 0), [(6, 3), (4, 1)], False)]),
+            (board_configs.board_config1, (7, 6), [((1, 4), [(6, 5), (4, 3), (2, 3)], False),
+                                                   ((1, 4), [(6, 5), (4, 5), (2, 5)], False),
+                                                   ((6, 7), [], False)]),
+            (board_configs.board_config1, (6, 5), [((5, 4), [], False), ((4, 7), [(5, 6)], False)]),
+            (board_configs.board_config2, (2, 7), [((0, 5), [(1, 6)], True)]),
+            (board_configs.board_config12, (7, 2), [((6, 1), [], False),
+                                                    ((1, 0), [(6, 3), (4, 3), (2, 1)], False),
+                                                    ((5, 4), [(6, 3), (4, 3), (2, 3), (2, 5), (4, 5)], False),
+                                                    ((5, 4), [(6, 3), (4, 5), (2, 5), (2, 3), (4, 3)], False),
+                                                    ((1, 0), [(6, 3), (4, 5), (2, 5), (2, 3), (2, 1)], False)]),
+        ]
+        for board_config, square, expected in cases:
+            board = Board(board_config)
+            moves = game.find_moves(board, board.get_piece(*square))
+            self.assertEqual([(destination, [(captured.row, captured.col) for captured in captures], hopeful)
+                              for destination, captures, hopeful in moves], expected)
+            self.assertEqual(board.to_board_config(), board_config)
+
+    def test_staged_moves(self):
+        game = Game()
+        ordering = MoveOrdering()
+        for b in range(0, 28):
+            config = getattr(board_configs, f'board_config{b + 1}')
+            for board in (Board(config), BitBoard(config)):
+                for color in [PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR]:
+                    moves = game.generate_moves(board, color)
+                    captures = game.generate_captures(board, color)
+                    quiet_moves = game.generate_quiet_moves(board, color)
+                    self.assertEqual(captures, [move for move in moves if move.captures])
+                    self.assertEqual(quiet_moves, [move for move in moves if not move.captures])
+                    self.assertEqual([move.promotes for move in quiet_moves],
+                                     [move.promotes for move in moves if not move.captures])
+                    self.assertEqual(list(game.iter_moves(board, color)), captures + quiet_moves)
+                    self.assertEqual([game.is_quiet_move(board, color, move) for move in moves],
+                                     [not move.captures for move in moves])
+
+                    #Same order as sorting every move at once, with the hash move first only if it is legal here
+                    if quiet_moves:
+                        ordering.record_cutoff(quiet_moves[-1], 1, 3)
+                    for hash_move in moves[-1:] + [Move((0, 1), (7, 0))]:
+                        self.assertEqual(list(staged_moves(board, game, color, captures, ordering, 1, hash_move)),
+                                         ordering.order(moves, 1, hash_move))
+            self.assertEqual(board.to_board_config(), config)
+
+    def test_minimax_alpha_beta_bitboard(self):
+
+        game = Game()
+        board = BitBoard(board_configs.board_config2)
+
+        eval_params = (1.0, 1.0, 0.5, 0.5, 0.25)
+        value, new_board = minimax_alpha_beta(board, 4, float('-inf'), float('inf'), True, game, eval_params)
+
+        true_board = Board(board_configs.board_config20)
+
+        self.assertTrue(compare_boards(new_board, true_board))
+
+    def test_apply_and_undo_move(self):
+        game = Game()
+        for b in range(0, 12):
+            config = getattr(board_configs, f'board_config{b + 1}')
+            for board in [Board(config), BitBoard(config)]:
+                for color in [PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR]:
+                    children = game.generate_all_moves(board, color)
+                    moves = game.generate_moves(board, color)
+                    self.assertEqual(len(moves), len(children))
+
+                    for move, child in zip(moves, children):
+                        board.apply_move(move)
+                        self.assertTrue(compare_boards(board, child))
+                        board.undo_move(move)
+                        self.assertEqual(board.to_board_config(), config)
+
+    def test_zobrist_hash_is_incremental(self):
+        game = Game()
+        for b in range(0, 12):
+            config = getattr(board_configs, f'board_config{b + 1}')
+            board, bitboard = Board(config), BitBoard(config)
+            self.assertEqual(board.hash, bitboard.hash)
+
+            for color in [PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR]:
+                for move in game.generate_moves(board, color):
+                    board.apply_move(move)
+                    bitboard.apply_move(move)
+                    self.assertEqual(board.hash, hash_board(board))
+                    self.assertEqual(bitboard.hash, board.hash)
+                    board.undo_move(move)
+                    bitboard.undo_move(move)
+                self.assertEqual(board.hash, hash_board(Board(config)))
+
+    def test_terminal_detection(self):
+        game = Game()
+        for b in range(0, 12):
+            config = getattr(board_configs, f'board_config{b + 1}')
+            for board in [Board(config), BitBoard(config)]:
+                for color in [PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR]:
+                    self.assertEqual(game.has_any_move(board, color), bool(game.generate_moves(board, color)))
+                    for move in game.generate_moves(board, color):
+                        board.apply_move(move)
+                        for counted_color in [PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR]:
+                            self.assertEqual(board.piece_count(counted_color), len(board.get_all_pieces(counted_color)))
+                        board.undo_move(move)
+
+        board = Board(board_configs.board_config4)
+        self.assertIsNone(game.winner(board))
+        board.remove_pieces(board.get_all_pieces(PLAYER1_PIECE_COLOR))
+        self.assertEqual(game.winner(board), PLAYER2_PIECE_COLOR)
+
+    def test_minimax_alpha_beta_transposition_table(self):
+
+        game = Game()
+        eval_params = (1.0, 1.0, 0.5, 0.5, 0.25)
+        for config in [board_configs.board_config1, board_configs.board_config2, board_configs.board_config3]:
+            board = BitBoard(config)
+            value, _ = minimax_alpha_beta(board, 4, float('-inf'), float('inf'), True, game, eval_params)
+
+            context = SearchContext(table=TranspositionTable())
+            table_value, new_board = minimax_alpha_beta(board, 4, float('-inf'), float('inf'), True, game, eval_params,
+                                                        context)
+
+            self.assertEqual(table_value, value)
+            self.assertGreater(len(context.table), 0)
+
+    def test_minimax_alpha_beta_move_ordering(self):
+
+        game = Game()
+        eval_params = (1.0, 1.0, 0.5, 0.5, 0.25)
+        for config in [board_configs.board_config1, board_configs.board_config3, board_configs.board_config7]:
+            board = BitBoard(config)
+            value, _ = minimax_alpha_beta(board, 4, float('-inf'), float('inf'), True, game, eval_params)
+
+            context = SearchContext(ordering=MoveOrdering())
+            ordered_value, _ = minimax_alpha_beta(board, 4, float('-inf'), float('inf'), True, game, eval_params,
+                                                  context)
+
+            self.assertEqual(ordered_value, value)
+
+    def test_incremental_evaluator(self):
+
+        expected_scores = [11.0, 7.25, 7.75, 15.5, 13.5, 16.0, 14.5, 16.75, 16.0, 6.25, 6.25, 8.25]
+
+        game = Game()
+        for b in range(0, 12):
+            config = getattr(board_configs, f'board_config{b + 1}')
+            board = Board(config)
+            evaluator = IncrementalEvaluator(board)
+            self.assertEqual(evaluator.evaluate(1.0, 1.0, 0.5, 0.5, 0.25), expected_scores[b])
+
+            for color in [PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR]:
+                for move in game.generate_moves(board, color):
+                    board.apply_move(move)
+                    evaluator.update(board, move)
+                    for counted_color in [PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR]:
+                        self.assertEqual(evaluator.counts(counted_color), counts(board, game, counted_color))
+                    evaluator.revert()
+                    board.undo_move(move)
+                self.assertEqual(evaluator.evaluate(1.0, 1.0, 0.5, 0.5, 0.25), expected_scores[b])
+
+    def test_minimax_alpha_beta_incremental_evaluator(self):
+
+        game = Game()
+        board = Board(board_configs.board_config3)
+
+        eval_params = (1.0, 1.0, 0.5, 0.5, 0.25)
+        context = SearchContext(evaluator=IncrementalEvaluator())
+        value, new_board = minimax_alpha_beta(board, 3, float('-inf'), float('inf'), True, game, eval_params, context)
+
+        true_board = Board(board_configs.board_config21)
+
+        self.assertTrue(compare_boards(new_board, true_board))
+
+    def test_minimax_alpha_beta_workers(self):
+
+        game = Game()
+        board = BitBoard(board_configs.board_config2)
+
+        eval_params = (1.0, 1.0, 0.5, 0.5, 0.25)
+        value, new_board = minimax_alpha_beta(board, 4, float('-inf'), float('inf'), True, game, eval_params,
+                                              workers=2)
+
+        true_board = Board(board_configs.board_config20)
+
+        self.assertTrue(compare_boards(new_board, true_board))
+
+    def test_minimax_alpha_beta_workers_context(self):
+
+        game = Game()
+        board = BitBoard(board_configs.board_config2)
+        eval_params = (1.0, 1.0, 0.5, 0.5, 0.25)
+
+        value, new_board = minimax_alpha_beta(board, 4, float('-inf'), float('inf'), True, game, eval_params,
+                                              SearchContext(table=TranspositionTable(), ordering=MoveOrdering()))
+        stats = SearchStats()
+        context = SearchContext(table=TranspositionTable(), ordering=MoveOrdering(), evaluator=IncrementalEvaluator(),
+                                stats=stats)
+        parallel_value, parallel_board = minimax_alpha_beta(board, 4, float('-inf'), float('inf'), True, game,
+                                                            eval_params, context, workers=2)
+        self.assertEqual(parallel_value, value)
+        self.assertTrue(compare_boards(parallel_board, new_board))
+
+        #The workers' nodes and stats are added to the caller's, and the root result is left in its table
+        self.assertGreater(context.nodes, len(game.generate_moves(board, PLAYER2_PIECE_COLOR)))
+        self.assertEqual(stats.nodes, context.nodes)
+        self.assertGreater(stats.table_probes, 0)
+        self.assertEqual(context.table.probe(position_key(board, True)).depth, 4)
+
+        #A stop requested from another thread reaches the workers
+        context = SearchContext(table=TranspositionTable(), ordering=MoveOrdering())
+        threading.Timer(0.2, setattr, (context, 'stop_requested', True)).start()
+        started = time.perf_counter()
+        with self.assertRaises(SearchTimeout):
+            minimax_alpha_beta(board, 30, float('-inf'), float('inf'), True, game, eval_params, context, workers=2)
+        self.assertLess(time.perf_counter() - started, 5)
+
+    def test_minimax_alpha_beta_workers_ties(self):
+
+        game = Game()
+        eval_params = (1.0, 1.0, 0.5, 0.5, 0.25)
+        for number in range(1, 29):
+            board = BitBoard(getattr(board_configs, 'board_config' + str(number)))
+            if game.winner(board) is not None:
+                continue
+            for depth in (3, 4):
+                #Both searches start from the same warm table and move ordering, so equal scores must give equal moves
+                results = []
+                for workers in (1, 2):
+                    context = SearchContext(table=TranspositionTable(), ordering=MoveOrdering())
+                    minimax_alpha_beta(board, depth - 1, float('-inf'), float('inf'), True, game, eval_params, context)
+                    results.append(minimax_alpha_beta(board, depth, float('-inf'), float('inf'), True, game,
+                                                      eval_params, context, workers))
+                self.assertEqual(results[1][0], results[0][0])
+                self.assertTrue(compare_boards(results[1][1], results[0][1]), 'board_config%d' % number)
+
+    def test_quiescence_search_workers(self):
+
+        game = Game()
+        eval_params = (1.0, 1.0, 0.5, 0.5, 0.25)
+        for config in (board_configs.board_config1, board_configs.board_config2):
+            board = BitBoard(config)
+            scores = [minimax_alpha_beta(board, 4, float('-inf'), float('inf'), True, game, eval_params,
+                                         SearchContext(quiescence_nodes=64), workers)[0]
+                      for workers in (1, 2)]
+            self.assertEqual(scores[1], scores[0])
+
+    def test_minimax_alpha_beta_tablebase(self):
+
+        game = Game()
+        board_config = [[0] * 8 for _ in range(8)]
+        board_config[2][1] = 22
+        board_config[5][4] = 1
+        board = BitBoard(board_config)
+        eval_params = (1.0, 1.0, 0.0, 0.0, 0.0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'endgame.tb')
+            tables, values = generate(2)
+            save(path, tables, values, 2)
+            tablebase = EndgameTablebase(path)
+            try:
+                self.assertEqual(tablebase.probe(board, True), (1, 9))
+                context = SearchContext(tablebase=tablebase)
+                value, new_board = minimax_alpha_beta(board, 2, float('-inf'), float('inf'), True, game, None, context)
+                self.assertEqual(value, 10000 - 9)
+                self.assertEqual(tablebase.probe(new_board, False), (-1, 8))
+
+                #Worker processes open the same tablebase
+                parallel_value, parallel_board = minimax_alpha_beta(board, 2, float('-inf'), float('inf'), True, game,
+                                                                    None, SearchContext(tablebase=tablebase), workers=2)
+                self.assertEqual(parallel_value, value)
+                self.assertTrue(compare_boards(parallel_board, new_board))
+
+                #A tablebase win stored at one ply keeps its distance when the position is reached at another
+                board_config = [[0] * 8 for _ in range(8)]
+                board_config[0][5] = 11
+                board_config[3][2] = 1
+                board_config[4][1] = 22
+                board = BitBoard(board_config)
+                value, _ = alpha_beta_search(board, 2, float('-inf'), float('inf'), True, game, eval_params,
+                                             SearchContext(tablebase=tablebase), 1)
+                context = SearchContext(table=TranspositionTable(), tablebase=tablebase)
+                self.assertEqual(alpha_beta_search(board, 2, float('-inf'), float('inf'), True, game, eval_params,
+                                                   context, 3)[0], value - 2)
+                self.assertEqual(alpha_beta_search(board, 2, float('-inf'), float('inf'), True, game, eval_params,
+                                                   context, 1)[0], value)
+            finally:
+                tablebase.close()
+
+    def test_minimax_alpha_beta_stats(self):
+
+        game = Game()
+        board = BitBoard(board_configs.board_config2)
+
+        eval_params = (1.0, 1.0, 0.5, 0.5, 0.25)
+        stats = SearchStats()
+        context = SearchContext(table=TranspositionTable(), ordering=MoveOrdering(), stats=stats)
+        value, new_board = minimax_alpha_beta(board, 4, float('-inf'), float('inf'), True, game, eval_params, context)
+
+        true_board = Board(board_configs.board_config20)
+
+        self.assertTrue(compare_boards(new_board, true_board))
+        self.assertEqual(stats.nodes, context.nodes)
+        self.assertEqual(len(stats.nodes_per_ply), 5)
+        self.assertEqual(stats.nodes_per_ply[0], 1)
+        self.assertGreater(stats.leaf_evaluations, 0)
+        self.assertEqual(sum(stats.cutoffs_per_ply), sum(stats.cutoff_indices))
+        self.assertGreater(stats.table_probes, 0)
+
+        stats.reset()
+        iterative_deepening(board, game, 10000, eval_params=eval_params, max_depth=3, context=context)
+        self.assertEqual([depth for depth, _, _ in stats.iterations], [1, 2, 3])
+        self.assertEqual(sum(nodes for _, nodes, _ in stats.iterations), stats.nodes)
+
+    def test_principal_variation_search(self):
+
+        game = Game()
+        eval_params = (1.0, 1.0, 0.5, 0.5, 0.25)
+        plain_nodes, pvs_nodes = 0, 0
+        for board_config in (board_configs.board_config1, board_configs.board_config2, board_configs.board_config3):
+            board = BitBoard(board_config)
+            context = SearchContext(table=TranspositionTable(), ordering=MoveOrdering())
+            value, new_board = minimax_alpha_beta(board, 5, float('-inf'), float('inf'), True, game, eval_params,
+                                                  context)
+            plain_nodes += context.nodes
+
+            pvs_context = SearchContext(table=TranspositionTable(), ordering=MoveOrdering())
+            pvs_value, pvs_board = principal_variation_search(board, 5, True, game, eval_params, pvs_context)
+            pvs_nodes += pvs_context.nodes
+            self.assertEqual(pvs_value, value)
+            self.assertTrue(compare_boards(pvs_board, new_board))
+
+            # An aspiration window that misses the score is re-searched
+            pvs_value, pvs_board = principal_variation_search(board, 5, True, game, eval_params,
+                                                              previous_score=value + 2)
+            self.assertEqual(pvs_value, value)
+            self.assertTrue(compare_boards(pvs_board, new_board))
+
+        self.assertLess(pvs_nodes, plain_nodes)
+
+    def test_iterative_deepening_principal_variation(self):
+
+        game = Game()
+        board = BitBoard(board_configs.board_config2)
+
+        eval_params = (1.0, 1.0, 0.5, 0.5, 0.25)
+        value, new_board, depth = iterative_deepening(board, game, 10000, eval_params=eval_params, max_depth=4,
+                                                      principal_variation=True)
+
+        true_board = Board(board_configs.board_config20)
+
+        self.assertEqual(depth, 4)
+        self.assertTrue(compare_boards(new_board, true_board))
+
+    def test_quiescence_search(self):
+
+        game = Game()
+        board_config = [[0] * 8 for _ in range(8)]
+        board_config[0][7] = 2
+        board_config[2][3] = 2
+        board_config[3][4] = 1
+        board_config[5][4] = 1
+        board_config[6][3] = 1
+        board = BitBoard(board_config)
+
+        # At depth 1 the capture of (3, 4) looks like it wins a piece back, but (5, 4) recaptures right away
+        value, new_board = minimax_alpha_beta(board, 1, float('-inf'), float('inf'), True, game)
+        self.assertEqual(value, 0)
+        self.assertEqual(new_board.get_piece(4, 5).color, PLAYER2_PIECE_COLOR)
+
+        context = SearchContext(quiescence_nodes=64)
+        value, new_board = minimax_alpha_beta(board, 1, float('-inf'), float('inf'), True, game, None, context)
+        self.assertEqual(value, -1)
+        self.assertEqual(new_board.get_piece(3, 2).color, PLAYER2_PIECE_COLOR)
+
+        # With a cap of one node the positions at depth 0 are only evaluated
+        eval_params = (1.0, 1.0, 0.5, 0.5, 0.25)
+        board = BitBoard(board_configs.board_config2)
+        value, new_board = minimax_alpha_beta(board, 3, float('-inf'), float('inf'), True, game, eval_params)
+        context = SearchContext(quiescence_nodes=1)
+        capped_value, capped_board = minimax_alpha_beta(board, 3, float('-inf'), float('inf'), True, game,
+                                                        eval_params, context)
+        self.assertEqual(capped_value, value)
+        self.assertTrue(compare_boards(capped_board, new_board))
+
+    def test_selective_search(self):
+
+        game = Game()
+        board = BitBoard(board_configs.board_config2)
+        eval_params = (1.0, 1.0, 0.1, 0.1, 0.1)
+        children = game.generate_all_moves(board, PLAYER2_PIECE_COLOR)
+
+        nodes = []
+        for options in ({}, {'late_move_reductions': True}, {'null_move': True}):
+            stats = SearchStats()
+            context = SearchContext(table=TranspositionTable(), ordering=MoveOrdering(), stats=stats, **options)
+            _, new_board = minimax_alpha_beta(board, 6, float('-inf'), float('inf'), True, game, eval_params, context)
+            self.assertTrue(any(compare_boards(new_board, child) for child in children))
+            nodes.append(context.nodes)
+            if options.get('late_move_reductions'):
+                #Reduced moves are only searched against a finite alpha or beta, so most of them are not searched again
+                self.assertLess(2 * stats.researches, stats.reductions)
+        self.assertGreater(stats.null_move_tries, 0)
+        self.assertLess(nodes[1], nodes[0])
+        self.assertLessEqual(nodes[2], nodes[0])
+
+        #The options reach the workers of a parallel root search
+        for options, counter in (({'late_move_reductions': True}, 'reductions'),
+                                 ({'null_move': True}, 'null_move_tries')):
+            stats = SearchStats()
+            context = SearchContext(table=TranspositionTable(), ordering=MoveOrdering(), stats=stats, **options)
+            _, new_board = minimax_alpha_beta(board, 6, float('-inf'), float('inf'), True, game, eval_params, context,
+                                              workers=2)
+            self.assertTrue(any(compare_boards(new_board, child) for child in children))
+            self.assertGreater(getattr(stats, counter), 0)
+
+        #No null moves in endgames, where passing may well be the best option of the side to move
+        endgame = [[0] * 8 for _ in range(8)]
+        for row, col in ((0, 1), (0, 3), (2, 1)):
+            endgame[row][col] = 2
+        for row, col in ((7, 0), (7, 2), (6, 5), (5, 4)):
+            endgame[row][col] = 1
+        stats = SearchStats()
+        context = SearchContext(table=TranspositionTable(), ordering=MoveOrdering(), stats=stats, null_move=True)
+        minimax_alpha_beta(BitBoard(endgame), 6, float('-inf'), float('inf'), True, game, eval_params, context)
+        self.assertEqual(stats.null_move_tries, 0)
+
+    def test_iterative_deepening(self):
+
+        game = Game()
+        board = BitBoard(board_configs.board_config2)
+
+        eval_params = (1.0, 1.0, 0.5, 0.5, 0.25)
+        value, new_board, depth = iterative_deepening(board, game, 60000, eval_params=eval_params, max_depth=4)
+        expected_value, _ = minimax_alpha_beta(board, 4, float('-inf'), float('inf'), True, game, eval_params)
+
+        self.assertEqual(depth, 4)
+        self.assertEqual(value, expected_value)
+
+    def test_iterative_deepening_time_budget(self):
+
+        game = Game()
+        board = BitBoard()
+
+        start = time.perf_counter()
+        value, new_board, depth = iterative_deepening(board, game, 50)
+
+        self.assertGreaterEqual(depth, 1)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertFalse(compare_boards(new_board, board))
@@ -0,0 +1,487 @@
+from ai import alpha_beta_search, minimax_alpha_beta
+from bitboard import BitBoard
+from collections import OrderedDict, namedtuple
+from constants import PLAYER2_PIECE_COLOR
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from game import Game
+from ordering import MoveOrdering
+from search_context import SearchContext
+from tablebase import EndgameTablebase
+from transposition import TranspositionTable
+from zobrist import position_key
+import argparse
+import board_configs
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+DEFAULT_DEPTH = 6
+DEFAULT_EVAL_PARAMS = (1.0, 1.0, 0.0, 0.0, 0.0)
+PIECE_CODES = {0, 1, 2, 11, 22}
+
+# A position to analyse. id is echoed back with the result; it defaults to the request's line number.
+Request = namedtuple('Request', ['id', 'board_config', 'player2_to_move', 'depth'])
+
+# Set in each worker process: the search context of its requests. It is only reused to avoid allocating a table
+# for every request; analyse() clears it before each search.
+_worker_context = None
+
+
+def new_context(tablebase_path=None):
+    """
+    Builds the search context that positions are analysed with.
+
+    Args:
+        tablebase_path (str, optional): An endgame tablebase file to probe during the searches
+
+    Returns:
+        SearchContext: A context with a transposition table, a move ordering and the tablebase, if the file exists
+    """
+
+    tablebase = EndgameTablebase(tablebase_path) if tablebase_path and os.path.exists(tablebase_path) else None
+    return SearchContext(table=TranspositionTable(), ordering=MoveOrdering(), tablebase=tablebase)
+
+
+def _init_worker(tablebase_path=None):
+    """
+    Initializes the search state of a worker process.
+
+    Args:
+        tablebase_path (str, optional): An endgame tablebase file to probe during the searches
+    """
+
+    global _worker_context
+    _worker_context = new_context(tablebase_path)
+
+
+def analyse(board_config, player2_to_move, depth, eval_params, context=None):
+    """
+    Searches one position to a fixed depth. The context's table and move ordering are cleared first: entries left by
+    a deeper search of the same position would otherwise settle the root without searching it, and the result would
+    not be that of the requested depth.
+
+    Args:
+        board_config (list): The position in the Board.to_board_config() format
+        player2_to_move (bool): True if Player 2 (the maximizing side) is to move
+        depth (int): The search depth
+        eval_params (tuple): A tuple of weights for evaluating the board state
+        context (SearchContext, optional): The context to search with. Defaults to the worker process's.
+
+    Returns:
+        dict: The best move (its start, end and captured squares and the position after it, or None if the side to
+        move has no moves), the score from Player 2's point of view, the depth and the number of nodes searched
+    """
+
+    context = context if context is not None else _worker_context
+    context.table.clear()
+    context.ordering.clear()
+    nodes_before = context.nodes
+
+    board = BitBoard(board_config)
+    score, move = alpha_beta_search(board, depth, float('-inf'), float('inf'), player2_to_move, Game(), eval_params,
+                                    context)
+
+    best_move = None
+    if move is not None:
+        board.apply_move(move)
+        best_move = {'start': list(move.start), 'end': list(move.end),
+                     'captures': [list(square) for square in move.captures], 'board': board.to_board_config()}
+    return {'best_move': best_move, 'score': score, 'depth': depth, 'nodes': context.nodes - nodes_before}
+
+
+def parse_request(line, number, default_depth):
+    """
+    Parses one line of input. A line is either a JSON object with a "board" in the Board.to_board_config() format and
+    optional "id", "player2_to_move" (default true) and "depth" fields, or just the board as a JSON array.
+
+    Args:
+        line (str): The line of input, as text or as UTF-8 bytes
+        number (int): The line number, used as the id if there is none
+        default_depth (int): The depth used if there is none
+
+    Returns:
+        Request: The parsed request
+
+    Raises:
+        ValueError: If the line is not valid JSON or does not hold an 8 x 8 board of piece codes
+    """
+
+    try:
+        data = json.loads(line)
+    except RecursionError:
+        raise ValueError('JSON nested too deeply') from None
+    if isinstance(data, list):
+        data = {'board': data}
+    if not isinstance(data, dict):
+        raise ValueError('expected a JSON object or an 8 x 8 array')
+
+    board_config = data.get('board')
+    if (not isinstance(board_config, list) or len(board_config) != 8
+            or any(not isinstance(row, list) or len(row) != 8 or any(value not in PIECE_CODES for value in row)
+                   for row in board_config)):
+        raise ValueError('board must be an 8 x 8 array of 0, 1, 2, 11 and 22')
+
+    player2_to_move = data.get('player2_to_move', True)
+    if not isinstance(player2_to_move, bool):
+        raise ValueError('player2_to_move must be true or false')
+
+    depth = data.get('depth', default_depth)
+    if not isinstance(depth, int) or isinstance(depth, bool) or depth < 1:
+        raise ValueError('depth must be a positive integer')
+    return Request(data.get('id', number), board_config, player2_to_move, depth)
+
+
+class AnalysisCache:
+    def __init__(self, maxsize=4096):
+        """
+        Initializes a least-recently-used cache of analysis results, keyed by (position key, depth). It is shared by
+        every connection of the service, so it is guarded by a lock.
+
+        Args:
+            maxsize (int, optional): The number of results kept
+        """
+
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Looks up a result, marking it as recently used.
+
+        Args:
+            key (tuple): (position key, depth)
+
+        Returns:
+            dict: The cached result, or None
+        """
+
+        with self.lock:
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        """
+        Stores a result, dropping the least recently used one if the cache is full.
+
+        Args:
+            key (tuple): (position key, depth)
+            result (dict): The analysis result
+        """
+
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+class AnalysisService:
+    def __init__(self, workers=1, depth=DEFAULT_DEPTH, eval_params=DEFAULT_EVAL_PARAMS, cache_size=4096,
+                 tablebase_path=None, max_pending=None):
+        """
+        Initializes a headless service that analyses positions across a pool of worker processes.
+
+        Args:
+            workers (int, optional): The number of processes to search in. With 1, positions are searched in this
+            process, one at a time.
+            depth (int, optional): The search depth of requests that do not give one
+            eval_params (tuple, optional): A tuple of weights for evaluating the board state
+            cache_size (int, optional): The number of results kept in the LRU cache
+            tablebase_path (str, optional): An endgame tablebase file to probe during the searches
+            max_pending (int, optional): The most positions of one input stream searched at a time. Defaults to four
+            per worker, which keeps the workers busy without reading far ahead of the results.
+        """
+
+        self.depth = depth
+        self.eval_params = tuple(eval_params)
+        self.cache = AnalysisCache(cache_size)
+        self.max_pending = max_pending if max_pending is not None else 4 * workers
+        self.search_lock = threading.Lock()
+        self.searching = {}  # Cache key -> future of the search running for it, shared by every input stream
+        self.searching_lock = threading.RLock()
+        if workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tablebase_path,))
+            self.context = None
+        else:
+            self.pool = None
+            self.context = new_context(tablebase_path)
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    def analyse_lines(self, lines):
+        """
+        Analyses a stream of input lines, yielding a result for each as soon as it is known. Cached positions are
+        answered at once, and a position already being searched, for an earlier line or for another stream (such as
+        another connection), is not searched again. With a pool, results come in the order the searches finish; the
+        id field tells them apart.
+
+        Args:
+            lines (iterable): Lines of input as described in parse_request()
+
+        Yields:
+            dict: The request's id, the fields returned by analyse() and whether the result came from the cache, or
+            the id and an error message for a line that could not be parsed
+        """
+
+        pending = {}  # Future -> (ids of this stream's requests waiting for it, whether this stream started it)
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                request = parse_request(line, number, self.depth)
+            except ValueError as error:
+                yield {'id': number, 'error': str(error)}
+                continue
+
+            key = (position_key(BitBoard(request.board_config), request.player2_to_move), request.depth)
+            result = self.cache.get(key)
+            if result is not None:
+                yield {'id': request.id, **result, 'cached': True}
+                continue
+
+            if self.pool is None:
+                # Another stream may have searched the position while this one waited for the lock
+                with self.search_lock:
+                    result = self.cache.get(key)
+                    cached = result is not None
+                    if not cached:
+                        result = analyse(request.board_config, request.player2_to_move, request.depth,
+                                         self.eval_params, self.context)
+                        self.cache.put(key, result)
+                yield {'id': request.id, **result, 'cached': cached}
+                continue
+
+            future, started, result = self._search(key, request)
+            if future is None:
+                yield {'id': request.id, **result, 'cached': True}
+            elif future in pending:
+                pending[future][0].append(request.id)
+            else:
+                pending[future] = ([request.id], started)
+                while len(pending) >= self.max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from self._finish(done, pending)
+
+        yield from self._finish(as_completed(list(pending)), pending)
+
+    def _search(self, key, request):
+        """
+        Returns the future of the search for a request, joining the one already running for its position if there is
+        one. Finished searches put their result in the cache before they leave searching, under the same lock, so a
+        position is never searched twice at once.
+
+        Returns:
+            tuple: (future, started, None) where started is True if the search was submitted for this request, or
+            (None, False, result) if the result was cached in the meantime
+        """
+
+        with self.searching_lock:
+            if key in self.searching:
+                return self.searching[key], False, None
+            result = self.cache.get(key)
+            if result is not None:
+                return None, False, result
+
+            future = self.pool.submit(analyse, request.board_config, request.player2_to_move, request.depth,
+                                      self.eval_params)
+            self.searching[key] = future
+            future.add_done_callback(lambda done: self._search_done(key, done))
+            return future, True, None
+
+    def _search_done(self, key, future):
+        """
+        Caches the result of a finished search and stops sharing its future.
+        """
+
+        with self.searching_lock:
+            if not future.cancelled() and future.exception() is None:
+                self.cache.put(key, future.result())
+            del self.searching[key]
+
+    def _finish(self, futures, pending):
+        """
+        Yields one result for every request of this stream waiting for each finished search.
+        """
+
+        for future in futures:
+            ids, started = pending.pop(future)
+            result = future.result()
+            for index, request_id in enumerate(ids):
+                yield {'id': request_id, **result, 'cached': index > 0 or not started}
+
+    def write_results(self, lines, output):
+        """
+        Analyses input lines and writes each result to a text stream as a line of JSON as soon as it is ready.
+
+        Args:
+            lines (iterable): Lines of input as described in parse_request()
+            output (file): The stream to write to
+        """
+
+        for result in self.analyse_lines(lines):
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+
+    def serve(self, path):
+        """
+        Serves requests on a Unix domain socket until interrupted. Every connection sends lines of input and receives
+        lines of results, and connections are handled concurrently, sharing the workers and the cache.
+
+        Args:
+            path (str): The socket file to listen on. An old socket file at that path is removed.
+        """
+
+        service = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                # Lines are decoded by parse_request(), so a line that is not UTF-8 only fails itself
+                for result in service.analyse_lines(self.rfile):
+                    self.wfile.write((json.dumps(result) + '\n').encode('utf-8'))
+
+        if os.path.exists(path):
+            os.remove(path)
+        with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+            server.serve_forever()
+
+
+class AnalysisServiceTest(unittest.TestCase):
+
+    def test_analyse_lines(self):
+        service = AnalysisService(depth=3)
+        lines = [json.dumps({'id': 'a', 'board': board_configs.board_config2}),
+                 json.dumps(board_configs.board_config2),
+                 json.dumps({'id': 'b', 'board': board_configs.board_config2, 'player2_to_move': False, 'depth': 2}),
+                 '',
+                 '{"board": [[0]]}',
+                 json.dumps({'board': board_configs.board_config2, 'player2_to_move': 'false'})]
+        results = list(service.analyse_lines(lines))
+
+        self.assertEqual([result['id'] for result in results], ['a', 2, 'b', 5, 6])
+        self.assertEqual([result.get('cached') for result in results], [False, True, False, None, None])
+        self.assertIn('error', results[3])
+        self.assertEqual(results[4]['error'], 'player2_to_move must be true or false')
+
+        score, new_board = minimax_alpha_beta(BitBoard(board_configs.board_config2), 3, float('-inf'), float('inf'),
+                                              True, Game(), DEFAULT_EVAL_PARAMS)
+        self.assertEqual(results[0]['score'], score)
+        self.assertEqual(results[0]['best_move']['board'], new_board.to_board_config())
+        self.assertGreater(results[0]['nodes'], 0)
+        self.assertEqual(results[1]['score'], score)
+        self.assertEqual(service.cache.hits, 1)
+
+        # Every service searches with its own context
+        self.assertIsNot(AnalysisService().context, service.context)
+
+    def test_results_do_not_depend_on_earlier_requests(self):
+        service = AnalysisService(depth=5)
+        deep, shallow = service.analyse_lines([json.dumps(board_configs.board_config2),
+                                               json.dumps({'board': board_configs.board_config2, 'depth': 2})])
+
+        score, new_board = minimax_alpha_beta(BitBoard(board_configs.board_config2), 2, float('-inf'), float('inf'),
+                                              True, Game(), DEFAULT_EVAL_PARAMS)
+        self.assertEqual((shallow['score'], shallow['depth']), (score, 2))
+        self.assertEqual(shallow['best_move']['board'], new_board.to_board_config())
+        self.assertGreater(shallow['nodes'], len(Game().generate_moves(BitBoard(board_configs.board_config2),
+                                                                       PLAYER2_PIECE_COLOR)))
+        self.assertGreater(deep['nodes'], shallow['nodes'])
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = AnalysisCache(maxsize=2)
+        cache.put(1, {'score': 1})
+        cache.put(2, {'score': 2})
+        cache.get(1)
+        cache.put(3, {'score': 3})
+        self.assertIsNone(cache.get(2))
+        self.assertEqual((cache.get(1), cache.get(3)), ({'score': 1}, {'score': 3}))
+
+    def test_worker_pool_and_socket(self):
+        service = AnalysisService(workers=2, depth=2)
+        try:
+            configs = [getattr(board_configs, f'board_config{number}') for number in range(1, 5)]
+            lines = [json.dumps({'id': number, 'board': config}) for number, config in enumerate(configs + configs)]
+            results = list(service.analyse_lines(lines))
+            self.assertEqual(sorted(result['id'] for result in results), list(range(8)))
+            by_id = {result['id']: result for result in results}
+            for number in range(4):
+                self.assertEqual(by_id[number]['score'], by_id[number + 4]['score'])
+
+            # Two streams asking for the same new position at once share one search
+            line = json.dumps({'board': board_configs.board_config1, 'depth': 6})
+            shared = []
+            threads = [threading.Thread(target=lambda: shared.extend(service.analyse_lines([line])))
+                       for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(sorted(result['cached'] for result in shared), [False, True])
+            self.assertEqual(shared[0]['score'], shared[1]['score'])
+            self.assertEqual(service.searching, {})
+
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'analysis.sock')
+                threading.Thread(target=service.serve, args=(path,), daemon=True).start()
+                while not os.path.exists(path):
+                    time.sleep(0.001)
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                    client.connect(path)
+                    client.sendall(b'\xff\nnot json\n{"id": 1}\n' + (lines[0] + '\n').encode('utf-8'))
+                    client.shutdown(socket.SHUT_WR)
+                    replies = [json.loads(reply) for reply in client.makefile('r')]
+
+                # A malformed line gets an error and the connection carries on with the next one
+                self.assertEqual([reply.get('error') is not None for reply in replies], [True, True, True, False])
+                self.assertEqual((replies[3]['id'], replies[3]['score'], replies[3]['cached']),
+                                 (0, by_id[0]['score'], True))
+        finally:
+            service.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Analyse positions given as lines of JSON and stream the results.')
+    parser.add_argument('input', nargs='?', default='-', help="file of positions, or '-' for standard input")
+    parser.add_argument('--socket', help='serve requests on this Unix domain socket instead of reading input')
+    parser.add_argument('--workers', type=int, default=1, help='number of processes to search in')
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH, help='search depth of requests without one')
+    parser.add_argument('--eval', type=float, nargs=5, default=list(DEFAULT_EVAL_PARAMS), help='evaluation weights')
+    parser.add_argument('--cache-size', type=int, default=4096, help='number of results kept in the cache')
+    parser.add_argument('--tablebase', default=None, help='endgame tablebase file to probe')
+    args = parser.parse_args()
+
+    analysis = AnalysisService(args.workers, args.depth, args.eval, args.cache_size, args.tablebase)
+    try:
+        if args.socket:
+            analysis.serve(args.socket)
+        elif args.input == '-':
+            analysis.write_results(sys.stdin, sys.stdout)
+        else:
+            with open(args.input) as input_file:
+                analysis.write_results(input_file, sys.stdout)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        analysis.close()
@@ -0,0 +1,197 @@
+from bitboard import BitBoard, DIRECTIONS, FORWARD, FULL_MASK, PROMOTION_MASK, REVERSE, SQUARES, STEP_SHIFTS
+from constants import PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR
+from game import Game
+from search_context import SearchContext
+import ai
+import board_configs
+import numpy as np
+import unittest
+
+# Rows and columns of the 32 playable squares, for gathering them out of N x 8 x 8 arrays
+SQUARE_ROWS = np.array([row for row, _ in SQUARES])
+SQUARE_COLS = np.array([col for _, col in SQUARES])
+SQUARE_BITS = np.array([1 << index for index in range(len(SQUARES))], dtype=np.uint32)
+
+# Piece codes of the board_configs format, in the order of the four bitboards of a BitBoard
+PIECE_CODES = (1, 11, 2, 22)
+
+
+def _shift(bitboards, direction):
+    """
+    Moves every set square of an array of bitboards one diagonal step, like bitboard.shift().
+    """
+
+    result = np.zeros_like(bitboards)
+    for mask, offset in STEP_SHIFTS[direction]:
+        if offset > 0:
+            result |= (bitboards & np.uint32(mask)) << np.uint32(offset)
+        else:
+            result |= (bitboards & np.uint32(mask)) >> np.uint32(-offset)
+    return result
+
+
+def _popcount(bitboards):
+    return np.bitwise_count(bitboards).astype(np.int64)
+
+
+def batch_counts(men, kings, opp, color):
+    """
+    Computes the metrics of BitBoard.counts() for one side of many positions at once.
+
+    Args:
+        men (numpy.ndarray): The side's men, one uint32 bitboard per position
+        kings (numpy.ndarray): The side's kings
+        opp (numpy.ndarray): All pieces of the opponent
+        color (tuple): The RGB color of the side
+
+    Returns:
+        tuple: (num_pieces, num_kings, num_moves, num_opportunities, num_king_hopefuls) arrays
+    """
+
+    empty = ~(men | kings | opp) & np.uint32(FULL_MASK)
+    forward = FORWARD[color]
+    promotion = np.uint32(PROMOTION_MASK[color])
+
+    num_moves = np.zeros(len(men), dtype=np.int64)
+    capturing = np.zeros_like(men)
+    hopeful = np.zeros_like(men)
+    for direction in DIRECTIONS:
+        movers = (men | kings) if direction in forward else kings
+        reverse = REVERSE[direction]
+        steps = _shift(movers, direction)
+        simple = steps & empty
+        landings = _shift(steps & opp, direction) & empty
+        num_moves += _popcount(simple) + _popcount(landings)
+
+        capturing |= _shift(_shift(landings, reverse), reverse)
+        if direction in forward:
+            promoting = _shift(simple & promotion, reverse) | _shift(_shift(landings & promotion, reverse), reverse)
+            hopeful |= promoting & men
+
+    return _popcount(men | kings), _popcount(kings), num_moves, _popcount(capturing), _popcount(hopeful)
+
+
+def encode_bitboards(boards):
+    """
+    Stacks the four bitboards of each BitBoard into an N x 4 uint32 array (Player 1 men, Player 1 kings, Player 2 men,
+    Player 2 kings).
+    """
+
+    return np.array([(board.p1_men, board.p1_kings, board.p2_men, board.p2_kings) for board in boards],
+                    dtype=np.uint32).reshape(-1, 4)
+
+
+def encode_configs(configs):
+    """
+    Converts an N x 8 x 8 array of positions in the board_configs format (1/11 for Player 1 pieces/kings, 2/22 for
+    Player 2 pieces/kings) into an N x 4 uint32 array of bitboards.
+    """
+
+    squares = np.asarray(configs, dtype=np.int8)[:, SQUARE_ROWS, SQUARE_COLS]
+    return np.stack([np.where(squares == code, SQUARE_BITS, np.uint32(0)).sum(axis=1, dtype=np.uint32)
+                     for code in PIECE_CODES], axis=1)
+
+
+def batch_evaluate(positions, pieces_weight=1.0, kings_weight=1.0, moves_weight=0.0, opportunities_weight=0.0,
+                   king_hopefuls_weight=0.0):
+    """
+    Scores many positions at once, exactly like ai.evaluate() scores each of them for Player 2.
+
+    Args:
+        positions (numpy.ndarray): Either an N x 4 array of bitboards as made by encode_bitboards(), or an N x 8 x 8
+        array in the board_configs format
+        pieces_weight (float): Weight for the difference in piece count
+        kings_weight (float): Weight for the difference in king count
+        moves_weight (float): Weight for the difference in available moves
+        opportunities_weight (float): Weight for the difference in capture opportunities
+        king_hopefuls_weight (float): Weight for the difference in king hopefuls
+
+    Returns:
+        numpy.ndarray: N float64 scores
+    """
+
+    positions = np.asarray(positions)
+    if positions.ndim == 3:
+        positions = encode_configs(positions)
+    p1_men, p1_kings, p2_men, p2_kings = positions.astype(np.uint32).T
+
+    p1 = batch_counts(p1_men, p1_kings, p2_men | p2_kings, PLAYER1_PIECE_COLOR)
+    p2 = batch_counts(p2_men, p2_kings, p1_men | p1_kings, PLAYER2_PIECE_COLOR)
+
+    # Same order of operations as evaluate(), so the scores are identical
+    return ((p2[0] - p1[0]) * pieces_weight +
+            (p2[1] - p1[1]) * kings_weight +
+            (p2[2] - p1[2]) * moves_weight +
+            (p2[3] - p1[3]) * opportunities_weight +
+            (p2[4] - p1[4]) * king_hopefuls_weight)
+
+
+class BatchEvaluator:
+    """
+    Scores all children of a node in one batch_evaluate() call. Set as the batch_evaluator of a SearchContext, it is
+    used by alpha_beta_search() at every node at depth 1, in place of evaluating each child at depth 0 on its own.
+
+    A batch_evaluate() call costs about 0.6 ms whatever its size, as much as evaluating 18 positions one by one, and
+    the batch also scores the children that alpha-beta pruning would have skipped. Checkers positions usually have 7 to
+    15 moves, so in a search this is slower: depth 5 searches of board_config1 to board_config28 with a transposition
+    table took 8.1 s with it against 3.1 s without. Batching only pays off where nodes at depth 1 have 20 or more
+    moves, such as positions with many kings, and for scoring many positions at once outside the search, as tuner.py
+    does with batch_counts().
+    """
+
+    def evaluate_moves(self, board, moves, eval_params):
+        """
+        Scores the position after each move.
+
+        Args:
+            board (Board): The position, which may be a Board or a BitBoard
+            moves (list): The Move objects to score
+            eval_params (tuple): A tuple of weights for evaluating the board state
+
+        Returns:
+            list: The score after each move, as Python floats
+        """
+
+        children = []
+        for move in moves:
+            board.apply_move(move)
+            child = board if isinstance(board, BitBoard) else BitBoard.from_board(board)
+            children.append((child.p1_men, child.p1_kings, child.p2_men, child.p2_kings))
+            board.undo_move(move)
+        return batch_evaluate(np.array(children, dtype=np.uint32).reshape(-1, 4), *eval_params).tolist()
+
+
+class BatchEvalTest(unittest.TestCase):
+
+    def test_matches_evaluate(self):
+        game = Game()
+        eval_params = (1.0, 1.5, 0.5, 0.75, 0.25)
+        configs = [getattr(board_configs, f'board_config{number}') for number in range(1, 29)]
+        boards = [BitBoard(config) for config in configs]
+        for board in list(boards):
+            boards.extend(game.generate_all_moves(board, PLAYER1_PIECE_COLOR))
+
+        expected = [ai.evaluate(board, game, *eval_params) for board in boards]
+        self.assertEqual(batch_evaluate(encode_bitboards(boards), *eval_params).tolist(), expected)
+        self.assertEqual(batch_evaluate(np.array(configs, dtype=np.int8), *eval_params).tolist(), expected[:28])
+
+    def test_counts_match(self):
+        board = BitBoard()
+        positions = encode_bitboards([board])
+        for color in (PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR):
+            men, kings, opp = (np.array([value], dtype=np.uint32) for value in board.sides(color))
+            self.assertEqual(tuple(int(values[0]) for values in batch_counts(men, kings, opp, color)),
+                             board.counts(color))
+        self.assertEqual(positions.shape, (1, 4))
+
+    def test_minimax_alpha_beta_batched(self):
+        game = Game()
+        eval_params = (1.0, 1.0, 0.5, 0.5, 0.25)
+        board = BitBoard(board_configs.board_config2)
+        value, new_board = ai.minimax_alpha_beta(board, 3, float('-inf'), float('inf'), True, game, eval_params)
+
+        context = SearchContext(batch_evaluator=BatchEvaluator())
+        batched_value, batched_board = ai.minimax_alpha_beta(board, 3, float('-inf'), float('inf'), True, game,
+                                                             eval_params, context)
+        self.assertEqual(batched_value, value)
+        self.assertTrue(ai.compare_boards(batched_board, new_board))
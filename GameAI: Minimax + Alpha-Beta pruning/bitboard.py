@@ -0,0 +1,573 @@
+from constants import PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR, ROWS, COLS
+from move import Move
+from piece import Piece
+from squares import DIRECTIONS, SQUARES, SQUARE_TABLE
+from zobrist import PIECE_KEYS
+
+# Square index s maps to (row, col) = SQUARES[s], and a square's bit in a bitboard is 1 << s
+SQUARE_INDEX = {square: index for index, square in enumerate(SQUARES)}
+FULL_MASK = (1 << len(SQUARES)) - 1
+
+# Directions in the order Game.find_moves() explores them: front (towards row 0) left/right, then back left/right
+UP_LEFT, UP_RIGHT, DOWN_LEFT, DOWN_RIGHT = DIRECTIONS
+REVERSE = {UP_LEFT: DOWN_RIGHT, UP_RIGHT: DOWN_LEFT, DOWN_LEFT: UP_RIGHT, DOWN_RIGHT: UP_LEFT}
+FORWARD = {PLAYER1_PIECE_COLOR: [UP_LEFT, UP_RIGHT], PLAYER2_PIECE_COLOR: [DOWN_LEFT, DOWN_RIGHT]}
+
+ROW_MASKS = [sum(1 << index for index, (row, _) in enumerate(SQUARES) if row == r) for r in range(ROWS)]
+PROMOTION_MASK = {PLAYER1_PIECE_COLOR: ROW_MASKS[0], PLAYER2_PIECE_COLOR: ROW_MASKS[ROWS - 1]}
+KING_ROW_MASK = ROW_MASKS[0] | ROW_MASKS[ROWS - 1]
+
+
+def _target(index, direction, distance):
+    """
+    Finds the square reached by moving a given number of diagonal steps from a square, in squares.SQUARE_TABLE.
+
+    Args:
+        index (int): The square index to start from
+        direction (tuple): The (row, col) step of the diagonal
+        distance (int): 1 for a simple step, 2 for a jump
+
+    Returns:
+        int or None: The index of the target square, or None if it is off the board
+    """
+
+    row, col = SQUARES[index]
+    return SQUARE_INDEX.get(SQUARE_TABLE[row][col][DIRECTIONS.index(direction)][distance - 1])
+
+
+def _shift_masks(distance):
+    """
+    Groups the squares that have a target in each direction by the index offset of that target, so a whole bitboard
+    can be moved one or two diagonal steps with a couple of masks and shifts.
+
+    Args:
+        distance (int): 1 for a simple step, 2 for a jump
+
+    Returns:
+        dict: Maps each direction to a list of (mask, shift) pairs
+    """
+
+    masks = {}
+    for direction in DIRECTIONS:
+        by_shift = {}
+        for index in range(len(SQUARES)):
+            target = _target(index, direction, distance)
+            if target is not None:
+                by_shift[target - index] = by_shift.get(target - index, 0) | (1 << index)
+        masks[direction] = [(mask, shift) for shift, mask in by_shift.items()]
+    return masks
+
+
+NEIGHBOUR = {direction: [_target(index, direction, 1) for index in range(len(SQUARES))] for direction in DIRECTIONS}
+JUMP = {direction: [_target(index, direction, 2) for index in range(len(SQUARES))] for direction in DIRECTIONS}
+STEP_SHIFTS = _shift_masks(1)
+
+
+def shift(bitboard, direction):
+    """
+    Moves every set square of a bitboard one diagonal step, dropping squares that would leave the board.
+
+    Args:
+        bitboard (int): The squares to move
+        direction (tuple): The (row, col) step of the diagonal
+
+    Returns:
+        int: The bitboard of target squares
+    """
+
+    result = 0
+    for mask, offset in STEP_SHIFTS[direction]:
+        if offset > 0:
+            result |= (bitboard & mask) << offset
+        else:
+            result |= (bitboard & mask) >> -offset
+    return result
+
+
+def squares_of(bitboard):
+    """
+    Lists the indices of the set squares of a bitboard in ascending (row-major) order.
+
+    Args:
+        bitboard (int): The bitboard to decompose
+
+    Returns:
+        list: The square indices
+    """
+
+    indices = []
+    while bitboard:
+        low = bitboard & -bitboard
+        indices.append(low.bit_length() - 1)
+        bitboard ^= low
+    return indices
+
+
+class BitBoard:
+    def __init__(self, board_config=None):
+        """
+        Initializes a board that packs the 32 playable squares into four integer bitboards: Player 1 men, Player 1
+        kings, Player 2 men and Player 2 kings. It follows the same rules as Board and Game, so minimax_alpha_beta() and
+        evaluate() can run on it directly.
+
+        Args:
+            board_config (list, optional): A 2-D array in the Board.to_board_config() format. Defaults to the standard
+            starting position.
+        """
+
+        self.p1_men = self.p1_kings = self.p2_men = self.p2_kings = 0
+        self.undo_stack = []
+        if not board_config:
+            self.create()
+        else:
+            self.create_specific(board_config)
+        self.hash = self.compute_hash()
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Builds a BitBoard holding the same position as a Board (or any object with a to_board_config() method).
+
+        Args:
+            board (Board): The board to convert
+
+        Returns:
+            BitBoard: The equivalent bitboard position
+        """
+
+        return cls(board.to_board_config())
+
+    def create(self):
+        """
+        Places the pieces in their starting positions: Player 2 on the first three rows, Player 1 on the last three.
+        """
+
+        self.p2_men = ROW_MASKS[0] | ROW_MASKS[1] | ROW_MASKS[2]
+        self.p1_men = ROW_MASKS[5] | ROW_MASKS[6] | ROW_MASKS[7]
+
+    def create_specific(self, board_config):
+        """
+        Places the pieces as specified by a board configuration, where 1/11 are Player 1 pieces/kings, 2/22 are
+        Player 2 pieces/kings, and 0 is an empty square.
+
+        Args:
+            board_config (list): A 2-D array representing the board configuration
+        """
+
+        for index, (row, col) in enumerate(SQUARES):
+            value = board_config[row][col]
+            if value == 1:
+                self.p1_men |= 1 << index
+            elif value == 11:
+                self.p1_kings |= 1 << index
+            elif value == 2:
+                self.p2_men |= 1 << index
+            elif value == 22:
+                self.p2_kings |= 1 << index
+
+    def copy(self):
+        """
+        Creates an independent copy of this position. This only copies four integers.
+
+        Returns:
+            BitBoard: The copy
+        """
+
+        new_board = BitBoard.__new__(BitBoard)
+        new_board.p1_men, new_board.p1_kings = self.p1_men, self.p1_kings
+        new_board.p2_men, new_board.p2_kings = self.p2_men, self.p2_kings
+        new_board.hash = self.hash
+        new_board.undo_stack = []
+        return new_board
+
+    def compute_hash(self):
+        """
+        Computes the Zobrist hash of the position from scratch. It matches the hash of a Board with the same layout.
+
+        Returns:
+            int: The 64-bit hash of the piece layout
+        """
+
+        value = 0
+        for kind, bitboard in enumerate((self.p1_men, self.p1_kings, self.p2_men, self.p2_kings)):
+            for index in squares_of(bitboard):
+                value ^= PIECE_KEYS[kind][index]
+        return value
+
+    def occupied(self):
+        """
+        Returns:
+            int: The bitboard of all occupied squares
+        """
+
+        return self.p1_men | self.p1_kings | self.p2_men | self.p2_kings
+
+    def sides(self, color):
+        """
+        Splits the position into the men and kings of the given color and all pieces of its opponent.
+
+        Args:
+            color (tuple): The RGB color of the side to move
+
+        Returns:
+            tuple: (own men, own kings, opponent pieces) bitboards
+        """
+
+        if color == PLAYER1_PIECE_COLOR:
+            return self.p1_men, self.p1_kings, self.p2_men | self.p2_kings
+        return self.p2_men, self.p2_kings, self.p1_men | self.p1_kings
+
+    def piece_count(self, color):
+        """
+        Retrieves the number of pieces of a given color in constant time.
+
+        Args:
+            color (tuple): The RGB color of the pieces to count
+
+        Returns:
+            int: The number of pieces of the given color on the board
+        """
+
+        men, kings, _ = self.sides(color)
+        return (men | kings).bit_count()
+
+    def has_any_move(self, color):
+        """
+        Checks whether the given color has at least one legal move, with a few whole-board shifts and no move list.
+
+        Args:
+            color (tuple): The RGB color of the side to move
+
+        Returns:
+            bool: True if the side can move
+        """
+
+        men, kings, opp = self.sides(color)
+        empty = ~(men | kings | opp) & FULL_MASK
+        forward = FORWARD[color]
+        for direction in DIRECTIONS:
+            movers = (men | kings) if direction in forward else kings
+            steps = shift(movers, direction)
+            if steps & empty or shift(steps & opp, direction) & empty:
+                return True
+        return False
+
+    def get_piece(self, row, col):
+        """
+        Retrieves the piece at a given position on the board. A new Piece object is built for each call.
+
+        Args:
+            row (int): The row index of the piece
+            col (int): The column index of the piece
+
+        Returns:
+            Piece: The piece at the given position or 0 if no piece is present
+        """
+
+        index = SQUARE_INDEX.get((row, col))
+        if index is None:
+            return 0
+
+        bit = 1 << index
+        if (self.p1_men | self.p1_kings) & bit:
+            piece = Piece(row, col, PLAYER1_PIECE_COLOR)
+        elif (self.p2_men | self.p2_kings) & bit:
+            piece = Piece(row, col, PLAYER2_PIECE_COLOR)
+        else:
+            return 0
+
+        if (self.p1_kings | self.p2_kings) & bit:
+            piece.make_king()
+        return piece
+
+    def get_all_pieces(self, color):
+        """
+        Retrieves all pieces of a given color as Piece objects, in the same order as Board.get_all_pieces().
+
+        Args:
+            color (tuple): The RGB color of the pieces to retrieve
+
+        Returns:
+            list: A list of Piece objects of the given color
+        """
+
+        men, kings, _ = self.sides(color)
+        return [self.get_piece(*SQUARES[index]) for index in squares_of(men | kings)]
+
+    def to_board_config(self):
+        """
+        Converts the position to the configuration array format used by Board.
+
+        Returns:
+            list: A 2-D array representing the board configuration
+        """
+
+        board_config = [[0] * COLS for _ in range(ROWS)]
+        for bitboard, value in ((self.p1_men, 1), (self.p1_kings, 11), (self.p2_men, 2), (self.p2_kings, 22)):
+            for index in squares_of(bitboard):
+                row, col = SQUARES[index]
+                board_config[row][col] = value
+        return board_config
+
+    def to_board(self):
+        """
+        Converts the position back to a Board, e.g. to hand an AI move to Game.ai_move().
+
+        Returns:
+            Board: The equivalent Board
+        """
+
+        from board import Board
+        return Board(self.to_board_config())
+
+    def find_moves(self, color, captures=True, quiet=True):
+        """
+        Finds all moves for the given color, including multi-hop captures, following exactly the rules and ordering
+        of Game.generate_all_moves(): pieces in row-major order, directions front-left, front-right, back-left,
+        back-right, and only the final landing square of each jump chain.
+
+        Args:
+            color (tuple): The RGB color of the side to move
+            captures (bool, optional): Include the capture moves
+            quiet (bool, optional): Include the moves that capture nothing
+
+        Returns:
+            list: A list of (start, end, captures, king_hopeful) tuples, where start and end are square indices and
+            captures is a list of captured square indices
+        """
+
+        men, kings, opp = self.sides(color)
+        empty = ~(men | kings | opp) & FULL_MASK
+        promotion = PROMOTION_MASK[color]
+        forward = FORWARD[color]
+        moves = []
+
+        # Most positions have no capture at all, which a few whole-board shifts tell without visiting the pieces
+        if not quiet and not self._can_capture(men, kings, opp, empty, forward):
+            return moves
+
+        for start in squares_of(men | kings):
+            king = bool(kings >> start & 1)
+            for direction in (DIRECTIONS if king else forward):
+                target = NEIGHBOUR[direction][start]
+                if target is None:
+                    continue
+
+                if empty >> target & 1:
+                    if quiet:
+                        moves.append((start, target, [], not king and bool(promotion >> target & 1)))
+                elif captures and opp >> target & 1:
+                    landing = JUMP[direction][start]
+                    if landing is not None and empty >> landing & 1:
+                        # The moving piece leaves its start square and captured pieces are removed as the chain goes
+                        chain_empty = (empty | (1 << start) | (1 << target)) & ~(1 << landing)
+                        self._collect_jumps(start, landing, direction, king, opp & ~(1 << target), chain_empty,
+                                            [target], promotion, moves)
+
+        return moves
+
+    def _can_capture(self, men, kings, opp, empty, forward):
+        """
+        Checks whether any piece of a side has a jump, with two shifts for each direction a piece can move in.
+        """
+
+        for direction in DIRECTIONS:
+            movers = (men | kings) if direction in forward else kings
+            if movers and shift(shift(movers, direction) & opp, direction) & empty:
+                return True
+        return False
+
+    def _collect_jumps(self, start, square, direction, king, opp, empty, captures, promotion, moves):
+        """
+        Continues a jump chain from the square a piece has just landed on. As in Game.collect_jumps(), a piece continues
+        in its current row direction to either side, and a king may also turn back along its current column direction.
+        Only squares where the chain cannot continue are recorded as moves.
+        """
+
+        row_step, col_step = direction
+        continuations = [(row_step, -1), (row_step, 1)]
+        if king:
+            continuations.append((-row_step, col_step))
+
+        extended = False
+        for next_direction in continuations:
+            target = NEIGHBOUR[next_direction][square]
+            if target is None or not opp >> target & 1:
+                continue
+
+            landing = JUMP[next_direction][square]
+            if landing is not None and empty >> landing & 1:
+                extended = True
+                self._collect_jumps(start, landing, next_direction, king, opp & ~(1 << target),
+                                    (empty | (1 << square) | (1 << target)) & ~(1 << landing),
+                                    captures + [target], promotion, moves)
+
+        if not extended:
+            moves.append((start, square, captures, not king and bool(promotion >> square & 1)))
+
+    def make_move(self, start, end, captures):
+        """
+        Builds the position after a move without changing this one.
+
+        Args:
+            start (int): The square index the piece moves from
+            end (int): The square index the piece moves to
+            captures (list): The square indices of the captured pieces
+
+        Returns:
+            BitBoard: The new position
+        """
+
+        new_board = self.copy()
+        captured = 0
+        for index in captures:
+            captured |= 1 << index
+        new_board._play(start, end, captured)
+        return new_board
+
+    def _play(self, start, end, captured):
+        """
+        Moves the piece on one square to another and removes the captured pieces, updating the hash incrementally. A
+        piece ending on the first or last row is made a king, as Board.move_piece() does.
+
+        Args:
+            start (int): The square index the piece moves from
+            end (int): The square index the piece moves to
+            captured (int): The bitboard of captured pieces
+        """
+
+        start_bit, end_bit = 1 << start, 1 << end
+        boards = [self.p1_men, self.p1_kings, self.p2_men, self.p2_kings]
+        kind = 0 if (boards[0] | boards[1]) & start_bit else 2
+        opp_men, opp_kings = 2 - kind, 3 - kind
+        if boards[kind + 1] & start_bit:
+            kind += 1
+        new_kind = kind | 1 if end_bit & KING_ROW_MASK else kind
+
+        self.hash ^= PIECE_KEYS[kind][start] ^ PIECE_KEYS[new_kind][end]
+        for index in squares_of(captured):
+            self.hash ^= PIECE_KEYS[opp_kings if boards[opp_kings] >> index & 1 else opp_men][index]
+
+        boards[kind] &= ~start_bit
+        boards[new_kind] |= end_bit
+        boards[opp_men] &= ~captured
+        boards[opp_kings] &= ~captured
+        self.p1_men, self.p1_kings, self.p2_men, self.p2_kings = boards
+
+    def generate_moves(self, color, captures=True, quiet=True):
+        """
+        Generates all possible moves for a given color as Move records, in Game.generate_all_moves() order.
+
+        Args:
+            color (tuple): The RGB color of the side to move
+            captures (bool, optional): Include the capture moves
+            quiet (bool, optional): Include the moves that capture nothing
+
+        Returns:
+            list: A list of Move objects
+        """
+
+        if not captures:
+            return self._quiet_moves(color)
+
+        kings = self.p1_kings | self.p2_kings
+        return [Move(SQUARES[start], SQUARES[end], [SQUARES[index] for index in captured],
+                     not kings >> start & 1 and bool(KING_ROW_MASK >> end & 1))
+                for start, end, captured, _ in self.find_moves(color, captures, quiet)]
+
+    def _quiet_moves(self, color):
+        """
+        Builds the Move records of the moves that capture nothing directly, in generate_moves() order.
+        """
+
+        men, kings, opp = self.sides(color)
+        empty = ~(men | kings | opp) & FULL_MASK
+        forward = FORWARD[color]
+        moves = []
+
+        for start in squares_of(men | kings):
+            king = kings >> start & 1
+            origin = SQUARES[start]
+            for direction in (DIRECTIONS if king else forward):
+                target = NEIGHBOUR[direction][start]
+                if target is not None and empty >> target & 1:
+                    moves.append(Move(origin, SQUARES[target], (), not king and bool(KING_ROW_MASK >> target & 1)))
+
+        return moves
+
+    def apply_move(self, move):
+        """
+        Plays a move in place. The previous bitboards and hash are pushed on an undo stack so undo_move() can restore them.
+
+        Args:
+            move (Move): The move to play
+        """
+
+        captured = 0
+        for square in move.captures:
+            captured |= 1 << SQUARE_INDEX[square]
+
+        self.undo_stack.append((self.p1_men, self.p1_kings, self.p2_men, self.p2_kings, self.hash))
+        self._play(SQUARE_INDEX[move.start], SQUARE_INDEX[move.end], captured)
+
+    def undo_move(self, move):
+        """
+        Takes back the last move played with apply_move().
+
+        Args:
+            move (Move): The move to take back, which must be the last move applied
+        """
+
+        self.p1_men, self.p1_kings, self.p2_men, self.p2_kings, self.hash = self.undo_stack.pop()
+
+    def generate_all_moves(self, color):
+        """
+        Generates the positions resulting from all possible moves for a given color, in Game.generate_all_moves()
+        order.
+
+        Args:
+            color (tuple): The RGB color of the side to move
+
+        Returns:
+            list: A list of BitBoard positions
+        """
+
+        return [self.make_move(start, end, captures) for start, end, captures, _ in self.find_moves(color)]
+
+    def counts(self, color):
+        """
+        Computes the same metrics as ai.counts() for the given color with whole-board shifts and masks instead of a
+        per-piece traversal. Only single-hop moves are considered.
+
+        Args:
+            color (tuple): The RGB color of the pieces to evaluate
+
+        Returns:
+            tuple: (num_pieces, num_kings, num_moves, num_opportunities, num_king_hopefuls)
+        """
+
+        men, kings, opp = self.sides(color)
+        empty = ~(men | kings | opp) & FULL_MASK
+        forward = FORWARD[color]
+        promotion = PROMOTION_MASK[color]
+
+        num_moves = 0
+        capturing = 0
+        hopeful = 0
+        for direction in DIRECTIONS:
+            movers = (men | kings) if direction in forward else kings
+            if not movers:
+                continue
+
+            reverse = REVERSE[direction]
+            steps = shift(movers, direction)
+            simple = steps & empty
+            landings = shift(steps & opp, direction) & empty
+            num_moves += simple.bit_count() + landings.bit_count()
+
+            capturing |= shift(shift(landings, reverse), reverse)
+            if direction in forward:
+                promoting = shift(simple & promotion, reverse) | shift(shift(landings & promotion, reverse), reverse)
+                hopeful |= promoting & men
+
+        return (men | kings).bit_count(), kings.bit_count(), num_moves, capturing.bit_count(), hopeful.bit_count()
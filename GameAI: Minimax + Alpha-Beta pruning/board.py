@@ -1,17 +1,23 @@
-from constants import PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR, ROWS, COLS
+from constants import COLOR_SIDES, PLAYER1, PLAYER2, PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR, ROWS, COLS
 from piece import Piece
+from zobrist import hash_board, piece_key
 
 class Board:
     def __init__(self, board_config=None):
         """
-        Initializes the game board with what is to be used as a 2-D array. Then it creates the board.
+        Initializes the game board with what is to be used as a 2-D array. Then it creates the board and computes its
+        Zobrist hash and piece counts, which are kept up to date as pieces are moved and removed.
         """
 
         self.board = []
+        self.undo_stack = []
         if not board_config:
             self.create()
         else:
             self.create_specific(board_config)
+        self.hash = hash_board(self)
+        self.piece_counts = {PLAYER1_PIECE_COLOR: len(self.get_all_pieces(PLAYER1_PIECE_COLOR)),
+                             PLAYER2_PIECE_COLOR: len(self.get_all_pieces(PLAYER2_PIECE_COLOR))}
 
     def create(self):
         """
@@ -83,13 +89,27 @@ class Board:
             list: A list of Piece objects of the given color
         """
 
+        side = COLOR_SIDES[color]
         pieces = []
         for row in self.board:
             for piece in row:
-                if piece != 0 and piece.color == color:
+                if piece != 0 and piece.side == side:
                     pieces.append(piece)
         return pieces
 
+    def piece_count(self, color):
+        """
+        Retrieves the number of pieces of a given color in constant time.
+
+        Args:
+            color (tuple): The RGB color of the pieces to count
+
+        Returns:
+            int: The number of pieces of the given color on the board
+        """
+
+        return self.piece_counts[color]
+
     def move_piece(self, piece, row, col):
         """
         Moves a piece to a new position on the board and converts it to a king if applicable.
@@ -100,11 +120,13 @@ class Board:
             col (int): The target column
         """
 
+        self.hash ^= piece_key(piece.row, piece.col, piece.color, piece.king)
         self.board[piece.row][piece.col], self.board[row][col] = self.board[row][col], self.board[piece.row][piece.col]
         piece.move(row, col)
 
         if row == ROWS - 1 or row == 0:
             piece.make_king()
+        self.hash ^= piece_key(row, col, piece.color, piece.king)
 
     def remove_pieces(self, pieces):
         """
@@ -116,6 +138,44 @@ class Board:
 
         for piece in pieces:
             self.board[piece.row][piece.col] = 0
+            self.hash ^= piece_key(piece.row, piece.col, piece.color, piece.king)
+            self.piece_counts[piece.color] -= 1
+
+    def apply_move(self, move):
+        """
+        Plays a move in place. The captured pieces and the previous hash are kept on an undo stack so undo_move() can
+        restore them.
+
+        Args:
+            move (Move): The move to play
+        """
+
+        piece = self.board[move.start[0]][move.start[1]]
+        captured = [self.board[row][col] for row, col in move.captures]
+        self.undo_stack.append((captured, self.hash))
+
+        self.move_piece(piece, move.end[0], move.end[1])
+        self.remove_pieces(captured)
+
+    def undo_move(self, move):
+        """
+        Takes back the last move played with apply_move(), restoring captured pieces and undoing any promotion.
+
+        Args:
+            move (Move): The move to take back, which must be the last move applied
+        """
+
+        piece = self.board[move.end[0]][move.end[1]]
+        self.board[move.end[0]][move.end[1]] = 0
+        self.board[move.start[0]][move.start[1]] = piece
+        piece.move(move.start[0], move.start[1])
+        if move.promotes:
+            piece.king = False
+
+        captured_pieces, self.hash = self.undo_stack.pop()
+        for captured in captured_pieces:
+            self.board[captured.row][captured.col] = captured
+            self.piece_counts[captured.color] += 1
 
     def to_board_config(self):
         """
@@ -132,12 +192,12 @@ class Board:
                 piece = self.get_piece(row, col)
                 if piece == 0:
                     config_row.append(0)
-                elif piece.color == PLAYER1_PIECE_COLOR:
+                elif piece.side == PLAYER1:
                     if piece.king:
                         config_row.append(11)
                     else:
                         config_row.append(1)
-                elif piece.color == PLAYER2_PIECE_COLOR:
+                elif piece.side == PLAYER2:
                     if piece.king:
                         config_row.append(22)
                     else:
@@ -17,3 +17,7 @@ DARK_SQUARE_COLOR = SOFT_BROWN
 PLAYER1_PIECE_COLOR = OFF_WHITE
 PLAYER2_PIECE_COLOR = DARK_GREY
 
+# Pieces store their side as a small int; the RGB colors above are only used to draw them and in the public API
+PLAYER1, PLAYER2 = 1, 2
+SIDE_COLORS = {PLAYER1: PLAYER1_PIECE_COLOR, PLAYER2: PLAYER2_PIECE_COLOR}
+COLOR_SIDES = {PLAYER1_PIECE_COLOR: PLAYER1, PLAYER2_PIECE_COLOR: PLAYER2}
@@ -0,0 +1,160 @@
+from constants import PLAYER1, PLAYER1_PIECE_COLOR
+from squares import ALL_DIRECTIONS, FORWARD_DIRECTIONS, SQUARES, SQUARE_TABLE
+
+# A piece's single-hop moves only depend on the squares up to two diagonal steps away (the target and the landing
+# square of a jump). So when a square changes, only the pieces on it and on the squares within two diagonal steps of it
+# need to be looked at again.
+AFFECTED = {
+    (row, col): [(row, col)] + [square for neighbour, landing, _, _ in SQUARE_TABLE[row][col]
+                                for square in (neighbour, landing) if square is not None]
+    for row, col in SQUARES
+}
+
+
+def piece_features(board, piece):
+    """
+    Computes what a single piece adds to the metrics of ai.counts(), using the same single-hop move rules as
+    ai.find_single_moves().
+
+    Args:
+        board (Board): The current board state
+        piece (Piece): The piece to look at
+
+    Returns:
+        tuple: (pieces, kings, moves, opportunities, king_hopefuls) contributed by the piece
+    """
+
+    table = SQUARE_TABLE[piece.row][piece.col]
+    num_moves, capturing, hopeful = 0, 0, 0
+
+    for direction in (ALL_DIRECTIONS if piece.king else FORWARD_DIRECTIONS[piece.side]):
+        neighbour, landing, neighbour_promotes, landing_promotes = table[direction]
+        if neighbour is None:
+            continue
+
+        target = board.get_piece(neighbour[0], neighbour[1])
+        if target == 0:
+            promotes = neighbour_promotes
+        else:
+            if landing is None or board.get_piece(landing[0], landing[1]) != 0 or target.side == piece.side:
+                continue
+            promotes = landing_promotes
+            capturing = 1
+
+        num_moves += 1
+        if promotes and not piece.king:
+            hopeful = 1
+
+    return 1, int(piece.king), num_moves, capturing, hopeful
+
+
+class IncrementalEvaluator:
+    def __init__(self, board=None):
+        """
+        Initializes an evaluator that keeps the five evaluate() metrics of both players as running totals. After a
+        move, only the pieces near the changed squares are looked at again instead of the whole board.
+
+        Args:
+            board (Board, optional): The board to start tracking
+        """
+
+        self.contributions = {}
+        self.totals = [[0] * 5, [0] * 5]
+        self.saved = []
+        if board is not None:
+            self.reset(board)
+
+    def reset(self, board):
+        """
+        Recomputes every total from scratch for a new board.
+
+        Args:
+            board (Board): The board to track
+        """
+
+        self.contributions = {}
+        self.totals = [[0] * 5, [0] * 5]
+        self.saved = []
+        for square in SQUARES:
+            self._set(square, self._compute(board, square))
+
+    def update(self, board, move):
+        """
+        Updates the totals after move has been played on board with board.apply_move().
+
+        Args:
+            board (Board): The board, with the move already applied
+            move (Move): The move that was played
+        """
+
+        squares = set()
+        for changed in (move.start, move.end) + move.captures:
+            squares.update(AFFECTED[changed])
+
+        self.saved.append([(square, self.contributions.get(square)) for square in squares])
+        for square in squares:
+            self._set(square, self._compute(board, square))
+
+    def revert(self):
+        """
+        Restores the totals from before the last update(), to be called when the move is taken back.
+        """
+
+        for square, contribution in self.saved.pop():
+            self._set(square, contribution)
+
+    def counts(self, color):
+        """
+        Returns the running totals for a player in the format of ai.counts().
+
+        Args:
+            color (tuple): The RGB color of the player
+
+        Returns:
+            tuple: (num_pieces, num_kings, num_moves, num_opportunities, num_king_hopefuls)
+        """
+
+        return tuple(self.totals[0 if color == PLAYER1_PIECE_COLOR else 1])
+
+    def evaluate(self, pieces_weight=1.0, kings_weight=1.0, moves_weight=0.0, opportunities_weight=0.0,
+                 king_hopefuls_weight=0.0):
+        """
+        Scores the tracked board exactly like ai.evaluate(), for Player 2.
+
+        Returns:
+            float: A score representing the board's goodness for Player 2
+        """
+
+        p1, p2 = self.totals
+        return ((p2[0] - p1[0]) * pieces_weight +
+                (p2[1] - p1[1]) * kings_weight +
+                (p2[2] - p1[2]) * moves_weight +
+                (p2[3] - p1[3]) * opportunities_weight +
+                (p2[4] - p1[4]) * king_hopefuls_weight)
+
+    def _compute(self, board, square):
+        """
+        Returns the (side, features) contribution of the piece on a square, or None if it is empty.
+        """
+
+        piece = board.get_piece(*square)
+        if piece == 0:
+            return None
+        return 0 if piece.side == PLAYER1 else 1, piece_features(board, piece)
+
+    def _set(self, square, contribution):
+        """
+        Replaces the contribution of a square, adjusting the totals.
+        """
+
+        old = self.contributions.pop(square, None)
+        if old is not None:
+            totals = self.totals[old[0]]
+            for index, value in enumerate(old[1]):
+                totals[index] -= value
+
+        if contribution is not None:
+            self.contributions[square] = contribution
+            totals = self.totals[contribution[0]]
+            for index, value in enumerate(contribution[1]):
+                totals[index] += value
@@ -1,7 +1,9 @@
+from bitboard import BitBoard
 from board import Board
-from constants import PLAYER2_PIECE_COLOR, PLAYER1_PIECE_COLOR
+from constants import COLOR_SIDES, PLAYER2_PIECE_COLOR, PLAYER1_PIECE_COLOR, ROWS
 from copy import deepcopy
-from move_node import MoveNode
+from move import Move
+from squares import ALL_DIRECTIONS, CONTINUATIONS, FORWARD_DIRECTIONS, SQUARE_TABLE
 
 
 class Game:
@@ -84,17 +86,24 @@ class Game:
         self.board = board
         self.change_turn()
 
-    def winner(self):
+    def winner(self, board=None):
         """
-        Determines the winner of the game based on the number of remaining pieces.
+        Determines the winner of the game based on the number of remaining pieces. This takes constant time, since
+        boards keep count of their pieces.
+
+        Args:
+            board (Board, optional): The board to check. Defaults to the current game board.
 
         Returns:
             tuple: The RGB color of the pieces to evaluate, formatted as a tuple (e.g., (255, 240, 125)).
         """
 
-        if len(self.board.get_all_pieces(PLAYER1_PIECE_COLOR)) <= 0:
+        if board is None:
+            board = self.board
+
+        if board.piece_count(PLAYER1_PIECE_COLOR) <= 0:
             return PLAYER2_PIECE_COLOR
-        elif len(self.board.get_all_pieces(PLAYER2_PIECE_COLOR)) <= 0:
+        elif board.piece_count(PLAYER2_PIECE_COLOR) <= 0:
             return PLAYER1_PIECE_COLOR
         return None
 
@@ -117,6 +126,9 @@ class Game:
             list: A list of board states resulting from all possible moves for the given color
         """
 
+        if isinstance(board, BitBoard):
+            return board.generate_all_moves(color)
+
         moves = []
 
         for piece in board.get_all_pieces(color):
@@ -129,154 +141,231 @@ class Game:
 
         return moves
 
-    def find_moves(self, board, piece):
+    def generate_moves(self, board, color):
         """
-        Finds all possible moves for the specified piece on the board, including multi-hop captures. This function calculates:
-
-        - The total number of possible moves for the specified piece, accounting for all hops and captures
-        - The total number of captures achievable through multi-hop sequences
-        - The total number of king hopefuls via these moves (See Notes for evaluate()).
+        Generates all possible moves for a given color as compact Move records, in the same order as
+        generate_all_moves(). Unlike generate_all_moves(), no board is copied; the moves are meant to be played with
+        board.apply_move() and taken back with board.undo_move().
 
         Args:
             board (Board): The current board state
-            piece (Piece): The piece for which possible moves are being evaluated.
+            color (tuple): The RGB color of the pieces to evaluate, formatted as a tuple (e.g., (255, 240, 125)).
 
         Returns:
-            tuple: A tuple containing:
-                - (int) Total number of valid moves
-                - (int) Total number of possible captures
-                - (int) Total number of king hopefuls.
+            list: A list of Move objects
         """
 
-        all_moves = []
+        if isinstance(board, BitBoard):
+            return board.generate_moves(color)
 
-        if piece.color == PLAYER1_PIECE_COLOR or piece.king:
-            moves_tree = self.traverse(board, piece, piece.row, piece.col, 'front', 'left')
-            moves = self.dfs_collect_move_destinations(moves_tree)
-            all_moves.extend(moves)
+        moves = []
 
-            moves_tree = self.traverse(board, piece, piece.row, piece.col, 'front', 'right')
-            moves = self.dfs_collect_move_destinations(moves_tree)
-            all_moves.extend(moves)
+        for piece in board.get_all_pieces(color):
+            for move, captured_pieces, _ in self.find_moves(board, piece):
+                promotes = not piece.king and move[0] in (0, ROWS - 1)
+                captures = [(captured.row, captured.col) for captured in captured_pieces]
+                moves.append(Move((piece.row, piece.col), tuple(move), captures, promotes))
 
-        if piece.color == PLAYER2_PIECE_COLOR or piece.king:
-            moves_tree = self.traverse(board, piece, piece.row, piece.col, 'back', 'left')
-            moves = self.dfs_collect_move_destinations(moves_tree)
-            all_moves.extend(moves)
+        return moves
 
-            moves_tree = self.traverse(board, piece, piece.row, piece.col, 'back', 'right')
-            moves = self.dfs_collect_move_destinations(moves_tree)
-            all_moves.extend(moves)
+    def generate_captures(self, board, color):
+        """
+        Generates only the capture moves for a given color, in generate_moves() order.
 
-        return all_moves
+        Args:
+            board (Board): The current board state
+            color (tuple): The RGB color of the pieces to evaluate, formatted as a tuple (e.g., (255, 240, 125)).
+
+        Returns:
+            list: A list of Move objects that capture at least one piece
+        """
+
+        if isinstance(board, BitBoard):
+            return board.generate_moves(color, quiet=False)
+        return [move for move in self.generate_moves(board, color) if move.captures]
 
-    def traverse(self, board, piece, curr_row, curr_col, row_shift, col_shift, skipped=None, captured=None):
+    def generate_quiet_moves(self, board, color):
         """
-        Traverses the board to find moves (including multi-hop moves) for the specified piece by recursively evaluating
-        potential target squares based on row and column shifts. This function identifies if a move is valid, captures
-        any opposing pieces in its path, and assesses if the move can promote the piece to a king.
+        Generates only the moves that capture nothing for a given color, in generate_moves() order.
 
         Args:
             board (Board): The current board state
-            piece (Piece): The piece for which to calculate potential moves
-            curr_row (int): The current row position of the piece
-            curr_col (int): The current column position of the piece
-            row_shift (str): 'front' or 'back' row shift for move calculation
-            col_shift (str): 'left' or 'right' column shift for move calculation
-            skipped (Piece, optional): A piece skipped over in a potential capture, if any
-            captured (Piece, optional): A list of pieces captured in the current move sequence.
+            color (tuple): The RGB color of the pieces to evaluate, formatted as a tuple (e.g., (255, 240, 125)).
 
         Returns:
-            MoveNode: A root MoveNode representing the move tree from the current position, including all valid moves,
-            potential captures, and king hopefuls (See Notes for evaluate())
-        """
-
-        steps = {
-            'left': -1,
-            'right': 1,
-            'front': -1,
-            'back': 1,
-            'left_hop': -2,
-            'right_hop': 2,
-            'front_hop': -2,
-            'back_hop': 2
-        }
-
-        # Root of the moves tree at this level
-        moves = MoveNode((curr_row, curr_col), None, None)
-
-        target_row = curr_row + steps[row_shift]
-        target_col = curr_col + steps[col_shift]
-
-        if 0 <= target_row <= 7 and 0 <= target_col <= 7:
-            target_piece = board.get_piece(target_row, target_col)
-            if target_piece == 0:
-                if skipped is None and not captured:
-                    capture = None
-                    king_hopeful = self.check_king_hopeful(piece, target_row, curr_row, curr_col)
-
-                    new_node = MoveNode((target_row, target_col), capture, king_hopeful)
-                    moves.add_child(new_node)
-                elif skipped:
-                    capture = skipped
-                    king_hopeful = self.check_king_hopeful(piece, target_row, curr_row, curr_col)
-
-                    new_node = MoveNode((target_row, target_col), capture, king_hopeful)
-                    moves.add_child(new_node)
-
-                    curr_row = target_row
-                    curr_col = target_col
-
-                    new_board = deepcopy(board)
-                    new_piece = deepcopy(piece)
-                    new_board = self.simulate_move(new_piece, (curr_row, curr_col), new_board, [skipped])
-
-                    directions = [
-                        ('front' if 'front' in row_shift else 'back', 'left'),
-                        ('front' if 'front' in row_shift else 'back', 'right')
-                    ]
-
-                    if piece.king:
-                        directions.extend([('back' if 'front' in row_shift else 'front', 'left' if 'left' in col_shift else 'right')])
-
-                    for row_dir, col_dir in directions:
-                        new_moves = self.traverse(new_board, new_piece, curr_row, curr_col, row_dir, col_dir, captured=capture)
-                        new_node.children.extend(new_moves.children)
-
-            else:
-                if skipped is None and target_piece.color != piece.color:
-                    skipped = target_piece
-                    new_moves = self.traverse(board, piece, curr_row, curr_col,
-                                                        'front_hop' if 'front' in row_shift else 'back_hop',
-                                                        'left_hop' if 'left' in col_shift else 'right_hop',
-                                              skipped=skipped)
-                    moves.children.extend(new_moves.children)
+            list: A list of Move objects without captures
+        """
+
+        if isinstance(board, BitBoard):
+            return board.generate_moves(color, captures=False)
+
+        moves = []
+        for piece in board.get_all_pieces(color):
+            table = SQUARE_TABLE[piece.row][piece.col]
+            for direction in (ALL_DIRECTIONS if piece.king else FORWARD_DIRECTIONS[piece.side]):
+                neighbour, _, neighbour_promotes, _ = table[direction]
+                if neighbour is not None and board.board[neighbour[0]][neighbour[1]] == 0:
+                    moves.append(Move((piece.row, piece.col), neighbour, (), neighbour_promotes and not piece.king))
 
         return moves
 
-    def check_king_hopeful(self, piece, target_row, curr_row, curr_col):
+    def iter_moves(self, board, color):
+        """
+        Yields the moves for a given color in stages: all capture moves first, then the quiet moves, each stage in
+        generate_moves() order. The quiet moves are only generated once every capture has been taken, so a caller
+        that stops early (e.g. on a beta cutoff) never pays for them. The board may be changed between moves as long
+        as it is restored before the next one is asked for.
+
+        Args:
+            board (Board): The current board state
+            color (tuple): The RGB color of the pieces to evaluate, formatted as a tuple (e.g., (255, 240, 125)).
+
+        Yields:
+            Move: The next move
+        """
+
+        yield from self.generate_captures(board, color)
+        yield from self.generate_quiet_moves(board, color)
+
+    def is_quiet_move(self, board, color, move):
         """
-        Determines if a piece is eligible for promotion to king status based on its color and target row. If the piece
-        reaches the opponent's baseline row and is not yet a king, the current position coordinates are returned as a
-        marker for king promotion.
+        Checks that a move without captures is legal for a given color, e.g. a best move stored in a transposition
+        table, without generating any moves.
 
         Args:
-            piece (Piece): The piece to check for king promotion eligibility
-            target_row (int): The row the piece is moving to
-            curr_row (int): The current row position of the piece
-            curr_col (int): The current column position of the piece.
+            board (Board): The current board state
+            color (tuple): The RGB color of the pieces to evaluate, formatted as a tuple (e.g., (255, 240, 125)).
+            move (Move): The move to check
 
         Returns:
-            tuple or None: Returns the current position (curr_row, curr_col) of the piece if it is eligible for promotion;
-            otherwise, returns None.
+            bool: True if the move captures nothing and the side can play it
         """
 
-        if not piece.king and piece.color == PLAYER1_PIECE_COLOR and target_row == 0:
-            return curr_row, curr_col
-        if not piece.king and piece.color == PLAYER2_PIECE_COLOR and target_row == 7:
-            return curr_row, curr_col
+        if move.captures:
+            return False
+        piece = board.get_piece(*move.start)
+        if piece == 0 or piece.side != COLOR_SIDES[color] or board.get_piece(*move.end) != 0:
+            return False
 
-        return None
+        table = SQUARE_TABLE[piece.row][piece.col]
+        return any(table[direction][0] == move.end
+                   for direction in (ALL_DIRECTIONS if piece.king else FORWARD_DIRECTIONS[piece.side]))
+
+    def has_any_move(self, board, color):
+        """
+        Checks whether a color has at least one legal move, stopping at the first one found instead of generating
+        every move.
+
+        Args:
+            board (Board): The current board state
+            color (tuple): The RGB color of the pieces to evaluate, formatted as a tuple (e.g., (255, 240, 125)).
+
+        Returns:
+            bool: True if the color can move
+        """
+
+        if isinstance(board, BitBoard):
+            return board.has_any_move(color)
+
+        side = COLOR_SIDES[color]
+        for row in board.board:
+            for piece in row:
+                if piece == 0 or piece.side != side:
+                    continue
+
+                table = SQUARE_TABLE[piece.row][piece.col]
+                for direction in (ALL_DIRECTIONS if piece.king else FORWARD_DIRECTIONS[side]):
+                    neighbour, landing, _, _ = table[direction]
+                    if neighbour is None:
+                        continue
+
+                    target = board.board[neighbour[0]][neighbour[1]]
+                    if target == 0:
+                        return True
+                    if target.side != side and landing is not None and board.board[landing[0]][landing[1]] == 0:
+                        return True
+
+        return False
+
+    def find_moves(self, board, piece):
+        """
+        Finds all possible moves for the specified piece on the board, including multi-hop captures. Jump chains are
+        followed on the board itself: the moving piece's start square and the pieces it has jumped are emptied while
+        the chain is explored and put back afterwards, so no board, tree or path is copied.
+
+        Args:
+            board (Board): The current board state
+            piece (Piece): The piece for which possible moves are being evaluated.
+
+        Returns:
+            list: A list of [destination, captured pieces, king hopeful] entries, where destination is a (row, col)
+            tuple, captured pieces a list of Piece objects and king hopeful a bool (See Notes for evaluate())
+        """
+
+        all_moves = []
+        grid = board.board
+        row, col = piece.row, piece.col
+        table = SQUARE_TABLE[row][col]
+
+        for direction in (ALL_DIRECTIONS if piece.king else FORWARD_DIRECTIONS[piece.side]):
+            neighbour, landing, neighbour_promotes, landing_promotes = table[direction]
+            if neighbour is None:
+                continue
+
+            target = grid[neighbour[0]][neighbour[1]]
+            if target == 0:
+                all_moves.append([neighbour, [], neighbour_promotes and not piece.king])
+                continue
+
+            if target.side == piece.side or landing is None or grid[landing[0]][landing[1]] != 0:
+                continue
+
+            grid[row][col] = 0
+            grid[neighbour[0]][neighbour[1]] = 0
+            self.collect_jumps(grid, piece, landing, direction, [target], landing_promotes and not piece.king,
+                               all_moves)
+            grid[neighbour[0]][neighbour[1]] = target
+            grid[row][col] = piece
+
+        return all_moves
+
+    def collect_jumps(self, grid, piece, square, direction, captured, king_hopeful, moves):
+        """
+        Continues a jump chain from the square a piece has just landed on. The piece continues in its current row
+        direction to either side, and a king may also turn back along its current column direction. Only squares where
+        the chain cannot continue are recorded as moves.
+
+        Args:
+            grid (list): The board's 2-D list of squares, with the start square and the jumped pieces emptied
+            piece (Piece): The moving piece
+            square (tuple): The (row, col) square the piece has landed on
+            direction (int): The index in squares.DIRECTIONS of the last jump
+            captured (list): The pieces jumped so far. It is appended to and popped back as the chain is explored.
+            king_hopeful (bool): Whether any landing so far promotes the piece
+            moves (list): The list the finished moves are added to
+        """
+
+        table = SQUARE_TABLE[square[0]][square[1]]
+        extended = False
+        for next_direction in CONTINUATIONS[piece.king][direction]:
+            neighbour, landing, _, landing_promotes = table[next_direction]
+            if landing is None or grid[landing[0]][landing[1]] != 0:
+                continue
+
+            target = grid[neighbour[0]][neighbour[1]]
+            if target == 0 or target.side == piece.side:
+                continue
+
+            extended = True
+            grid[neighbour[0]][neighbour[1]] = 0
+            captured.append(target)
+            hopeful = king_hopeful or (landing_promotes and not piece.king)
+            self.collect_jumps(grid, piece, landing, next_direction, captured, hopeful, moves)
+            captured.pop()
+            grid[neighbour[0]][neighbour[1]] = target
+
+        if not extended:
+            moves.append([square, captured[:], king_hopeful])
 
     def simulate_move(self, piece, move, board, skip):
         """
@@ -298,64 +387,6 @@ class Game:
 
         return board
 
-    def dfs_collect_move_destinations(self, move_tree, current_path=None, captured_pieces=None, king_hopeful=False, destinations=None, is_root=True):
-        """
-        Performs a depth-first search (DFS) on a move tree to collect the final destinations for each possible move path,
-        including any captured pieces along each path and potential king promotions. This function collects only the end points
-        of paths, rather than full paths, along with any associated captured pieces and king hopeful status.
-
-        Args:
-            move_tree (Node): The root node of the move tree representing possible moves for a piece
-            current_path (list, optional): A list tracking the sequence of moves to the current node. Defaults to None, where it initializes as an empty list
-            captured_pieces (list, optional): A list of pieces captured along the current path. Defaults to None, initializing as an empty list
-            king_hopeful (bool, optional): A flag indicating if any move in the path could result in a king. Defaults to False
-            destinations (list, optional): A list to store all valid destination moves. Each entry in the list includes the final destination, captured pieces, and king hopeful status. Defaults to None, initializing as an empty list.
-            is_root (bool, optional): A flag to indicate if the current node is the root of the DFS traversal. Defaults to True.
-
-        Returns:
-            list: A list of move destinations where each entry is a list containing:
-                  - final destination coordinate,
-                  - list of captured pieces along the path, and
-                  - a boolean indicating if a king can be achieved on this path.
-
-        Example:
-            dfs_collect_move_destinations(root_node)  # Call on the root node of a move tree.
-        """
-
-        # Initialize path, captured pieces list, and destinations list if not provided
-        if current_path is None:
-            current_path = []
-        if captured_pieces is None:
-            captured_pieces = []
-        if destinations is None:
-            destinations = []
-
-        # Always include the root in the path (the first move of the piece)
-        if is_root or move_tree.move is not None:  # Include root move
-            current_path.append(move_tree.move)
-
-        # If there's a capture at this node, add it to captured_pieces
-        if move_tree.capture is not None:
-            captured_pieces.append(move_tree.capture)
-
-        # If this node represents a king hopeful situation, update the flag
-        if move_tree.king_hopeful is not None:
-            king_hopeful = True
-
-        # If we are at a leaf node (no more children), save only the final destination and its associated data
-        if not move_tree.children and len(current_path) > 1:  # Make sure there's at least one move
-            final_destination = current_path[-1]  # Only the final destination
-            destinations.append([final_destination, captured_pieces[:],
-                                 king_hopeful])  # Save destination, captures, and king hopeful status
-            # print(f"Leaf reached: Destination: {final_destination}, Captures: {captured_pieces}, King Hopeful: {king_hopeful}")
-        else:
-            # Recur for each child node (DFS)
-            for child in move_tree.children:
-                self.dfs_collect_move_destinations(child, current_path[:], captured_pieces[:], king_hopeful,
-                                                   destinations, is_root=False)
-
-        return destinations
-
     def _init(self):
         """
         Resets the game state to its initial values. This is separated out from __init__() to let this resetting
@@ -1,11 +1,19 @@
-from ai import minimax_alpha_beta
+from bitboard import BitBoard
 from constants import PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR, SQUARE_SIZE
 from display import Display
 from game import Game
+from opening_book import OpeningBook
+from search_context import SearchContext
+from search_worker import SearchWorker
+from tablebase import EndgameTablebase
+import os
 import pygame
 
 
 FPS = 60
+AI_TIME_BUDGET_MS = 1000  # Wall-clock time the AI may spend searching each move
+BOOK_PATH = 'opening_book.bin'  # Built offline with: python opening_book.py
+TABLEBASE_PATH = 'endgame.tb'  # Built offline with: python tablebase.py
 
 def main():
     """
@@ -16,14 +24,36 @@ def main():
     clock = pygame.time.Clock()
     game = Game()
     display = Display()
+    book = OpeningBook.load(BOOK_PATH) if os.path.exists(BOOK_PATH) else OpeningBook()
+    context = SearchContext(tablebase=EndgameTablebase(TABLEBASE_PATH) if os.path.exists(TABLEBASE_PATH) else None)
+    worker = SearchWorker(game, context, AI_TIME_BUDGET_MS)
 
     while run:
         clock.tick(FPS)
 
         if game.turn == PLAYER2_PIECE_COLOR:
-            # The AI's turn: Use the Minimax algorithm with Alpha-Beta pruning to make a move.
-            value, new_board = minimax_alpha_beta(game.get_board(), 3, float('-inf'), float('inf'), True, game)
-            game.ai_move(new_board)
+            # The AI's turn: Use the Minimax algorithm with Alpha-Beta pruning, deepening the search until the time
+            # budget is used up, to make a move. The search runs on a background thread and is polled once a frame,
+            # so the window stays responsive. If the engine pondered on the move the human played, its search is
+            # already running or done. Positions in the opening book are played instantly.
+            board = BitBoard.from_board(game.get_board())
+            new_board = None
+            if not worker.is_searching(board):
+                book_move = book.lookup(board, game)
+                if book_move is not None:
+                    worker.stop()
+                    new_board = board.copy()
+                    new_board.apply_move(book_move)
+                else:
+                    worker.start(board)
+            elif worker.done():
+                value, new_board, depth = worker.take_result()
+
+            if new_board is not None:
+                game.ai_move(new_board.to_board())
+                if game.winner() is None:
+                    # Think on the human's time, about the position after their most likely reply
+                    worker.ponder(new_board)
 
         # Check for a winner, and reset game if there is a winner.
         if game.winner() is not None:
@@ -31,20 +61,22 @@ def main():
                 print('\nYou won, Human!')
             elif game.winner() == PLAYER2_PIECE_COLOR:
                 print('\nThe AI won!')
+            worker.stop()
             game.reset()
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 run = False
 
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                # Your (human) turn: Select a piece to move.
+            if event.type == pygame.MOUSEBUTTONDOWN and game.turn == PLAYER1_PIECE_COLOR:
+                # Your (human) turn: Select a piece to move. Clicks while the AI is thinking are ignored.
                 pos = pygame.mouse.get_pos()
                 row, col = get_click_position_from_mouse(pos)
                 game.select(row, col)
 
         display.update(game.get_board(), game.get_valid_moves())  # Update the game state, and draw the board.
 
+    worker.stop()
     pygame.quit()
 
 def get_click_position_from_mouse(pos):
@@ -0,0 +1,38 @@
+class Move:
+    """
+    A compact record of a single move, including multi-hop captures. Boards apply it in place with apply_move() and
+    take it back with undo_move(), so the search never has to copy a board to look at a child position.
+
+    Attributes:
+        start (tuple): The (row, col) square the piece moves from
+        end (tuple): The (row, col) square the piece finally lands on
+        captures (tuple): The (row, col) squares of the captured pieces, in the order they are jumped
+        promotes (bool): True if the move makes the piece a king
+    """
+
+    __slots__ = ('start', 'end', 'captures', 'promotes')
+
+    def __init__(self, start, end, captures=(), promotes=False):
+        self.start = start
+        self.end = end
+        self.captures = tuple(captures)
+        self.promotes = promotes
+
+    def __eq__(self, other):
+        return (isinstance(other, Move) and self.start == other.start and self.end == other.end
+                and self.captures == other.captures)
+
+    def __hash__(self):
+        return hash((self.start, self.end, self.captures))
+
+    def __repr__(self):
+        """
+        Provides a string representation of the move, e.g. Move((5, 0) -> (3, 2) x [(4, 1)]).
+
+        Returns:
+            str: The move as a string
+        """
+
+        captures = f' x {list(self.captures)}' if self.captures else ''
+        promotes = ' K' if self.promotes else ''
+        return f'Move({self.start} -> {self.end}{captures}{promotes})'
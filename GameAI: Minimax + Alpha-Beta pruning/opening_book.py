@@ -0,0 +1,200 @@
+from ai import alpha_beta_search
+from bitboard import BitBoard, SQUARES, SQUARE_INDEX
+from constants import PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR
+from game import Game
+from ordering import MoveOrdering
+from search_context import SearchContext
+from transposition import TranspositionTable
+from zobrist import position_key
+import argparse
+import os
+import struct
+import tempfile
+import unittest
+
+BOOK_MAGIC = b'CKBK'
+BOOK_VERSION = 1
+HEADER = struct.Struct('<4sBI')  # magic, version, number of entries
+
+# Each entry is a position key (Zobrist hash including the side to move), the start and end square indices of the
+# book move, and which of the legal moves sharing that start and end square it is (they differ only in the captures)
+ENTRY = struct.Struct('<QBBB')
+
+
+class OpeningBook:
+    def __init__(self, entries=None):
+        """
+        Initializes an opening book mapping position keys to precomputed best moves.
+
+        Args:
+            entries (dict, optional): Maps position keys to (start, end, variant) tuples
+        """
+
+        self.entries = entries if entries is not None else {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, board, max_player, move, game):
+        """
+        Adds the best move for a position to the book.
+
+        Args:
+            board (Board): The position
+            max_player (bool): True if Player 2 (the maximizing AI) is to move
+            move (Move): The best move in the position
+            game (Game): The game instance, used to tell moves with the same start and end squares apart
+        """
+
+        color = PLAYER2_PIECE_COLOR if max_player else PLAYER1_PIECE_COLOR
+        same_squares = [legal for legal in game.generate_moves(board, color)
+                        if legal.start == move.start and legal.end == move.end]
+        variant = same_squares.index(move)
+        self.entries[position_key(board, max_player)] = (SQUARE_INDEX[move.start], SQUARE_INDEX[move.end], variant)
+
+    def lookup(self, board, game, max_player=True):
+        """
+        Looks up the book move for a position in constant time.
+
+        Args:
+            board (Board): The position
+            game (Game): The game instance
+            max_player (bool, optional): True if Player 2 (the maximizing AI) is to move
+
+        Returns:
+            Move: The book move, or None if the position is not in the book
+        """
+
+        entry = self.entries.get(position_key(board, max_player))
+        if entry is None:
+            return None
+
+        start, end, variant = SQUARES[entry[0]], SQUARES[entry[1]], entry[2]
+        color = PLAYER2_PIECE_COLOR if max_player else PLAYER1_PIECE_COLOR
+        same_squares = [move for move in game.generate_moves(board, color) if move.start == start and move.end == end]
+        # A hash collision could point at a move that is not legal here, in which case the book is not used
+        return same_squares[variant] if variant < len(same_squares) else None
+
+    def save(self, path):
+        """
+        Writes the book to a compact binary file, with entries sorted by position key.
+
+        Args:
+            path (str): The file to write
+        """
+
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(BOOK_MAGIC, BOOK_VERSION, len(self.entries)))
+            for key in sorted(self.entries):
+                file.write(ENTRY.pack(key, *self.entries[key]))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a book written by save().
+
+        Args:
+            path (str): The file to read
+
+        Returns:
+            OpeningBook: The loaded book
+        """
+
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        magic, version, count = HEADER.unpack_from(data)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION:
+            raise ValueError(f'{path} is not an opening book file')
+
+        body = data[HEADER.size:HEADER.size + count * ENTRY.size]
+        return cls({key: (start, end, variant) for key, start, end, variant in ENTRY.iter_unpack(body)})
+
+
+def build_book(depth=8, plies=3, eval_params=None, max_player=True, game=None, verbose=False):
+    """
+    Builds an opening book by searching every position that can arise in the first few plies from the standard
+    starting position to a fixed depth. All replies of the opponent are followed, but only the book move of the AI.
+
+    Args:
+        depth (int, optional): The depth each book position is searched to
+        plies (int, optional): How many plies from the start position the book covers
+        eval_params (tuple, optional): A tuple of weights for evaluating the board state
+        max_player (bool, optional): True to build the book for Player 2 (the maximizing AI)
+        game (Game, optional): The game instance
+        verbose (bool, optional): Print progress
+
+    Returns:
+        OpeningBook: The book
+    """
+
+    game = game if game is not None else Game()
+    eval_params = eval_params if eval_params is not None else (1.0, 1.0, 0.0, 0.0, 0.0)
+    book = OpeningBook()
+    context = SearchContext(table=TranspositionTable(1 << 20), ordering=MoveOrdering())
+
+    # Player 1 always moves first
+    frontier = [BitBoard()]
+    player2_to_move = False
+    for ply in range(plies):
+        next_frontier = []
+        seen = set()
+        for board in frontier:
+            if player2_to_move == max_player:
+                score, move = alpha_beta_search(board.copy(), depth, float('-inf'), float('inf'), max_player, game,
+                                                eval_params, context)
+                if move is None:
+                    continue
+                book.add(board, max_player, move, game)
+                child = board.copy()
+                child.apply_move(move)
+                children = [child]
+            else:
+                children = game.generate_all_moves(board, PLAYER2_PIECE_COLOR if player2_to_move
+                                                   else PLAYER1_PIECE_COLOR)
+
+            for child in children:
+                if child.hash not in seen:
+                    seen.add(child.hash)
+                    next_frontier.append(child)
+
+        if verbose:
+            print(f'ply {ply + 1}: {len(book)} book positions, {len(next_frontier)} positions next')
+        frontier = next_frontier
+        player2_to_move = not player2_to_move
+
+    return book
+
+
+class OpeningBookTest(unittest.TestCase):
+
+    def test_build_save_and_load(self):
+        game = Game()
+        book = build_book(depth=3, plies=2, game=game)
+        self.assertEqual(len(book), 7)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'book.bin')
+            book.save(path)
+            loaded = OpeningBook.load(path)
+
+        self.assertEqual(loaded.entries, book.entries)
+
+        board = BitBoard()
+        first_move = game.generate_moves(board, PLAYER1_PIECE_COLOR)[0]
+        board.apply_move(first_move)
+        move = loaded.lookup(board, game)
+        self.assertIn(move, game.generate_moves(board, PLAYER2_PIECE_COLOR))
+        self.assertIsNone(loaded.lookup(BitBoard(), game))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build an opening book for the checkers AI.')
+    parser.add_argument('--depth', type=int, default=8, help='search depth for each book position')
+    parser.add_argument('--plies', type=int, default=5, help='number of plies from the start position to cover')
+    parser.add_argument('--output', default='opening_book.bin', help='file to write the book to')
+    args = parser.parse_args()
+
+    opening_book = build_book(args.depth, args.plies, verbose=True)
+    opening_book.save(args.output)
+    print(f'Wrote {len(opening_book)} positions to {args.output}')
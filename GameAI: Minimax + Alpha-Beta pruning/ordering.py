@@ -0,0 +1,106 @@
+from constants import ROWS, COLS
+
+# Ordering ranks: the hash (principal variation) move first, then captures and promotions, then killer moves, then the
+# remaining quiet moves by their history score, which is kept below KILLER_RANK
+HASH_MOVE_RANK = 4 << 24
+FORCING_RANK = 3 << 24
+KILLER_RANK = 2 << 24
+HISTORY_LIMIT = 1 << 24
+
+
+class MoveOrdering:
+    def __init__(self, killers_per_ply=2):
+        """
+        Initializes the move ordering state for a search: killer moves per ply and a history table indexed by the
+        from and to squares of a move.
+
+        Args:
+            killers_per_ply (int, optional): How many killer moves to remember for each ply
+        """
+
+        self.killers_per_ply = killers_per_ply
+        self.killers = []
+        self.history = [[0] * (ROWS * COLS) for _ in range(ROWS * COLS)]
+
+    def order(self, moves, ply, hash_move=None):
+        """
+        Sorts moves so that the ones most likely to cause a beta cutoff are searched first. Moves of equal rank keep
+        their generation order.
+
+        Args:
+            moves (list): The Move objects to order
+            ply (int): The distance of the node from the root of the search
+            hash_move (Move, optional): The best move stored for this position in the transposition table
+
+        Returns:
+            list: The ordered moves
+        """
+
+        killers = self.killers[ply] if ply < len(self.killers) else []
+        history = self.history
+
+        def rank(move):
+            if move == hash_move:
+                return HASH_MOVE_RANK
+            if move.captures or move.promotes:
+                return FORCING_RANK + 2 * len(move.captures) + move.promotes
+            if move in killers:
+                return KILLER_RANK - killers.index(move)
+            return history[move.start[0] * COLS + move.start[1]][move.end[0] * COLS + move.end[1]]
+
+        return sorted(moves, key=rank, reverse=True)
+
+    def record_cutoff(self, move, ply, depth):
+        """
+        Updates the killer moves and history table after a move caused a beta cutoff. Captures and promotions are
+        already searched early, so only quiet moves are recorded.
+
+        Args:
+            move (Move): The move that caused the cutoff
+            ply (int): The distance of the node from the root of the search
+            depth (int): The remaining depth at the node, which weights the history bonus
+        """
+
+        if move.captures or move.promotes:
+            return
+
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[self.killers_per_ply:]
+
+        row = self.history[move.start[0] * COLS + move.start[1]]
+        to_square = move.end[0] * COLS + move.end[1]
+        row[to_square] += depth * depth
+        if row[to_square] >= HISTORY_LIMIT:
+            self.age()
+
+    def age(self):
+        """
+        Halves every history score, so that recent cutoffs outweigh old ones. Called between searches and whenever a
+        score grows too large.
+        """
+
+        for row in self.history:
+            for to_square in range(len(row)):
+                row[to_square] >>= 1
+
+    def new_search(self):
+        """
+        Prepares for a search from a new root position: killer moves belong to the old tree and are dropped, while
+        history scores are kept at half weight.
+        """
+
+        self.killers = []
+        self.age()
+
+    def clear(self):
+        """
+        Forgets all killer moves and history scores.
+        """
+
+        self.killers = []
+        self.history = [[0] * (ROWS * COLS) for _ in range(ROWS * COLS)]
@@ -0,0 +1,292 @@
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from copy import deepcopy
+from evaluator import IncrementalEvaluator
+from ordering import MoveOrdering
+from search_context import SearchContext, SearchTimeout
+from stats import SearchStats
+from tablebase import EndgameTablebase
+from transposition import EXACT, TranspositionTable
+from zobrist import position_key
+import ai
+import atexit
+import itertools
+import multiprocessing
+import weakref
+
+STOP_POLL_SECONDS = 0.01  # How often the parent checks its context's stop_requested flag while the workers search
+
+# The parts of a caller's SearchContext that the workers' contexts copy. Objects that cannot be shared between
+# processes are rebuilt in each worker: a transposition table of the same size, a fresh incremental evaluator, the
+# endgame tablebase opened from the same file.
+WorkerSettings = namedtuple('WorkerSettings', ['table_size', 'evaluator', 'principal_variation', 'stats',
+                                               'quiescence_nodes', 'late_move_reductions', 'null_move',
+                                               'tablebase_path'],
+                            defaults=[None, False, False, False, None, False, False, None])
+
+# One pool per worker count, kept alive between AI moves so processes are only started once
+_pools = {}
+
+# For each pool, the caller context of its last search, that context's table generation at the time and the number
+# identifying the worker state built for it. Worker state is only reused for the same context and an uncleared table.
+_owners = {}
+_owner_numbers = itertools.count(1)
+
+# Set in each worker process: the best root score found so far by any worker, from the root player's point of view
+# (scores of a minimizing root are stored negated), a flag the parent sets to stop the search, and search contexts
+# that stay warm across the searches of one caller context, one per settings and evaluation weights
+_shared_best = None
+_stop_flag = None
+_worker_contexts = {}
+
+
+def worker_settings(context):
+    """
+    Describes the search features of a context, so that the worker processes can search with the same ones.
+
+    Args:
+        context (SearchContext): The caller's search state, or None
+
+    Returns:
+        WorkerSettings: The settings to build the worker contexts from
+    """
+
+    if context is None:
+        return WorkerSettings()
+    return WorkerSettings(context.table.size if context.table is not None else None, context.evaluator is not None,
+                          context.principal_variation, context.stats is not None, context.quiescence_nodes,
+                          context.late_move_reductions, context.null_move,
+                          context.tablebase.path if context.tablebase is not None else None)
+
+
+def _init_worker(shared_best, stop_flag):
+    """
+    Initializes a worker process with the shared best score and stop flag.
+
+    Args:
+        shared_best (multiprocessing.Value): The shared best root score
+        stop_flag (multiprocessing.RawValue): Set to a non-zero value to stop the running searches
+    """
+
+    global _shared_best, _stop_flag
+    _shared_best = shared_best
+    _stop_flag = stop_flag
+    _worker_contexts.clear()
+
+
+def _owner(workers, context):
+    """
+    Returns the number identifying the worker state for a search with the given pool and caller context. The number
+    changes whenever the caller context changes or its table has been cleared, so that the workers start from a clean
+    state exactly when a sequential search with the caller context would.
+
+    Args:
+        workers (int): The number of worker processes
+        context (SearchContext): The caller's search state
+
+    Returns:
+        int: The owner number to pass to the workers
+    """
+
+    generation = context.table.generation if context.table is not None else 0
+    previous = _owners.get(workers)
+    if previous is not None and previous[0]() is context and previous[1] < generation:
+        owner = previous[2]
+    else:
+        owner = next(_owner_numbers)
+    _owners[workers] = (weakref.ref(context), generation, owner)
+    return owner
+
+
+def _worker_context(settings, eval_params, owner):
+    """
+    Returns the worker's search context for the given settings, building it on first use and again whenever the
+    owner number changes. Table entries are only valid for the evaluation weights they were scored with, so each set
+    of weights gets its own context.
+    """
+
+    key = (settings, tuple(eval_params))
+    if _worker_contexts.get(key, (None, None))[0] != owner:
+        table = TranspositionTable(settings.table_size) if settings.table_size else None
+        evaluator = IncrementalEvaluator() if settings.evaluator else None
+        tablebase = EndgameTablebase(settings.tablebase_path) if settings.tablebase_path else None
+        context = SearchContext(table=table, ordering=MoveOrdering(), evaluator=evaluator, tablebase=tablebase,
+                                principal_variation=settings.principal_variation,
+                                quiescence_nodes=settings.quiescence_nodes,
+                                late_move_reductions=settings.late_move_reductions, null_move=settings.null_move)
+        context.stop_flag = _stop_flag
+        _worker_contexts[key] = (owner, context)
+    return _worker_contexts[key][1]
+
+
+def _get_pool(workers):
+    """
+    Returns the process pool for the given number of workers, starting it on first use.
+
+    Args:
+        workers (int): The number of worker processes
+
+    Returns:
+        tuple: (ProcessPoolExecutor, multiprocessing.Value, multiprocessing.RawValue) the pool, its shared best score
+        and its stop flag
+    """
+
+    if workers not in _pools:
+        shared_best = multiprocessing.Value('d', float('-inf'))
+        stop_flag = multiprocessing.RawValue('b', 0)
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared_best, stop_flag))
+        _pools[workers] = (pool, shared_best, stop_flag)
+    return _pools[workers]
+
+
+@atexit.register
+def shutdown_pools():
+    """
+    Stops all worker processes.
+    """
+
+    for pool, _, _ in _pools.values():
+        pool.shutdown(cancel_futures=True)
+    _pools.clear()
+    _owners.clear()
+
+
+def _search_root_move(board, move, index, depth, max_player, game, eval_params, deadline, settings, owner):
+    """
+    Searches one root move in a worker process. The window is narrowed by the best score any worker has proven so
+    far, and a score that beats it is published for the other workers. SearchTimeout is raised once the deadline (if
+    any) has passed or the parent has set the stop flag.
+
+    Returns:
+        tuple: (index, score, bound, nodes, stats) where bound is the shared best score the move was searched against,
+        nodes the number of positions visited and stats a SearchStats for the move if settings asked for one. A score
+        at or below the bound (from the root player's point of view) is only an upper bound on the move's true score.
+    """
+
+    context = _worker_context(settings, eval_params, owner)
+    context.deadline = deadline
+    context.stats = SearchStats() if settings.stats else None
+    if context.table is not None:
+        context.table.new_search()
+    nodes_before = context.nodes
+
+    sign = 1 if max_player else -1
+    bound = _shared_best.value
+    board.apply_move(move)
+    if context.evaluator is not None:
+        context.evaluator.reset(board)
+    if max_player:
+        score, _ = ai.alpha_beta_search(board, depth - 1, bound, float('inf'), False, game, eval_params, context, 1)
+    else:
+        score, _ = ai.alpha_beta_search(board, depth - 1, float('-inf'), -bound, True, game, eval_params, context, 1)
+
+    if sign * score > bound:
+        with _shared_best.get_lock():
+            if sign * score > _shared_best.value:
+                _shared_best.value = sign * score
+    return index, score, bound, context.nodes - nodes_before, context.stats
+
+
+def parallel_root_search(board, depth, max_player, game, eval_params, workers, context=None):
+    """
+    Splits the root moves of a full-window search across a pool of worker processes, which share the best score found
+    so far to narrow each other's alpha-beta windows. The move returned is the same one the sequential search would
+    pick: the first move, in the order the root moves are searched in, with the best score.
+
+    The workers search with the features of the caller's context (see WorkerSettings), each keeping its own table and
+    move ordering between the searches of that context until its table is cleared. Its table and move ordering decide the order the root moves are handed out in, and
+    the root result is stored in its table for the next iteration. The nodes and stats of the workers are added to it,
+    and its deadline and stop_requested flag stop them.
+
+    Args:
+        board (Board): The position to search
+        depth (int): The depth to search to, which must be at least 1
+        max_player (bool): True if the maximizing player (AI) is to move
+        game (Game): The game instance
+        eval_params (tuple): A tuple of weights for evaluating the board state
+        workers (int): The number of worker processes
+        context (SearchContext, optional): The caller's search state
+
+    Returns:
+        tuple: A tuple (score, best_move) where best_move is a Move, or None if there are no moves
+    """
+
+    context = context if context is not None else SearchContext()
+    context.check_time()
+    context.nodes += 1
+    stats = context.stats
+    if stats is not None:
+        stats.enter(0)
+
+    color = ai.PLAYER2_PIECE_COLOR if max_player else ai.PLAYER1_PIECE_COLOR
+    moves = game.generate_moves(board, color)
+    if not moves:
+        return (-10000, None) if max_player else (10000, None)
+
+    # Likely best moves first, so that the shared bound tightens early
+    key = position_key(board, max_player)
+    entry = context.table.probe(key) if context.table is not None else None
+    hash_move = entry.best_move if entry is not None else None
+    if context.ordering is not None:
+        order = context.ordering.order(moves, 0, hash_move)
+    else:
+        order = sorted(moves, key=lambda move: move != hash_move)
+    indices = {move: index for index, move in enumerate(moves)}
+
+    sign = 1 if max_player else -1
+    settings = worker_settings(context)
+    owner = _owner(workers, context)
+    pool, shared_best, stop_flag = _get_pool(workers)
+    shared_best.value = float('-inf')
+    stop_flag.value = 0
+
+    futures = [pool.submit(_search_root_move, deepcopy(board), move, indices[move], depth, max_player, game,
+                           eval_params, context.deadline, settings, owner)
+               for move in order]
+    results = [None] * len(moves)
+    try:
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=STOP_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            if context.stop_requested:
+                raise SearchTimeout()
+            for future in done:
+                index, score, bound, nodes, move_stats = future.result()
+                results[index] = (sign * score, bound)
+                context.nodes += nodes
+                if stats is not None:
+                    stats.merge(move_stats)
+    except BaseException:
+        # Moves not started yet are dropped; running ones are told to stop, which they do at their next node, so the
+        # pool is free again for the next search
+        stop_flag.value = 1
+        for future in futures:
+            future.cancel()
+        wait(futures)
+        raise
+
+    # A score above its bound is exact, and the best exact score is the best score of the position, since every other
+    # score is an upper bound no larger than the bound it was searched against
+    best = max(score for score, bound in results if score > bound)
+    for move in order:
+        index = indices[move]
+        score, bound = results[index]
+        if score != best:
+            continue
+        if score > bound:
+            break
+
+        # This move failed low against the best score but may tie with it, and the sequential search would prefer
+        # it for coming first, so its exact score decides
+        board.apply_move(moves[index])
+        if context.evaluator is not None:
+            context.evaluator.reset(board)
+        exact, _ = ai.alpha_beta_search(board, depth - 1, float('-inf'), float('inf'), not max_player, game,
+                                        eval_params, context, 1)
+        board.undo_move(moves[index])
+        if sign * exact == best:
+            break
+
+    if context.table is not None:
+        context.table.store(key, depth, sign * best, EXACT, moves[index])
+    return sign * best, moves[index]
@@ -0,0 +1,246 @@
+from bitboard import BitBoard
+from board import Board
+from constants import PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR
+from game import Game
+from tournament import STANDARD_START, config_starts
+import argparse
+import time
+import unittest
+
+# Each generator builds the start position in its own board type and counts the tree with it:
+#   board          - Board with Game.generate_all_moves(), which copies the board for every move (the reference)
+#   board-moves    - Board with Game.generate_moves() and apply_move()/undo_move()
+#   bitboard       - BitBoard with generate_moves() and apply_move()/undo_move()
+GENERATORS = {
+    'board': (Board, False),
+    'board-moves': (Board, True),
+    'bitboard': (BitBoard, True),
+}
+
+# Known leaf counts, keyed by (start position, depth). The standard position starts with Player 1 to move and the
+# board_configs positions with Player 2 to move. Counts up to depth 4 come from the reference generator, up to depth 5
+# from board-moves, and the standard depths 6 and 7 from bitboard, each after it matched every shallower count.
+REFERENCE_COUNTS = {
+    ('standard', 1): 7,
+    ('standard', 2): 49,
+    ('standard', 3): 379,
+    ('standard', 4): 2872,
+    ('standard', 5): 23582,
+    ('standard', 6): 189143,
+    ('standard', 7): 1583148,
+    ('board_config1', 1): 17,
+    ('board_config1', 2): 156,
+    ('board_config1', 3): 2232,
+    ('board_config1', 4): 18799,
+    ('board_config1', 5): 247846,
+    ('board_config2', 1): 14,
+    ('board_config2', 2): 151,
+    ('board_config2', 3): 1777,
+    ('board_config2', 4): 17745,
+    ('board_config2', 5): 197877,
+    ('board_config4', 1): 12,
+    ('board_config4', 2): 5,
+    ('board_config4', 3): 66,
+    ('board_config4', 4): 140,
+    ('board_config4', 5): 1866,
+}
+
+
+def perft(board, depth, player2_to_move, game, make_unmake=True):
+    """
+    Counts the positions at exactly depth plies from a position. A position where the side to move has no moves (or no
+    pieces) ends its branch early and adds nothing.
+
+    Args:
+        board (Board): The position, which may be a Board or a BitBoard
+        depth (int): The number of plies to look ahead
+        player2_to_move (bool): True if Player 2 is to move
+        game (Game): The game instance
+        make_unmake (bool, optional): Play moves on the board with apply_move()/undo_move() instead of generating a
+        copy of the board for every move with generate_all_moves()
+
+    Returns:
+        int: The number of leaf positions
+    """
+
+    if depth == 0:
+        return 1
+
+    color = PLAYER2_PIECE_COLOR if player2_to_move else PLAYER1_PIECE_COLOR
+    if not make_unmake:
+        children = game.generate_all_moves(board, color)
+        if depth == 1:
+            return len(children)
+        return sum(perft(child, depth - 1, not player2_to_move, game, False) for child in children)
+
+    moves = game.generate_moves(board, color)
+    if depth == 1:
+        return len(moves)
+
+    count = 0
+    for move in moves:
+        board.apply_move(move)
+        count += perft(board, depth - 1, not player2_to_move, game)
+        board.undo_move(move)
+    return count
+
+
+def divide(board, depth, player2_to_move, game, make_unmake=True):
+    """
+    Splits a perft count by root move, which narrows a mismatch between two generators down to a single move.
+
+    Args:
+        board (Board): The position
+        depth (int): The number of plies to look ahead, at least 1
+        player2_to_move (bool): True if Player 2 is to move
+        game (Game): The game instance
+        make_unmake (bool, optional): As for perft()
+
+    Returns:
+        list: (Move, count) tuples in generation order
+    """
+
+    color = PLAYER2_PIECE_COLOR if player2_to_move else PLAYER1_PIECE_COLOR
+    moves = game.generate_moves(board, color)
+    if not make_unmake:
+        # generate_all_moves() returns the positions after the moves in the same order as generate_moves()
+        children = game.generate_all_moves(board, color)
+        return [(move, perft(child, depth - 1, not player2_to_move, game, False))
+                for move, child in zip(moves, children)]
+
+    counts = []
+    for move in moves:
+        board.apply_move(move)
+        counts.append((move, perft(board, depth - 1, not player2_to_move, game)))
+        board.undo_move(move)
+    return counts
+
+
+def starts():
+    """
+    Returns every start position perft can run from, by name.
+    """
+
+    return {start.name: start for start in [STANDARD_START] + config_starts()}
+
+
+def build_board(start, generator):
+    """
+    Builds a start position in the board type of a generator.
+
+    Args:
+        start (StartPosition): The start position
+        generator (str): A key of GENERATORS
+
+    Returns:
+        tuple: (board, make_unmake) for perft()
+    """
+
+    board_type, make_unmake = GENERATORS[generator]
+    return board_type(start.board_config), make_unmake
+
+
+def validate(generator, max_depth=None, game=None):
+    """
+    Checks a generator against the stored reference counts.
+
+    Args:
+        generator (str): A key of GENERATORS
+        max_depth (int, optional): Skip reference counts deeper than this
+        game (Game, optional): The game instance
+
+    Returns:
+        list: (start name, depth, expected, counted) for every mismatch
+    """
+
+    game = game if game is not None else Game()
+    positions = starts()
+    mismatches = []
+    for (name, depth), expected in REFERENCE_COUNTS.items():
+        if max_depth is not None and depth > max_depth:
+            continue
+        start = positions[name]
+        board, make_unmake = build_board(start, generator)
+        counted = perft(board, depth, start.player2_to_move, game, make_unmake)
+        if counted != expected:
+            mismatches.append((name, depth, expected, counted))
+    return mismatches
+
+
+def benchmark(start, depth, generator, game=None):
+    """
+    Times a perft run.
+
+    Args:
+        start (StartPosition): The start position
+        depth (int): The number of plies to look ahead
+        generator (str): A key of GENERATORS
+        game (Game, optional): The game instance
+
+    Returns:
+        tuple: (leaves, seconds, moves per second) where the moves are all the moves generated in the tree, i.e. the
+        number of positions below the root
+    """
+
+    game = game if game is not None else Game()
+    board, make_unmake = build_board(start, generator)
+    started = time.perf_counter()
+    leaves = perft(board, depth, start.player2_to_move, game, make_unmake)
+    seconds = time.perf_counter() - started
+
+    # Every position above the last ply generated its moves once, which adds up to the positions on every ply
+    moves = leaves + sum(perft(board, ply, start.player2_to_move, game, make_unmake) for ply in range(1, depth))
+    return leaves, seconds, moves / seconds if seconds else float('inf')
+
+
+class PerftTest(unittest.TestCase):
+
+    def test_reference_counts(self):
+        for generator in GENERATORS:
+            self.assertEqual(validate(generator, max_depth=2 if generator == 'board' else 3), [])
+
+    def test_generators_agree(self):
+        game = Game()
+        start = starts()['board_config3']
+        board, _ = build_board(start, 'board')
+        bitboard, _ = build_board(start, 'bitboard')
+        self.assertEqual(divide(board, 3, True, game, False), divide(bitboard, 3, True, game))
+
+    def test_make_unmake_restores_board(self):
+        game = Game()
+        board = BitBoard()
+        perft(board, 4, False, game)
+        self.assertEqual(board.hash, BitBoard().hash)
+        self.assertEqual(board.to_board_config(), BitBoard().to_board_config())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Count, split and time move generation with perft.')
+    parser.add_argument('--start', default='standard', help="'standard' or the name of a board_configs position")
+    parser.add_argument('--depth', type=int, default=5, help='number of plies to look ahead')
+    parser.add_argument('--generator', choices=list(GENERATORS), default='bitboard', help='move generator to use')
+    parser.add_argument('--divide', action='store_true', help='show the count for each root move')
+    parser.add_argument('--benchmark', action='store_true', help='report the time taken and moves per second')
+    parser.add_argument('--validate', action='store_true', help='check the generator against the reference counts')
+    args = parser.parse_args()
+
+    if args.validate:
+        failures = validate(args.generator, args.depth)
+        for failure in failures:
+            print('Mismatch for {} at depth {}: expected {}, counted {}'.format(*failure))
+        print('All reference counts match' if not failures else f'{len(failures)} mismatches')
+        raise SystemExit(1 if failures else 0)
+
+    start_position = starts()[args.start]
+    if args.benchmark:
+        leaf_count, elapsed, rate = benchmark(start_position, args.depth, args.generator)
+        print(f'perft({args.depth}) = {leaf_count} in {elapsed:.3f}s, {rate:.0f} moves/s')
+    elif args.divide:
+        start_board, play_in_place = build_board(start_position, args.generator)
+        split = divide(start_board, args.depth, start_position.player2_to_move, Game(), play_in_place)
+        for root_move, leaf_count in split:
+            print(f'{root_move}: {leaf_count}')
+        print(f'Total: {sum(leaf_count for _, leaf_count in split)}')
+    else:
+        start_board, play_in_place = build_board(start_position, args.generator)
+        print(perft(start_board, args.depth, start_position.player2_to_move, Game(), play_in_place))
@@ -1,4 +1,8 @@
+from constants import COLOR_SIDES, SIDE_COLORS
+
 class Piece:
+    # Slots instead of a per-instance dict: a Board holds 24 pieces, and game trees copy boards many times over
+    __slots__ = ('row', 'col', 'side', 'king')
 
     def __init__(self, row, col, color):
         """
@@ -7,14 +11,23 @@ class Piece:
         Args:
             row (int): The row index of the piece
             col (int): The column index of the piece
-            color (tuple): The color of the piece. It is a tuple of RGB int values, e.g., (255, 240, 125)
+            color (tuple): The color of the piece. It is a tuple of RGB int values, e.g., (255, 240, 125). The piece
+            stores it as its side, PLAYER1 or PLAYER2.
         """
 
         self.row = row
         self.col = col
-        self.color = color
+        self.side = COLOR_SIDES[color]
         self.king = False
 
+    @property
+    def color(self):
+        """
+        The RGB color of the piece, looked up from its side.
+        """
+
+        return SIDE_COLORS[self.side]
+
     def __repr__(self):
         """
         Provides a string representation of the piece using its color.
@@ -42,4 +55,4 @@ class Piece:
         Promotes the piece to a king by setting the king attribute to True.
         """
 
-        self.king = True
\ No newline at end of file
+        self.king = True
@@ -0,0 +1,178 @@
+from bitboard import FULL_MASK, SQUARES, BitBoard
+from board import Board
+from constants import PLAYER1, PLAYER1_PIECE_COLOR
+from game import Game
+import board_configs
+import struct
+import unittest
+
+# Bit offsets of the four 32-bit bitboards inside a Position
+P1_MEN_SHIFT, P1_KINGS_SHIFT, P2_MEN_SHIFT, P2_KINGS_SHIFT = 0, 32, 64, 96
+
+# Codes of the board_configs format, in the order of the four bitboards
+PIECE_CODES = (1, 11, 2, 22)
+
+# The compact binary encoding of a position: three little-endian 32-bit masks of the playable squares holding Player 1
+# pieces, Player 2 pieces and kings, 12 bytes in all
+MASKS = struct.Struct('<III')
+
+
+class Position(int):
+    """
+    An immutable position packed into a single integer: the four bitboards of a BitBoard (Player 1 men, Player 1 kings,
+    Player 2 men, Player 2 kings) side by side in 128 bits. Hashing and equality are those of an int, so positions can
+    be compared, stored in sets and used as dictionary keys in constant time, at a fraction of the memory of a Board.
+    The side to move is not part of the position.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_bitboards(cls, p1_men, p1_kings, p2_men, p2_kings):
+        """
+        Packs four bitboards into a position.
+        """
+
+        return cls(p1_men << P1_MEN_SHIFT | p1_kings << P1_KINGS_SHIFT | p2_men << P2_MEN_SHIFT |
+                   p2_kings << P2_KINGS_SHIFT)
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Builds the position of a board.
+
+        Args:
+            board (Board): The board, which may be a Board or a BitBoard
+
+        Returns:
+            Position: The packed position
+        """
+
+        if isinstance(board, BitBoard):
+            return cls.from_bitboards(board.p1_men, board.p1_kings, board.p2_men, board.p2_kings)
+
+        bitboards = [0, 0, 0, 0]
+        for index, (row, col) in enumerate(SQUARES):
+            piece = board.get_piece(row, col)
+            if piece != 0:
+                bitboards[(0 if piece.side == PLAYER1 else 2) + piece.king] |= 1 << index
+        return cls.from_bitboards(*bitboards)
+
+    @classmethod
+    def from_masks(cls, player1, player2, kings):
+        """
+        Builds a position from the three masks of the binary encoding.
+        """
+
+        return cls.from_bitboards(player1 & ~kings, player1 & kings, player2 & ~kings, player2 & kings)
+
+    @classmethod
+    def decode(cls, data, offset=0):
+        """
+        Reads a position from its 12-byte binary encoding.
+
+        Args:
+            data (bytes): A buffer holding the encoding, such as bytes, a bytearray or an mmap
+            offset (int, optional): Where the encoding starts in the buffer
+
+        Returns:
+            Position: The decoded position
+        """
+
+        return cls.from_masks(*MASKS.unpack_from(data, offset))
+
+    @property
+    def masks(self):
+        """
+        The (player1, player2, kings) masks of the binary encoding.
+        """
+
+        p1_men, p1_kings, p2_men, p2_kings = self.bitboards
+        return p1_men | p1_kings, p2_men | p2_kings, p1_kings | p2_kings
+
+    def encode(self):
+        """
+        Writes the position in its 12-byte binary encoding.
+
+        Returns:
+            bytes: The three masks, little-endian
+        """
+
+        return MASKS.pack(*self.masks)
+
+    @property
+    def bitboards(self):
+        """
+        The four bitboards as a (p1_men, p1_kings, p2_men, p2_kings) tuple.
+        """
+
+        return (self >> P1_MEN_SHIFT & FULL_MASK, self >> P1_KINGS_SHIFT & FULL_MASK,
+                self >> P2_MEN_SHIFT & FULL_MASK, self >> P2_KINGS_SHIFT & FULL_MASK)
+
+    def to_bitboard(self):
+        """
+        Unpacks the position into a BitBoard that can be searched.
+
+        Returns:
+            BitBoard: The position as a board
+        """
+
+        board = BitBoard.__new__(BitBoard)
+        board.p1_men, board.p1_kings, board.p2_men, board.p2_kings = self.bitboards
+        board.undo_stack = []
+        board.hash = board.compute_hash()
+        return board
+
+    def to_board(self):
+        """
+        Unpacks the position into a Board.
+
+        Returns:
+            Board: The position as a board
+        """
+
+        return Board(self.to_board_config())
+
+    def to_board_config(self):
+        """
+        Converts the position to the board_configs format.
+
+        Returns:
+            list: A 2-D array where 1/11 are Player 1 pieces/kings, 2/22 are Player 2 pieces/kings and 0 is empty
+        """
+
+        board_config = [[0] * 8 for _ in range(8)]
+        for code, bitboard in zip(PIECE_CODES, self.bitboards):
+            for index, (row, col) in enumerate(SQUARES):
+                if bitboard >> index & 1:
+                    board_config[row][col] = code
+        return board_config
+
+    def __repr__(self):
+        return 'Position(0x{:032x})'.format(int(self))
+
+
+class PositionTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for number in range(1, 29):
+            config = getattr(board_configs, f'board_config{number}')
+            position = Position.from_board(Board(config))
+            self.assertEqual(position, Position.from_board(BitBoard(config)))
+            self.assertEqual(position.to_board_config(), BitBoard(config).to_board_config())
+            self.assertEqual(position.to_bitboard().hash, BitBoard(config).hash)
+
+    def test_binary_encoding(self):
+        for number in range(1, 29):
+            config = getattr(board_configs, f'board_config{number}')
+            data = Position.from_board(Board(config)).encode()
+            self.assertEqual(len(data), MASKS.size)
+            self.assertEqual(Position.decode(b'xx' + data, 2).to_board().to_board_config(), config)
+
+    def test_hashable(self):
+        game = Game()
+        children = game.generate_all_moves(BitBoard(), PLAYER1_PIECE_COLOR)
+        positions = {Position.from_board(BitBoard()), Position.from_board(Board())}
+        positions.update(Position.from_board(child) for child in children)
+        self.assertEqual(len(positions), 1 + len(children))
+        self.assertIn(Position.from_board(children[0].to_board()), positions)
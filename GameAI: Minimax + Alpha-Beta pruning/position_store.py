@@ -0,0 +1,205 @@
+from bitboard import BitBoard
+from collections import namedtuple
+from constants import PLAYER2_PIECE_COLOR
+from game import Game
+from position import Position
+import board_configs
+import mmap
+import os
+import struct
+import tempfile
+import unittest
+
+STORE_MAGIC = b'CKPS'
+STORE_VERSION = 1
+HEADER = struct.Struct('<4sHH8x')  # magic, version, record size; padded to 16 bytes so the records stay aligned
+
+# Each record is a position in its binary encoding (Player 1 pieces, Player 2 pieces and kings masks), the ply it was
+# reached at, whether Player 2 is to move, and a result from Player 2's point of view (1 win, 0 draw, -1 loss)
+RECORD = struct.Struct('<IIIHBb')
+
+# The same layout as a NumPy structured dtype, so a whole store can be read without parsing:
+#   numpy.memmap(path, dtype=numpy.dtype(RECORD_FIELDS), mode='r', offset=HEADER.size)
+RECORD_FIELDS = [('player1', '<u4'), ('player2', '<u4'), ('kings', '<u4'), ('ply', '<u2'), ('player2_to_move', 'u1'),
+                 ('result', 'i1')]
+
+PositionRecord = namedtuple('PositionRecord', ['position', 'player2_to_move', 'result', 'ply'],
+                            defaults=[True, 0, 0])
+
+
+class PositionStore:
+    def __init__(self, path, readonly=False):
+        """
+        Opens an append-only file of fixed-size position records, creating it if it does not exist. Records are
+        appended at the end and read back by index through a memory map, in constant time and without parsing the
+        rest of the file. It serves as the storage of self-play datasets and game logs.
+
+        Args:
+            path (str): The store file
+            readonly (bool, optional): Open an existing store for reading only
+
+        Raises:
+            ValueError: If the file is not a position store of this version
+        """
+
+        self.path = path
+        self.file = open(path, 'rb' if readonly else 'a+b')
+        self.file.seek(0, os.SEEK_END)
+        size = self.file.tell()
+        if size == 0 and not readonly:
+            self.file.write(HEADER.pack(STORE_MAGIC, STORE_VERSION, RECORD.size))
+            self.file.flush()
+            size = HEADER.size
+        else:
+            self.file.seek(0)
+            header = self.file.read(HEADER.size)
+            if len(header) < HEADER.size or HEADER.unpack(header) != (STORE_MAGIC, STORE_VERSION, RECORD.size):
+                self.file.close()
+                raise ValueError(f'{path} is not a version {STORE_VERSION} position store')
+
+        self.count = (size - HEADER.size) // RECORD.size
+        self.map = None
+        self.mapped = 0  # Number of records covered by the current memory map
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def append(self, board, player2_to_move=True, result=0, ply=0):
+        """
+        Appends a position.
+
+        Args:
+            board (Board): The position, as a Board, a BitBoard or a Position
+            player2_to_move (bool, optional): True if Player 2 is to move
+            result (int, optional): The result of the game from Player 2's point of view
+            ply (int, optional): The ply the position was reached at
+
+        Returns:
+            int: The index of the new record
+        """
+
+        position = board if isinstance(board, Position) else Position.from_board(board)
+        self.file.write(RECORD.pack(*position.masks, ply, player2_to_move, result))
+        self.count += 1
+        return self.count - 1
+
+    def extend(self, records):
+        """
+        Appends many positions at once.
+
+        Args:
+            records (iterable): PositionRecord tuples
+        """
+
+        data = b''.join(RECORD.pack(*record.position.masks, record.ply, record.player2_to_move, record.result)
+                        for record in records)
+        self.file.write(data)
+        self.count += len(data) // RECORD.size
+
+    def __getitem__(self, index):
+        """
+        Reads a record by index.
+
+        Args:
+            index (int): The index of the record; negative indices count from the end
+
+        Returns:
+            PositionRecord: The record
+
+        Raises:
+            IndexError: If there is no record with this index
+        """
+
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('position store index out of range')
+
+        if index >= self.mapped:
+            self._remap()
+        player1, player2, kings, ply, player2_to_move, result = RECORD.unpack_from(self.map,
+                                                                                  HEADER.size + index * RECORD.size)
+        return PositionRecord(Position.from_masks(player1, player2, kings), bool(player2_to_move), result, ply)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    def board(self, index):
+        """
+        Reads the position of a record as a BitBoard that can be searched.
+        """
+
+        return self[index].position.to_bitboard()
+
+    def _remap(self):
+        """
+        Maps the whole file, including the records appended since the last mapping.
+        """
+
+        self.flush()
+        if self.map is not None:
+            self.map.close()
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.mapped = self.count
+
+    def flush(self):
+        """
+        Writes appended records through to the file.
+        """
+
+        if not self.file.closed and self.file.writable():
+            self.file.flush()
+
+    def close(self):
+        """
+        Flushes and closes the store.
+        """
+
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.flush()
+        self.file.close()
+
+
+class PositionStoreTest(unittest.TestCase):
+
+    def test_append_and_read(self):
+        game = Game()
+        boards = [BitBoard(getattr(board_configs, f'board_config{number}')) for number in range(1, 29)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'positions.bin')
+            with PositionStore(path) as store:
+                store.append(boards[0], True, 1, 5)
+                self.assertEqual(store[0], PositionRecord(Position.from_board(boards[0]), True, 1, 5))
+                store.extend(PositionRecord(Position.from_board(board), False, -1, ply)
+                             for ply, board in enumerate(boards[1:]))
+                self.assertEqual(store[-1].result, -1)
+
+            self.assertEqual(os.path.getsize(path), HEADER.size + 28 * RECORD.size)
+            with PositionStore(path, readonly=True) as store:
+                self.assertEqual(len(store), 28)
+                for index, board in enumerate(boards):
+                    self.assertEqual(store.board(index).to_board_config(), board.to_board_config())
+                    self.assertEqual(store.board(index).hash, board.hash)
+                self.assertEqual([record.ply for record in store][1:], list(range(27)))
+                self.assertRaises(IndexError, store.__getitem__, 28)
+
+            # Appending to an existing store keeps its records
+            with PositionStore(path) as store:
+                store.append(game.generate_all_moves(boards[0], PLAYER2_PIECE_COLOR)[0])
+                self.assertEqual((len(store), store[27].ply, store[28].result), (29, 26, 0))
+
+    def test_rejects_other_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'other.bin')
+            with open(path, 'wb') as file:
+                file.write(b'not a position store')
+            self.assertRaises(ValueError, PositionStore, path)
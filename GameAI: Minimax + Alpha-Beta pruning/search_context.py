@@ -0,0 +1,64 @@
+from time import perf_counter
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside a search when its deadline has passed, unwinding it so the caller can fall back to the result of the
+    last completed iteration.
+    """
+
+
+class SearchContext:
+    def __init__(self, table=None, deadline=None, ordering=None, evaluator=None, tablebase=None, stats=None,
+                 principal_variation=False, quiescence_nodes=None, batch_evaluator=None, late_move_reductions=False,
+                 null_move=False):
+        """
+        Holds the state shared by every node of a search, so that alpha_beta_search() does not need an extra argument
+        for each search feature.
+
+        Args:
+            table (TranspositionTable, optional): Table probed before a node is expanded and updated after it is searched
+            deadline (float, optional): A time.perf_counter() value after which the search raises SearchTimeout
+            ordering (MoveOrdering, optional): Killer and history state used to order moves at each node
+            evaluator (IncrementalEvaluator, optional): Keeps the evaluation metrics up to date as moves are played, so
+            leaves are scored without rescanning the board
+            tablebase (EndgameTablebase, optional): Exact results for positions with few pieces, used instead of
+            searching them
+            stats (SearchStats, optional): Collects node, cutoff, table and timing statistics as the search runs
+            principal_variation (bool, optional): Search every move after the first at a node with a null window, and
+            only search it again with the full window if it turns out better (principal variation search)
+            quiescence_nodes (int, optional): Play out captures at depth 0 before evaluating, visiting at most this many
+            positions for each position at depth 0. Without it, positions at depth 0 are evaluated directly.
+            batch_evaluator (BatchEvaluator, optional): Evaluates the children of a node at depth 1 in one vectorized
+            call
+            late_move_reductions (bool, optional): Search quiet moves that come late in the move order one ply less
+            deep, and search them again at full depth only if they turn out better than the best move so far
+            null_move (bool, optional): Let the side to move pass, and prune the node if even passing leaves the score
+            outside the window and a shallower search of the real moves confirms it (verified null move pruning)
+        """
+
+        self.table = table
+        self.deadline = deadline
+        self.ordering = ordering
+        self.evaluator = evaluator
+        self.tablebase = tablebase
+        self.stats = stats
+        self.principal_variation = principal_variation
+        self.quiescence_nodes = quiescence_nodes
+        self.batch_evaluator = batch_evaluator
+        self.late_move_reductions = late_move_reductions
+        self.null_move = null_move
+        self.null_move_active = False  # Set while a null move is being searched, so a line holds at most one of them
+        self.quiescence_left = 0  # What is left of quiescence_nodes for the current position at depth 0
+        self.nodes = 0  # Positions visited by alpha_beta_search() and quiescence_search() with this context
+        self.stop_requested = False  # Set from another thread to abort the search as if its deadline had passed
+        self.stop_flag = None  # A shared value that another process sets to non-zero to abort the search the same way
+
+    def check_time(self):
+        """
+        Aborts the search by raising SearchTimeout once the deadline has passed or a stop has been requested.
+        """
+
+        if (self.stop_requested or (self.stop_flag is not None and self.stop_flag.value)
+                or (self.deadline is not None and perf_counter() > self.deadline)):
+            raise SearchTimeout()
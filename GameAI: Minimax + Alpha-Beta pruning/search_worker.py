@@ -0,0 +1,227 @@
+from ai import iterative_deepening, minimax_alpha_beta
+from bitboard import BitBoard
+from constants import PLAYER1_PIECE_COLOR
+from game import Game
+from move import Move
+from position import Position
+from search_context import SearchContext
+from threading import Thread
+from transposition import EXACT, TranspositionTable
+from zobrist import position_key
+import board_configs
+import time
+import unittest
+
+PREDICTION_DEPTH = 2  # Depth of the search that predicts the human's reply when the table has no move for it
+
+
+def predict_reply(board, game, context, eval_params=None):
+    """
+    Predicts the human's (Player 1's) reply in a position, for pondering. The AI's last search usually left the best
+    reply in the transposition table; otherwise, or if the stored move is not legal here, a shallow search picks it.
+
+    Args:
+        board (BitBoard): The position after the AI's move, with Player 1 to move
+        game (Game): The game instance
+        context (SearchContext): The AI's search state
+        eval_params (tuple, optional): A tuple of weights for evaluating the board state
+
+    Returns:
+        BitBoard: The position after the predicted reply, or None if Player 1 has no moves
+    """
+
+    if context.table is not None:
+        entry = context.table.probe(position_key(board, False))
+        move = entry.best_move if entry is not None else None
+
+        # A stored move is checked before it is played, in case its entry belongs to another position with the same key
+        if move is not None and (move in game.generate_captures(board, PLAYER1_PIECE_COLOR) if move.captures
+                                 else game.is_quiet_move(board, PLAYER1_PIECE_COLOR, move)):
+            predicted = board.copy()
+            predicted.apply_move(move)
+            return predicted
+
+    _, predicted = minimax_alpha_beta(board, PREDICTION_DEPTH, float('-inf'), float('inf'), False, game, eval_params)
+    return predicted if predicted is not board else None
+
+
+class SearchWorker:
+    def __init__(self, game, context, time_budget_ms, eval_params=None):
+        """
+        Initializes a worker that runs the AI's (Player 2's) iterative deepening searches on a background thread, so
+        the display loop keeps handling events while the AI thinks. The loop starts a search, polls done() once a
+        frame, and collects the move with take_result().
+
+        While the human thinks, the worker can also ponder: it predicts the human's most likely reply and searches the
+        position after it, both on its thread. If the human plays that reply the search is already running or finished, and its move is played as soon
+        as it is ready.
+
+        Args:
+            game (Game): The game instance
+            context (SearchContext): The search state, kept between moves. Only the worker's thread uses it while a
+            search runs.
+            time_budget_ms (float): The time budget of each search in milliseconds
+            eval_params (tuple, optional): A tuple of weights for evaluating the board state
+        """
+
+        self.game = game
+        self.context = context
+        self.time_budget_ms = time_budget_ms
+        self.eval_params = eval_params
+        self.thread = None
+        self.position = None  # The position being searched, or None
+        self.pondering = False
+        self.result = None
+
+    def start(self, board, pondering=False):
+        """
+        Starts searching a position with Player 2 to move, stopping any search already running.
+
+        Args:
+            board (BitBoard): The position to search. The worker searches a copy of it.
+            pondering (bool, optional): True if the position is a predicted one
+        """
+
+        self.stop()
+        board = board.copy()
+        self.position = Position.from_board(board)
+        self.pondering = pondering
+        self.result = None
+        self.thread = Thread(target=self._run, args=(board,), daemon=True)
+        self.thread.start()
+
+    def _run(self, board):
+        self.result = iterative_deepening(board, self.game, self.time_budget_ms, True, self.eval_params,
+                                          context=self.context)
+
+    def _ponder(self, board):
+        predicted = predict_reply(board, self.game, self.context, self.eval_params)
+        if predicted is None or self.context.stop_requested:
+            return
+        self.position = Position.from_board(predicted)
+        self._run(predicted)
+
+    def ponder(self, board):
+        """
+        Starts pondering after the AI has moved, by searching the position after the human's predicted reply. The
+        reply is predicted on the worker's thread, and is_searching() is False for every position until it is known.
+
+        Args:
+            board (BitBoard): The position after the AI's move, with Player 1 to move
+
+        Returns:
+            bool: True if a search was started, False if the human has no moves
+        """
+
+        self.stop()
+        if not self.game.has_any_move(board, PLAYER1_PIECE_COLOR):
+            return False
+        self.pondering = True
+        self.thread = Thread(target=self._ponder, args=(board.copy(),), daemon=True)
+        self.thread.start()
+        return True
+
+    def is_searching(self, board):
+        """
+        Checks whether the current or finished search, pondering or not, is for the given position.
+
+        Args:
+            board (BitBoard): The position with Player 2 to move
+
+        Returns:
+            bool: True if take_result() will return a move for this position once done() is True
+        """
+
+        return self.position is not None and self.position == Position.from_board(board)
+
+    def done(self):
+        """
+        Checks without blocking whether the search has finished.
+        """
+
+        return self.thread is not None and not self.thread.is_alive()
+
+    def take_result(self):
+        """
+        Returns the result of the finished search and forgets it.
+
+        Returns:
+            tuple: (score, new_board, depth) as returned by iterative_deepening()
+        """
+
+        self.thread.join()
+        result = self.result
+        self.thread = self.position = self.result = None
+        self.pondering = False
+        return result
+
+    def stop(self):
+        """
+        Stops the running search, if any, and discards its result. A stopped search unwinds at its next node, so this
+        returns almost at once.
+        """
+
+        if self.thread is not None:
+            self.context.stop_requested = True
+            self.thread.join()
+            self.context.stop_requested = False
+        self.thread = self.position = self.result = None
+        self.pondering = False
+
+
+class SearchWorkerTest(unittest.TestCase):
+
+    def wait(self, worker):
+        while not worker.done():
+            time.sleep(0.001)
+        return worker.take_result()
+
+    def test_search(self):
+        game = Game()
+        board = BitBoard(board_configs.board_config2)
+        worker = SearchWorker(game, SearchContext(), 50)
+        worker.start(board)
+        self.assertTrue(worker.is_searching(board))
+        score, new_board, depth = self.wait(worker)
+
+        self.assertEqual(iterative_deepening(board, game, float('inf'), max_depth=depth)[0], score)
+        self.assertFalse(worker.is_searching(board))
+
+    def test_stop(self):
+        game = Game()
+        context = SearchContext()
+        worker = SearchWorker(game, context, float('inf'))
+        worker.start(BitBoard(board_configs.board_config2))
+        time.sleep(0.05)
+        self.assertFalse(worker.done())
+
+        worker.stop()
+        self.assertIsNone(worker.thread)
+        self.assertFalse(context.stop_requested)
+
+    def test_ponder(self):
+        game = Game()
+        context = SearchContext(table=TranspositionTable())
+        _, after_ai, _ = iterative_deepening(BitBoard(board_configs.board_config2), game, 50, context=context)
+        predicted = predict_reply(after_ai, game, context)
+
+        worker = SearchWorker(game, context, 20)
+        self.assertTrue(worker.ponder(after_ai))
+        self.assertTrue(worker.pondering)
+        while not worker.done():
+            time.sleep(0.001)
+        for reply in game.generate_all_moves(after_ai, PLAYER1_PIECE_COLOR):
+            self.assertEqual(worker.is_searching(reply), Position.from_board(reply) == Position.from_board(predicted))
+        self.assertIsNotNone(self.wait(worker))
+
+    def test_predict_reply_checks_the_stored_move(self):
+        game = Game()
+        board = BitBoard(board_configs.board_config2)
+        _, searched = minimax_alpha_beta(board, PREDICTION_DEPTH, float('-inf'), float('inf'), False, game)
+
+        # An entry whose move cannot be played here, as if another position had the same key
+        context = SearchContext(table=TranspositionTable())
+        for move in (Move((0, 1), (7, 0)), Move((5, 0), (3, 2), [(4, 1)])):
+            context.table.store(position_key(board, False), 1, 0, EXACT, move)
+            predicted = predict_reply(board, game, context)
+            self.assertEqual(Position.from_board(predicted), Position.from_board(searched))
@@ -0,0 +1,55 @@
+from constants import PLAYER1, PLAYER2, ROWS, COLS
+
+# The square and direction tables shared by the move generators and the evaluators, built once. They live in their
+# own module because game.py imports bitboard.py, so bitboard.py could not import them from game.py.
+
+# The 32 playable (dark) squares in row-major order
+SQUARES = [(row, col) for row in range(ROWS) for col in range(COLS) if col % 2 == ((row + 1) % 2)]
+
+# Diagonal directions in the order Game.find_moves() explores them: front (towards row 0) left/right, then back left/right.
+# The tables below refer to them by index.
+DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+ALL_DIRECTIONS = (0, 1, 2, 3)
+FORWARD_DIRECTIONS = {PLAYER1: (0, 1), PLAYER2: (2, 3)}
+
+# The directions a jump chain can continue in after a jump in each direction: onwards in the same row direction to
+# either side, and for a king also back along the same column direction. Indexed by king, then by direction.
+CONTINUATIONS = {
+    False: [[index for index, (row_change, _) in enumerate(DIRECTIONS) if row_change == DIRECTIONS[direction][0]]
+            for direction in ALL_DIRECTIONS],
+    True: [[index for index, (row_change, _) in enumerate(DIRECTIONS) if row_change == DIRECTIONS[direction][0]] +
+           [DIRECTIONS.index((-DIRECTIONS[direction][0], DIRECTIONS[direction][1]))]
+           for direction in ALL_DIRECTIONS],
+}
+
+
+def _square_table(row, col):
+    """
+    Builds the move table entries of one square.
+
+    Args:
+        row (int): The row index of the square
+        col (int): The column index of the square
+
+    Returns:
+        list: For each direction, a (neighbour, landing, neighbour promotes, landing promotes) tuple. neighbour is the
+        adjacent (row, col) square and landing the square a jump lands on, or None if they are off the board. The
+        promotes flags tell whether a man moving in that direction is crowned on arriving there.
+    """
+
+    entries = []
+    for row_change, col_change in DIRECTIONS:
+        squares = []
+        for distance in (1, 2):
+            target_row, target_col = row + row_change * distance, col + col_change * distance
+            squares.append((target_row, target_col) if 0 <= target_row < ROWS and 0 <= target_col < COLS else None)
+
+        promotion_row = 0 if row_change < 0 else ROWS - 1
+        entries.append((squares[0], squares[1], squares[0] is not None and squares[0][0] == promotion_row,
+                        squares[1] is not None and squares[1][0] == promotion_row))
+    return entries
+
+
+# SQUARE_TABLE[row][col][direction] holds the move table entry of each dark square (None for light squares), so that
+# move generation looks targets up instead of recomputing them and checking bounds
+SQUARE_TABLE = [[_square_table(row, col) if (row, col) in SQUARES else None for col in range(COLS)] for row in range(ROWS)]
@@ -0,0 +1,220 @@
+import json
+import unittest
+
+
+class SearchStats:
+    def __init__(self):
+        """
+        Initializes a collector for what a search spends its time on. It is filled in by alpha_beta_search() when it is
+        set as the stats of the SearchContext, and costs nothing otherwise.
+        """
+
+        self.reset()
+
+    def reset(self):
+        """
+        Clears all counters.
+        """
+
+        self.nodes_per_ply = []      # Positions entered at each distance from the root
+        self.cutoffs_per_ply = []    # Beta cutoffs at each distance from the root
+        self.cutoff_indices = []     # How many cutoffs came from the first, second, ... move searched
+        self.quiescence_nodes = 0    # Positions visited by the quiescence search below depth 0
+        self.leaf_evaluations = 0
+        self.table_probes = 0
+        self.table_hits = 0          # Probes that found an entry for the position
+        self.table_cutoffs = 0       # Hits that settled the node without searching it
+        self.tablebase_hits = 0
+        self.reductions = 0          # Late moves searched one ply less deep
+        self.researches = 0          # Reduced moves that beat the window and were searched again at full depth
+        self.null_move_tries = 0
+        self.null_move_cutoffs = 0   # Null moves whose cutoff the verification search confirmed
+        self.moves_generated = 0
+        self.movegen_seconds = 0.0
+        self.eval_seconds = 0.0
+        self.iterations = []         # (depth, nodes, seconds) of each completed iterative deepening iteration
+
+    def enter(self, ply):
+        """
+        Records a position entered at the given distance from the root.
+        """
+
+        if ply >= len(self.nodes_per_ply):
+            self.nodes_per_ply.extend([0] * (ply + 1 - len(self.nodes_per_ply)))
+            self.cutoffs_per_ply.extend([0] * (ply + 1 - len(self.cutoffs_per_ply)))
+        self.nodes_per_ply[ply] += 1
+
+    def record_evaluation(self, seconds, count=1):
+        """
+        Records leaf evaluations and the time they took.
+        """
+
+        self.leaf_evaluations += count
+        self.eval_seconds += seconds
+
+    def record_movegen(self, moves, seconds):
+        """
+        Records a call to the move generator, the number of moves it returned and the time it took.
+        """
+
+        self.moves_generated += moves
+        self.movegen_seconds += seconds
+
+    def record_probe(self, hit):
+        """
+        Records a transposition table probe and whether it found the position.
+        """
+
+        self.table_probes += 1
+        self.table_hits += hit
+
+    def record_cutoff(self, ply, index):
+        """
+        Records a beta cutoff by the index-th move searched at a node.
+        """
+
+        self.cutoffs_per_ply[ply] += 1
+        if index >= len(self.cutoff_indices):
+            self.cutoff_indices.extend([0] * (index + 1 - len(self.cutoff_indices)))
+        self.cutoff_indices[index] += 1
+
+    def record_iteration(self, depth, nodes, seconds):
+        """
+        Records a completed iteration of iterative deepening.
+        """
+
+        self.iterations.append((depth, nodes, seconds))
+
+    def merge(self, other):
+        """
+        Adds the counters of another SearchStats, e.g. one filled in by a worker process, to these.
+
+        Args:
+            other (SearchStats): The statistics to add
+        """
+
+        for name in ('nodes_per_ply', 'cutoffs_per_ply', 'cutoff_indices'):
+            mine, theirs = getattr(self, name), getattr(other, name)
+            mine.extend([0] * (len(theirs) - len(mine)))
+            for index, value in enumerate(theirs):
+                mine[index] += value
+        for name in ('quiescence_nodes', 'leaf_evaluations', 'table_probes', 'table_hits', 'table_cutoffs',
+                     'tablebase_hits', 'reductions', 'researches', 'null_move_tries', 'null_move_cutoffs',
+                     'moves_generated', 'movegen_seconds', 'eval_seconds'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    @property
+    def nodes(self):
+        """
+        The total number of positions entered, including those of the quiescence search.
+        """
+
+        return sum(self.nodes_per_ply) + self.quiescence_nodes
+
+    def effective_branching_factor(self):
+        """
+        Returns how many times more positions are visited on each ply than on the one before, as the geometric mean
+        over all plies. Without pruning this is the average number of moves; good move ordering pushes it down towards
+        its square root.
+
+        Returns:
+            float: The effective branching factor, or 0.0 if fewer than two plies were searched
+        """
+
+        plies = len(self.nodes_per_ply) - 1
+        if plies < 1 or not self.nodes_per_ply[0]:
+            return 0.0
+        return (self.nodes_per_ply[-1] / self.nodes_per_ply[0]) ** (1 / plies)
+
+    def first_move_cutoff_rate(self):
+        """
+        Returns the share of cutoffs caused by the first move searched, a direct measure of move ordering quality.
+        """
+
+        cutoffs = sum(self.cutoff_indices)
+        return self.cutoff_indices[0] / cutoffs if cutoffs else 0.0
+
+    def to_dict(self):
+        """
+        Returns every counter and the derived figures as a dictionary of plain values.
+        """
+
+        return {
+            'nodes': self.nodes,
+            'nodes_per_ply': self.nodes_per_ply,
+            'quiescence_nodes': self.quiescence_nodes,
+            'cutoffs': sum(self.cutoff_indices),
+            'cutoffs_per_ply': self.cutoffs_per_ply,
+            'cutoff_indices': self.cutoff_indices,
+            'first_move_cutoff_rate': self.first_move_cutoff_rate(),
+            'leaf_evaluations': self.leaf_evaluations,
+            'table_probes': self.table_probes,
+            'table_hits': self.table_hits,
+            'table_cutoffs': self.table_cutoffs,
+            'tablebase_hits': self.tablebase_hits,
+            'reductions': self.reductions,
+            'researches': self.researches,
+            'null_move_tries': self.null_move_tries,
+            'null_move_cutoffs': self.null_move_cutoffs,
+            'moves_generated': self.moves_generated,
+            'movegen_seconds': self.movegen_seconds,
+            'eval_seconds': self.eval_seconds,
+            'effective_branching_factor': self.effective_branching_factor(),
+            'iterations': [{'depth': depth, 'nodes': nodes, 'seconds': seconds}
+                           for depth, nodes, seconds in self.iterations],
+        }
+
+    def to_json(self, path=None):
+        """
+        Exports the statistics as JSON.
+
+        Args:
+            path (str, optional): A file to write the JSON to
+
+        Returns:
+            str: The JSON text
+        """
+
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, 'w') as file:
+                file.write(text)
+        return text
+
+
+class SearchStatsTest(unittest.TestCase):
+
+    def test_counters(self):
+        stats = SearchStats()
+        stats.enter(0)
+        for _ in range(4):
+            stats.enter(1)
+        for _ in range(16):
+            stats.enter(2)
+        stats.record_cutoff(1, 0)
+        stats.record_cutoff(1, 0)
+        stats.record_cutoff(2, 3)
+        stats.record_probe(True)
+        stats.record_probe(False)
+
+        self.assertEqual(stats.nodes, 21)
+        self.assertAlmostEqual(stats.effective_branching_factor(), 4.0)
+        self.assertAlmostEqual(stats.first_move_cutoff_rate(), 2 / 3)
+
+        exported = json.loads(stats.to_json())
+        self.assertEqual(exported['nodes_per_ply'], [1, 4, 16])
+        self.assertEqual(exported['cutoffs_per_ply'], [0, 2, 1])
+        self.assertEqual(exported['cutoff_indices'], [2, 0, 0, 1])
+        self.assertEqual((exported['table_probes'], exported['table_hits']), (2, 1))
+
+        other = SearchStats()
+        other.enter(3)
+        other.record_cutoff(3, 1)
+        other.record_probe(True)
+        stats.merge(other)
+        self.assertEqual(stats.nodes_per_ply, [1, 4, 16, 1])
+        self.assertEqual(stats.cutoff_indices, [2, 1, 0, 1])
+        self.assertEqual(stats.table_hits, 2)
+
+        stats.reset()
+        self.assertEqual(stats.to_dict()['nodes'], 0)
@@ -0,0 +1,383 @@
+from array import array
+from bitboard import BitBoard, SQUARES, squares_of
+from constants import PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR, ROWS
+from itertools import combinations
+from math import comb
+import argparse
+import mmap
+import os
+import struct
+import tempfile
+import unittest
+
+TABLEBASE_MAGIC = b'CKTB'
+TABLEBASE_VERSION = 1
+HEADER = struct.Struct('<4sBBH')  # magic, version, maximum number of pieces, number of tables
+TABLE = struct.Struct('<BBBBQ')  # Player 1 men, Player 1 kings, Player 2 men, Player 2 kings, file offset
+
+# Each position is stored in one byte: 0 for a position that is not in the table (e.g. a man on its promotion row), 1
+# for a draw, and 2 + distance for a win or loss in distance plies. Wins are always an odd and losses an even number of
+# plies away, so the distance alone tells them apart.
+UNKNOWN = 0
+DRAW = 1
+MAX_DISTANCE = 255 - 2
+
+WIN_SCORE = 10000
+
+BINOMIAL = [[comb(n, k) for k in range(len(SQUARES) + 1)] for n in range(len(SQUARES) + 1)]
+
+
+def signatures(max_pieces):
+    """
+    Lists the material signatures of every table with up to max_pieces pieces and at least one piece per side.
+
+    Args:
+        max_pieces (int): The largest total number of pieces
+
+    Returns:
+        list: (Player 1 men, Player 1 kings, Player 2 men, Player 2 kings) tuples
+    """
+
+    return [(p1_men, p1_kings, p2_men, p2_kings)
+            for total in range(2, max_pieces + 1)
+            for p1_men in range(total + 1) for p1_kings in range(total + 1 - p1_men)
+            for p2_men in range(total + 1 - p1_men - p1_kings)
+            for p2_kings in [total - p1_men - p1_kings - p2_men]
+            if p1_men + p1_kings and p2_men + p2_kings]
+
+
+def table_size(signature):
+    """
+    Returns the number of entries of the table for a material signature: every placement of each kind of piece,
+    for either side to move.
+    """
+
+    size = 2
+    for count in signature:
+        size *= BINOMIAL[len(SQUARES)][count]
+    return size
+
+
+def rank(bitboard):
+    """
+    Ranks the set of squares of a bitboard among all sets of the same size (combinatorial number system).
+    """
+
+    return sum(BINOMIAL[square][number] for number, square in enumerate(squares_of(bitboard), 1))
+
+
+def position_index(signature, boards, player2_to_move):
+    """
+    Computes the index of a position within the table of its material signature.
+
+    Args:
+        signature (tuple): The number of pieces of each kind
+        boards (tuple): The Player 1 men, Player 1 kings, Player 2 men and Player 2 kings bitboards
+        player2_to_move (bool): True if Player 2 is to move
+
+    Returns:
+        int: The index of the position
+    """
+
+    index = 0
+    for count, bitboard in zip(signature, boards):
+        index = index * BINOMIAL[len(SQUARES)][count] + rank(bitboard)
+    return index * 2 + player2_to_move
+
+
+def _placements(signature):
+    """
+    Yields the (p1_men, p1_kings, p2_men, p2_kings) bitboards of every legal placement of a material signature. Men
+    never stand on the row where they would have been crowned.
+    """
+
+    p1_men_squares = [index for index, (row, _) in enumerate(SQUARES) if row != 0]
+    p2_men_squares = [index for index, (row, _) in enumerate(SQUARES) if row != ROWS - 1]
+    all_squares = range(len(SQUARES))
+
+    def place(kinds, occupied):
+        if not kinds:
+            yield ()
+            return
+        squares, count = kinds[0]
+        for chosen in combinations([square for square in squares if not occupied >> square & 1], count):
+            bitboard = sum(1 << square for square in chosen)
+            for rest in place(kinds[1:], occupied | bitboard):
+                yield (bitboard,) + rest
+
+    yield from place(list(zip((p1_men_squares, all_squares, p2_men_squares, all_squares), signature)), 0)
+
+
+def generate(max_pieces=3, verbose=False):
+    """
+    Solves every position with up to max_pieces pieces by retrograde analysis. Each position's moves are generated
+    once and turned around into lists of predecessors. Starting from the lost positions (no moves left), positions are
+    then resolved in order of distance: a predecessor of a loss is a win one ply further away, and a position all of
+    whose moves lead to wins for the opponent is a loss. Whatever is left unresolved is a draw.
+
+    Args:
+        max_pieces (int, optional): The largest total number of pieces. Each extra piece multiplies the work by
+        roughly 30, so 3 takes about 20 seconds and 4 takes hours in pure Python.
+        verbose (bool, optional): Print progress
+
+    Returns:
+        tuple: (tables, values) where tables maps each material signature to the offset of its table in values, and
+        values is a bytearray with one encoded result per position
+    """
+
+    tables, total = {}, 0
+    for signature in signatures(max_pieces):
+        tables[signature] = total
+        total += table_size(signature)
+
+    values = bytearray(total)
+    remaining = array('H', bytes(2 * total))
+    valid = array('I')
+    edge_parents, edge_children = array('I'), array('I')
+    level = []       # Positions lost right away, as the side to move has no moves
+    next_level = []  # Positions won in one ply by capturing the last piece of the opponent
+
+    board = BitBoard.__new__(BitBoard)
+    board.undo_stack, board.hash = [], 0
+    for signature, offset in tables.items():
+        for boards in _placements(signature):
+            board.p1_men, board.p1_kings, board.p2_men, board.p2_kings = boards
+            for player2_to_move in (False, True):
+                index = offset + position_index(signature, boards, player2_to_move)
+                valid.append(index)
+                moves = board.find_moves(PLAYER2_PIECE_COLOR if player2_to_move else PLAYER1_PIECE_COLOR)
+                if not moves:
+                    values[index] = 2
+                    level.append(index)
+                    continue
+
+                for start, end, captures, _ in moves:
+                    child = board.make_move(start, end, captures)
+                    child_boards = (child.p1_men, child.p1_kings, child.p2_men, child.p2_kings)
+                    child_signature = tuple(bitboard.bit_count() for bitboard in child_boards)
+                    if child_signature not in tables:
+                        # The opponent has no pieces left
+                        values[index] = 3
+                        next_level.append(index)
+                        break
+                    edge_parents.append(index)
+                    edge_children.append(tables[child_signature]
+                                         + position_index(child_signature, child_boards, not player2_to_move))
+                else:
+                    remaining[index] = len(moves)
+        if verbose:
+            print(f'{signature}: {len(valid)} positions generated')
+
+    # Group the moves by the position they lead to
+    first_parent = array('I', bytes(4 * (total + 1)))
+    for child in edge_children:
+        first_parent[child + 1] += 1
+    for index in range(total):
+        first_parent[index + 1] += first_parent[index]
+    parents = array('I', bytes(4 * len(edge_children)))
+    filled = array('I', first_parent)
+    for parent, child in zip(edge_parents, edge_children):
+        parents[filled[child]] = parent
+        filled[child] += 1
+    del edge_parents, edge_children, filled
+
+    distance = 0
+    while level or next_level:
+        if distance + 1 > MAX_DISTANCE:
+            raise ValueError(f'distances beyond {MAX_DISTANCE} plies do not fit the table format')
+        for index in level:
+            for parent in parents[first_parent[index]:first_parent[index + 1]]:
+                if values[parent] != UNKNOWN:
+                    continue
+                if distance % 2 == 0:
+                    # A move into a lost position wins
+                    values[parent] = distance + 3
+                    next_level.append(parent)
+                else:
+                    remaining[parent] -= 1
+                    if remaining[parent] == 0:
+                        values[parent] = distance + 3
+                        next_level.append(parent)
+        level, next_level = next_level, []
+        distance += 1
+        if verbose and level:
+            print(f'distance {distance}: {len(level)} positions')
+
+    for index in valid:
+        if values[index] == UNKNOWN:
+            values[index] = DRAW
+    return tables, values
+
+
+def save(path, tables, values, max_pieces):
+    """
+    Writes tables produced by generate() to a binary file that EndgameTablebase can map into memory.
+
+    Args:
+        path (str): The file to write
+        tables (dict): Maps each material signature to the offset of its table in values
+        values (bytearray): The encoded results
+        max_pieces (int): The largest total number of pieces in the tables
+    """
+
+    data_offset = HEADER.size + TABLE.size * len(tables)
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(TABLEBASE_MAGIC, TABLEBASE_VERSION, max_pieces, len(tables)))
+        for signature, offset in tables.items():
+            file.write(TABLE.pack(*signature, data_offset + offset))
+        file.write(values)
+
+
+class EndgameTablebase:
+    def __init__(self, path):
+        """
+        Opens a tablebase file written by save(). The file is memory-mapped, so only the pages that are probed are
+        ever read from disk.
+
+        Args:
+            path (str): The tablebase file
+        """
+
+        self.path = path
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.max_pieces, count = HEADER.unpack_from(self.data)
+        if magic != TABLEBASE_MAGIC or version != TABLEBASE_VERSION:
+            self.data.close()
+            raise ValueError(f'{path} is not an endgame tablebase file')
+
+        self.tables = {}
+        for number in range(count):
+            *signature, offset = TABLE.unpack_from(self.data, HEADER.size + number * TABLE.size)
+            self.tables[tuple(signature)] = offset
+
+    def close(self):
+        self.data.close()
+
+    def probe(self, board, player2_to_move):
+        """
+        Looks up the exact result of a position.
+
+        Args:
+            board (Board): The position, which may be a Board or a BitBoard
+            player2_to_move (bool): True if Player 2 is to move
+
+        Returns:
+            tuple: (result, distance) where result is 1 if the side to move wins, -1 if it loses and 0 for a draw, and
+            distance is the number of plies until the game ends, or None if the position is not in the tablebase
+        """
+
+        if board.piece_count(PLAYER1_PIECE_COLOR) + board.piece_count(PLAYER2_PIECE_COLOR) > self.max_pieces:
+            return None
+        if not isinstance(board, BitBoard):
+            board = BitBoard.from_board(board)
+
+        boards = (board.p1_men, board.p1_kings, board.p2_men, board.p2_kings)
+        signature = tuple(bitboard.bit_count() for bitboard in boards)
+        offset = self.tables.get(signature)
+        if offset is None:
+            return None
+
+        value = self.data[offset + position_index(signature, boards, player2_to_move)]
+        if value == UNKNOWN:
+            return None
+        if value == DRAW:
+            return 0, 0
+        distance = value - 2
+        return (1 if distance % 2 else -1), distance
+
+    def score(self, board, max_player, ply=0):
+        """
+        Scores a position in the tablebase for the search. Wins and losses score just inside the search's ±10000
+        terminal scores, so that faster wins and slower losses are preferred.
+
+        Args:
+            board (Board): The position
+            max_player (bool): True if the maximizing player (AI) is to move
+            ply (int, optional): The distance of the position from the root of the search
+
+        Returns:
+            float: The score for Player 2, or None if the position is not in the tablebase
+        """
+
+        found = self.probe(board, max_player)
+        if found is None:
+            return None
+        result, distance = found
+        if result == 0:
+            return 0
+        score = result * (WIN_SCORE - ply - distance)
+        return score if max_player else -score
+
+
+class TablebaseTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, 'endgame.tb')
+        tables, values = generate(2)
+        save(cls.path, tables, values, 2)
+        cls.tablebase = EndgameTablebase(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tablebase.close()
+        cls.directory.cleanup()
+
+    def board_with(self, p1_men=0, p1_kings=0, p2_men=0, p2_kings=0):
+        board = BitBoard.__new__(BitBoard)
+        board.p1_men, board.p1_kings, board.p2_men, board.p2_kings = p1_men, p1_kings, p2_men, p2_kings
+        board.undo_stack = []
+        board.hash = board.compute_hash()
+        return board
+
+    def test_immediate_capture_wins(self):
+        # Player 1 man on (5, 2) can jump the Player 2 man on (4, 3)
+        board = self.board_with(p1_men=1 << 21, p2_men=1 << 17)
+        self.assertEqual(self.tablebase.probe(board, False), (1, 1))
+        self.assertEqual(self.tablebase.score(board, False), -(WIN_SCORE - 1))
+
+    def test_no_moves_loses(self):
+        # Player 2 man on (6, 7) is blocked by the Player 1 man on (7, 6)
+        board = self.board_with(p1_men=1 << 31, p2_men=1 << 27)
+        self.assertEqual(self.tablebase.probe(board, True), (-1, 0))
+        self.assertEqual(self.tablebase.score(board, True, 3), -(WIN_SCORE - 3))
+
+    def test_positions_outside_the_tablebase(self):
+        self.assertIsNone(self.tablebase.probe(BitBoard(), True))
+        # A Player 2 man on the last row would have been crowned
+        self.assertIsNone(self.tablebase.probe(self.board_with(p1_kings=1 << 0, p2_men=1 << 28), True))
+
+    def test_results_agree_with_moves(self):
+        # A win must have a move into a loss one ply closer, and every move from a loss must lead to a win
+        for signature in signatures(2):
+            for boards in _placements(signature):
+                board = self.board_with(*boards)
+                for player2_to_move in (False, True):
+                    result, distance = self.tablebase.probe(board, player2_to_move)
+                    children = []
+                    for start, end, captures, _ in board.find_moves(PLAYER2_PIECE_COLOR if player2_to_move
+                                                                    else PLAYER1_PIECE_COLOR):
+                        child = board.make_move(start, end, captures)
+                        found = self.tablebase.probe(child, not player2_to_move)
+                        children.append(found if found is not None else (-1, 0))
+                    if result == 1:
+                        self.assertIn((-1, distance - 1), children)
+                    elif result == -1:
+                        self.assertTrue(all(child[0] == 1 and child[1] <= distance - 1 for child in children))
+                    else:
+                        self.assertTrue(all(child[0] != -1 for child in children))
+                        self.assertIn((0, 0), children)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build an endgame tablebase for the checkers AI.')
+    parser.add_argument('--pieces', type=int, default=3, help='largest total number of pieces to solve')
+    parser.add_argument('--output', default='endgame.tb', help='file to write the tablebase to')
+    args = parser.parse_args()
+
+    solved_tables, solved_values = generate(args.pieces, verbose=True)
+    save(args.output, solved_tables, solved_values, args.pieces)
+    print(f'Wrote {len(solved_values)} positions to {args.output}')
@@ -0,0 +1,288 @@
+from ai import iterative_deepening, minimax_alpha_beta
+from bitboard import BitBoard
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from constants import PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR
+from game import Game
+from math import log10, sqrt
+from ordering import MoveOrdering
+from search_context import SearchContext
+from transposition import TranspositionTable
+import argparse
+import board_configs
+import random
+import time
+import unittest
+
+# A side of a match. Without a time budget every move is searched to depth; with one, iterative deepening runs until
+# the budget is used up, but never deeper than depth. quiescence_nodes turns on the quiescence search with that node cap.
+# late_move_reductions and null_move turn on those selective search options of the SearchContext.
+EngineConfig = namedtuple('EngineConfig', ['depth', 'eval_params', 'time_budget_ms', 'quiescence_nodes',
+                                           'late_move_reductions', 'null_move'],
+                          defaults=[4, (1.0, 1.0, 0.0, 0.0, 0.0), None, None, False, False])
+
+# A start position: board_config is None for the standard position, where Player 1 moves first. The board_configs
+# positions are AI-to-move positions, so Player 2 moves first in them.
+StartPosition = namedtuple('StartPosition', ['name', 'board_config', 'player2_to_move'])
+
+# The outcome of one game from engine A's point of view: 1 for a win, 0 for a draw and -1 for a loss. The per-engine
+# lists hold [engine A, engine B] totals over the moves each engine searched.
+GameResult = namedtuple('GameResult', ['index', 'start', 'a_is_player2', 'result', 'plies', 'moves', 'seconds',
+                                       'nodes'])
+
+STANDARD_START = StartPosition('standard', None, False)
+
+
+def config_starts():
+    """
+    Returns every position in board_configs as a start position.
+    """
+
+    names = sorted((name for name in dir(board_configs) if name.startswith('board_config')),
+                   key=lambda name: int(name[len('board_config'):]))
+    return [StartPosition(name, getattr(board_configs, name), True) for name in names]
+
+
+def choose_move(board, game, engine, max_player, context):
+    """
+    Searches a position for one engine.
+
+    Args:
+        board (BitBoard): The position
+        game (Game): The game instance
+        engine (EngineConfig): The engine to move
+        max_player (bool): True if the engine plays Player 2
+        context (SearchContext): The engine's search state, kept for the whole game
+
+    Returns:
+        BitBoard: The position after the chosen move
+    """
+
+    if engine.time_budget_ms is not None:
+        _, new_board, _ = iterative_deepening(board, game, engine.time_budget_ms, max_player, engine.eval_params,
+                                              engine.depth, context)
+    else:
+        _, new_board = minimax_alpha_beta(board, engine.depth, float('-inf'), float('inf'), max_player, game,
+                                          engine.eval_params, context)
+    return new_board
+
+
+def play_game(index, start, engine_a, engine_b, a_is_player2, random_plies=0, max_plies=200, seed=0):
+    """
+    Plays one game between two engines without a display.
+
+    Args:
+        index (int): The number of the game in the tournament
+        start (StartPosition): The position to start from
+        engine_a (EngineConfig): The first engine
+        engine_b (EngineConfig): The second engine
+        a_is_player2 (bool): True if engine A plays Player 2
+        random_plies (int, optional): Number of random moves played before the engines take over, so that games from
+        the same start position differ
+        max_plies (int, optional): The game is a draw once this many plies have been played
+        seed (int, optional): Seed for the random opening moves
+
+    Returns:
+        GameResult: The outcome and the engines' move statistics
+    """
+
+    game = Game()
+    rng = random.Random(seed)
+    board = BitBoard(start.board_config)
+    player2_to_move = start.player2_to_move
+    engines = [engine_a, engine_b]
+    contexts = [SearchContext(table=TranspositionTable(), ordering=MoveOrdering(),
+                              quiescence_nodes=engine.quiescence_nodes,
+                              late_move_reductions=engine.late_move_reductions, null_move=engine.null_move)
+                for engine in engines]
+    moves, seconds, nodes = [0, 0], [0.0, 0.0], [0, 0]
+    result = 0
+
+    for ply in range(max_plies):
+        color = PLAYER2_PIECE_COLOR if player2_to_move else PLAYER1_PIECE_COLOR
+        side = 0 if player2_to_move == a_is_player2 else 1
+        winner = game.winner(board)
+        if winner is not None or not game.has_any_move(board, color):
+            # The side to move has no pieces or no moves left
+            result = 1 if side == 1 else -1
+            break
+
+        if ply < random_plies:
+            board = rng.choice(game.generate_all_moves(board, color))
+        else:
+            context = contexts[side]
+            nodes_before = context.nodes
+            started = time.perf_counter()
+            board = choose_move(board, game, engines[side], player2_to_move, context)
+            seconds[side] += time.perf_counter() - started
+            nodes[side] += context.nodes - nodes_before
+            moves[side] += 1
+        player2_to_move = not player2_to_move
+    else:
+        ply = max_plies
+
+    return GameResult(index, start.name, a_is_player2, result, ply, moves, seconds, nodes)
+
+
+def _play_game_task(arguments):
+    return play_game(*arguments)
+
+
+def run_tournament(engine_a, engine_b, games, starts=None, workers=1, random_plies=0, max_plies=200, seed=0):
+    """
+    Plays a match between two engines. Games come in pairs from the same start position and opening moves, with the
+    engines swapping sides, and the start positions are used in turn.
+
+    Args:
+        engine_a (EngineConfig): The first engine
+        engine_b (EngineConfig): The second engine
+        games (int): The number of games to play
+        starts (list, optional): StartPosition objects to use. Defaults to the standard position.
+        workers (int, optional): The number of processes to play games in
+        random_plies (int, optional): Number of random opening moves in each pair of games
+        max_plies (int, optional): The game is a draw once this many plies have been played
+        seed (int, optional): Seed for the random opening moves
+
+    Returns:
+        list: GameResult objects in game order
+    """
+
+    starts = starts if starts else [STANDARD_START]
+    tasks = [(index, starts[index // 2 % len(starts)], engine_a, engine_b, index % 2 == 0, random_plies, max_plies,
+              seed * 1000003 + index // 2)
+             for index in range(games)]
+    if workers <= 1:
+        return [play_game(*task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_play_game_task, tasks))
+
+
+def elo_difference(score):
+    """
+    Converts an expected score (0 to 1) into a rating difference.
+    """
+
+    if score <= 0:
+        return float('-inf')
+    if score >= 1:
+        return float('inf')
+    return -400 * log10(1 / score - 1)
+
+
+def summarize(results):
+    """
+    Totals the results of a match from engine A's point of view.
+
+    Args:
+        results (list): GameResult objects
+
+    Returns:
+        dict: Wins, draws and losses, the score, an Elo estimate with a 95% confidence interval, and for each engine
+        the average time per move in milliseconds and the nodes searched per second
+    """
+
+    wins = sum(result.result == 1 for result in results)
+    draws = sum(result.result == 0 for result in results)
+    losses = sum(result.result == -1 for result in results)
+    games = len(results)
+    score = (wins + draws / 2) / games if games else 0.5
+
+    # Standard error of the mean score per game
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games if games else 0
+    margin = 1.96 * sqrt(variance / games) if games else 0
+
+    summary = {'games': games, 'wins': wins, 'draws': draws, 'losses': losses, 'score': score,
+               'elo': elo_difference(score), 'elo_low': elo_difference(score - margin),
+               'elo_high': elo_difference(score + margin)}
+    for side, name in enumerate(('a', 'b')):
+        moves = sum(result.moves[side] for result in results)
+        seconds = sum(result.seconds[side] for result in results)
+        nodes = sum(result.nodes[side] for result in results)
+        summary[f'{name}_ms_per_move'] = 1000 * seconds / moves if moves else 0.0
+        summary[f'{name}_nodes_per_second'] = nodes / seconds if seconds else 0.0
+    return summary
+
+
+def format_summary(summary):
+    """
+    Formats the output of summarize() for printing.
+    """
+
+    return '\n'.join([
+        f"Games: {summary['games']}  A wins: {summary['wins']}  draws: {summary['draws']}  "
+        f"A losses: {summary['losses']}  A score: {summary['score']:.3f}",
+        f"Elo (A - B): {summary['elo']:+.1f}  95% interval: [{summary['elo_low']:+.1f}, {summary['elo_high']:+.1f}]",
+        f"Engine A: {summary['a_ms_per_move']:.1f} ms/move, {summary['a_nodes_per_second']:.0f} nodes/s",
+        f"Engine B: {summary['b_ms_per_move']:.1f} ms/move, {summary['b_nodes_per_second']:.0f} nodes/s",
+    ])
+
+
+class TournamentTest(unittest.TestCase):
+
+    def test_play_game(self):
+        engine = EngineConfig(depth=2)
+        result = play_game(0, STANDARD_START, engine, engine, True, random_plies=2, max_plies=30, seed=1)
+        self.assertIn(result.result, (-1, 0, 1))
+        self.assertLessEqual(result.plies, 30)
+        self.assertEqual(sum(result.moves), result.plies - 2)
+        self.assertGreater(sum(result.nodes), 0)
+
+    def test_game_ends_when_a_side_has_no_pieces(self):
+        # Player 2 captures the last Player 1 piece with its first move
+        start = StartPosition('capture', [[0] * 8 for _ in range(8)], True)
+        start.board_config[3][2] = 2
+        start.board_config[4][3] = 1
+        result = play_game(0, start, EngineConfig(depth=1), EngineConfig(depth=1), False)
+        self.assertEqual((result.result, result.plies), (-1, 1))
+
+    def test_run_tournament_and_summarize(self):
+        starts = config_starts()[:2]
+        results = run_tournament(EngineConfig(depth=2), EngineConfig(depth=1, time_budget_ms=50), 4, starts,
+                                 max_plies=10)
+        self.assertEqual([result.start for result in results],
+                         ['board_config1', 'board_config1', 'board_config2', 'board_config2'])
+        self.assertEqual([result.a_is_player2 for result in results], [True, False, True, False])
+
+        summary = summarize(results)
+        self.assertEqual(summary['wins'] + summary['draws'] + summary['losses'], 4)
+        self.assertGreater(summary['a_ms_per_move'], 0)
+        self.assertIn('Elo', format_summary(summary))
+
+    def test_elo_difference(self):
+        self.assertEqual(elo_difference(0.5), 0)
+        self.assertAlmostEqual(elo_difference(0.75), 190.85, places=2)
+        self.assertEqual(elo_difference(1), float('inf'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play engine-vs-engine checkers games without a display.')
+    parser.add_argument('--games', type=int, default=100, help='number of games to play')
+    parser.add_argument('--workers', type=int, default=1, help='number of processes to play games in')
+    for engine_name in ('a', 'b'):
+        parser.add_argument(f'--depth-{engine_name}', type=int, default=4,
+                            help=f'search depth of engine {engine_name.upper()}')
+        parser.add_argument(f'--time-{engine_name}', type=float, default=None,
+                            help=f'time budget per move of engine {engine_name.upper()} in milliseconds')
+        parser.add_argument(f'--eval-{engine_name}', type=float, nargs=5, default=[1.0, 1.0, 0.0, 0.0, 0.0],
+                            help=f'evaluation weights of engine {engine_name.upper()}')
+        parser.add_argument(f'--quiescence-{engine_name}', type=int, default=None,
+                            help=f'quiescence search node cap of engine {engine_name.upper()}')
+        parser.add_argument(f'--lmr-{engine_name}', action='store_true',
+                            help=f'late move reductions in engine {engine_name.upper()}')
+        parser.add_argument(f'--null-move-{engine_name}', action='store_true',
+                            help=f'verified null move pruning in engine {engine_name.upper()}')
+    parser.add_argument('--start', choices=['standard', 'configs'], default='standard',
+                        help='start from the standard position or from the board_configs positions')
+    parser.add_argument('--random-plies', type=int, default=2, help='random opening moves in each pair of games')
+    parser.add_argument('--max-plies', type=int, default=200, help='plies after which a game is drawn')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the random opening moves')
+    args = parser.parse_args()
+
+    match_results = run_tournament(EngineConfig(args.depth_a, tuple(args.eval_a), args.time_a, args.quiescence_a,
+                                                args.lmr_a, args.null_move_a),
+                                   EngineConfig(args.depth_b, tuple(args.eval_b), args.time_b, args.quiescence_b,
+                                                args.lmr_b, args.null_move_b),
+                                   args.games, config_starts() if args.start == 'configs' else None, args.workers,
+                                   args.random_plies, args.max_plies, args.seed)
+    print(format_summary(summarize(match_results)))
@@ -0,0 +1,105 @@
+from collections import namedtuple
+
+# Bound types: EXACT scores lie strictly inside the search window, LOWER_BOUND scores failed high (the true score is at
+# least this large) and UPPER_BOUND scores failed low (the true score is at most this large)
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+TableEntry = namedtuple('TableEntry', ['key', 'depth', 'score', 'bound', 'best_move', 'generation'])
+
+# Wins and losses at a known distance (scored by the endgame tablebase) lie strictly between these magnitudes, and
+# their scores count the plies from the root of the search. The table stores them counted from the position itself,
+# so that they stay correct when the position is reached again at another ply.
+DISTANCE_SCORE_MIN, DISTANCE_SCORE_MAX = 9000, 10000
+
+
+def shift_score(score, plies):
+    """
+    Moves a distance score the given number of plies further from the root: a win scores lower and a loss higher.
+    Other scores are returned unchanged.
+
+    Args:
+        score (float): The score
+        plies (int): The number of plies, which may be negative
+
+    Returns:
+        float: The shifted score
+    """
+
+    if DISTANCE_SCORE_MIN < score < DISTANCE_SCORE_MAX:
+        return score - plies
+    if -DISTANCE_SCORE_MAX < score < -DISTANCE_SCORE_MIN:
+        return score + plies
+    return score
+
+
+class TranspositionTable:
+    def __init__(self, size=1 << 16):
+        """
+        Initializes a fixed-size transposition table. Positions are mapped to slots by their Zobrist key, and each slot
+        holds a single entry.
+
+        Args:
+            size (int, optional): The number of slots. It is rounded up to a power of two.
+        """
+
+        self.size = 1 << max(size - 1, 1).bit_length()
+        self.mask = self.size - 1
+        self.entries = [None] * self.size
+        self.generation = 0
+
+    def new_search(self):
+        """
+        Marks the start of a new search. Entries left over from earlier searches are replaced first.
+        """
+
+        self.generation += 1
+
+    def clear(self):
+        """
+        Removes all entries from the table.
+        """
+
+        self.entries = [None] * self.size
+        self.generation = 0
+
+    def probe(self, key, ply=0):
+        """
+        Looks up the entry stored for a position.
+
+        Args:
+            key (int): The position key from zobrist.position_key()
+            ply (int, optional): The distance of the position from the root of the search, which distance scores are
+            counted from
+
+        Returns:
+            TableEntry: The stored entry, or None if the position is not in the table
+        """
+
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry.key == key:
+            score = shift_score(entry.score, ply)
+            return entry if score == entry.score else entry._replace(score=score)
+        return None
+
+    def store(self, key, depth, score, bound, best_move, ply=0):
+        """
+        Stores a search result. The slot is overwritten if it is empty, holds the same position, holds an entry from an
+        earlier search, or holds an entry searched no deeper than this one; otherwise the deeper result is kept.
+
+        Args:
+            key (int): The position key from zobrist.position_key()
+            depth (int): The remaining depth the position was searched to
+            score (float): The score found by the search
+            bound (int): EXACT, LOWER_BOUND or UPPER_BOUND
+            best_move (Move): The best move found, or None
+            ply (int, optional): The distance of the position from the root of the search, which distance scores are
+            counted from
+        """
+
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is None or entry.key == key or entry.generation != self.generation or depth >= entry.depth:
+            self.entries[index] = TableEntry(key, depth, shift_score(score, -ply), bound, best_move, self.generation)
+
+    def __len__(self):
+        return sum(entry is not None for entry in self.entries)
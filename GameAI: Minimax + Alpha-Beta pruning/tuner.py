@@ -0,0 +1,263 @@
+from batch_eval import batch_counts
+from bitboard import BitBoard
+from concurrent.futures import ProcessPoolExecutor
+from constants import PLAYER1_PIECE_COLOR, PLAYER2_PIECE_COLOR
+from game import Game
+from ordering import MoveOrdering
+from position import Position
+from position_store import HEADER, RECORD_FIELDS, PositionRecord, PositionStore
+from search_context import SearchContext
+from tournament import EngineConfig, choose_move
+from transposition import TranspositionTable
+import argparse
+import numpy as np
+import os
+import random
+import tempfile
+import unittest
+
+# Datasets are position stores: every self-play position, labelled with the result of the game it was played in
+RECORD = np.dtype(RECORD_FIELDS)
+
+FEATURES = ('pieces', 'kings', 'moves', 'opportunities', 'king_hopefuls')
+
+
+def play_selfplay_game(engine, random_plies=6, max_plies=200, seed=0):
+    """
+    Plays one game of an engine against itself from the standard position and records every position in it.
+
+    Args:
+        engine (EngineConfig): The engine playing both sides
+        random_plies (int, optional): Number of random opening moves, so that games differ
+        max_plies (int, optional): The game is a draw once this many plies have been played
+        seed (int, optional): Seed for the random opening moves
+
+    Returns:
+        list: PositionRecord tuples for the positions, labelled with the game's result
+    """
+
+    game = Game()
+    rng = random.Random(seed)
+    board = BitBoard()
+    player2_to_move = False
+    context = SearchContext(table=TranspositionTable(), ordering=MoveOrdering(),
+                            quiescence_nodes=engine.quiescence_nodes,
+                            late_move_reductions=engine.late_move_reductions, null_move=engine.null_move)
+    positions = []
+    result = 0
+
+    for ply in range(max_plies):
+        color = PLAYER2_PIECE_COLOR if player2_to_move else PLAYER1_PIECE_COLOR
+        if game.winner(board) is not None or not game.has_any_move(board, color):
+            result = -1 if player2_to_move else 1
+            break
+
+        positions.append((Position.from_board(board), player2_to_move, ply))
+        if ply < random_plies:
+            board = rng.choice(game.generate_all_moves(board, color))
+        else:
+            board = choose_move(board, game, engine, player2_to_move, context)
+        player2_to_move = not player2_to_move
+
+    return [PositionRecord(position, to_move, result, ply) for position, to_move, ply in positions]
+
+
+def _play_selfplay_task(arguments):
+    return play_selfplay_game(*arguments)
+
+
+def generate_dataset(path, games, engine=None, random_plies=6, max_plies=200, seed=0, workers=1):
+    """
+    Plays self-play games and appends their positions to a dataset, one record per position.
+
+    Args:
+        path (str): The dataset's position store, created if it does not exist
+        games (int): The number of games to play
+        engine (EngineConfig, optional): The engine playing both sides. Defaults to a depth 2 search.
+        random_plies (int, optional): Number of random opening moves in each game
+        max_plies (int, optional): The game is a draw once this many plies have been played
+        seed (int, optional): Seed for the random opening moves
+        workers (int, optional): The number of processes to play games in
+
+    Returns:
+        int: The number of positions written
+    """
+
+    engine = engine if engine is not None else EngineConfig(depth=2)
+    tasks = [(engine, random_plies, max_plies, seed * 1000003 + index) for index in range(games)]
+    with PositionStore(path) as store:
+        before = len(store)
+        if workers <= 1:
+            for records in map(_play_selfplay_task, tasks):
+                store.extend(records)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for records in pool.map(_play_selfplay_task, tasks):
+                    store.extend(records)
+        return len(store) - before
+
+
+def extract_features(records):
+    """
+    Computes the five evaluate() feature differences (Player 2 minus Player 1) of many positions.
+
+    Args:
+        records (numpy.ndarray): Records of a position store, as RECORD entries
+
+    Returns:
+        numpy.ndarray: An N x 5 float64 feature matrix, with columns in the order of eval_params
+    """
+
+    player1, player2, kings = (records[name].astype(np.uint32) for name in ('player1', 'player2', 'kings'))
+    p1_men, p1_kings, p2_men, p2_kings = player1 & ~kings, player1 & kings, player2 & ~kings, player2 & kings
+    p1 = batch_counts(p1_men, p1_kings, p2_men | p2_kings, PLAYER1_PIECE_COLOR)
+    p2 = batch_counts(p2_men, p2_kings, p1_men | p1_kings, PLAYER2_PIECE_COLOR)
+    return np.stack([p2[feature] - p1[feature] for feature in range(len(FEATURES))], axis=1).astype(np.float64)
+
+
+def iterate_chunks(path, chunk_size=1 << 16):
+    """
+    Reads a dataset a chunk at a time through a memory map, so that datasets larger than memory can be used.
+
+    Args:
+        path (str): The dataset's position store
+        chunk_size (int, optional): The number of positions per chunk
+
+    Yields:
+        tuple: (features, targets) where features is a chunk of the feature matrix and targets holds the game results
+        scaled to 0 (loss), 0.5 (draw) and 1 (win) for Player 2
+    """
+
+    if os.path.getsize(path) <= HEADER.size:
+        return
+    records = np.memmap(path, dtype=RECORD, mode='r', offset=HEADER.size)
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start:start + chunk_size]
+        yield extract_features(chunk), (chunk['result'].astype(np.float64) + 1) / 2
+
+
+def _sigmoid(values):
+    return 1 / (1 + np.exp(-values))
+
+
+def texel_loss(chunks, weights, scale=1.0):
+    """
+    Computes the mean squared error between the game results and the win probabilities the weights predict.
+
+    Args:
+        chunks (iterable): (features, targets) chunks as yielded by iterate_chunks()
+        weights (tuple): The five evaluation weights
+        scale (float, optional): Converts a score into a win probability through sigmoid(scale * score)
+
+    Returns:
+        float: The mean squared error
+    """
+
+    weights = np.asarray(weights, dtype=np.float64)
+    total, count = 0.0, 0
+    for features, targets in chunks:
+        errors = targets - _sigmoid(scale * (features @ weights))
+        total += float(errors @ errors)
+        count += len(targets)
+    return total / count if count else 0.0
+
+
+def fit_weights(chunks_factory, initial=(1.0, 1.0, 0.0, 0.0, 0.0), epochs=50, learning_rate=1.0, scale=1.0,
+                verbose=False):
+    """
+    Fits the evaluation weights to game results by Texel-style logistic regression: the predicted win probability of a
+    position is sigmoid(scale * score), and the mean squared error against the results is minimized by gradient
+    descent. Each epoch streams the whole dataset once, one chunk at a time, and takes one step with the gradient
+    summed over all chunks.
+
+    Args:
+        chunks_factory (callable): Returns a fresh iterable of (features, targets) chunks, e.g. a lambda around
+        iterate_chunks()
+        initial (tuple, optional): The weights to start from
+        epochs (int, optional): The number of gradient steps
+        learning_rate (float, optional): The step size
+        scale (float, optional): Converts a score into a win probability through sigmoid(scale * score)
+        verbose (bool, optional): Print the loss after every epoch
+
+    Returns:
+        tuple: (weights, loss) with the fitted weights as a tuple usable as eval_params and the loss before the last
+        step
+    """
+
+    weights = np.asarray(initial, dtype=np.float64).copy()
+    loss = 0.0
+    for epoch in range(epochs):
+        gradient = np.zeros_like(weights)
+        total, count = 0.0, 0
+        for features, targets in chunks_factory():
+            predictions = _sigmoid(scale * (features @ weights))
+            errors = predictions - targets
+            total += float(errors @ errors)
+            count += len(targets)
+            gradient += features.T @ (errors * predictions * (1 - predictions))
+        if not count:
+            break
+
+        loss = total / count
+        weights -= learning_rate * 2 * scale * gradient / count
+        if verbose:
+            print(f'epoch {epoch + 1}: loss {loss:.6f}, weights {np.round(weights, 4).tolist()}')
+
+    return tuple(weights.tolist()), loss
+
+
+class TunerTest(unittest.TestCase):
+
+    def test_fit_recovers_weights(self):
+        rng = np.random.default_rng(7)
+        features = rng.integers(-4, 5, size=(20000, 5)).astype(np.float64)
+        true_weights = np.array([1.5, 0.5, 0.2, 0.0, 0.3])
+        targets = (rng.random(20000) < _sigmoid(features @ true_weights)).astype(np.float64)
+        chunks = [(features[start:start + 4096], targets[start:start + 4096]) for start in range(0, 20000, 4096)]
+
+        weights, loss = fit_weights(lambda: chunks, initial=(0.0,) * 5, epochs=300, learning_rate=5.0)
+        np.testing.assert_allclose(weights, true_weights, atol=0.1)
+        self.assertLess(texel_loss(chunks, weights), texel_loss(chunks, (1.0, 1.0, 0.0, 0.0, 0.0)))
+
+    def test_dataset_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'selfplay.bin')
+            written = generate_dataset(path, 2, EngineConfig(depth=1), random_plies=2, max_plies=20)
+            self.assertEqual(os.path.getsize(path), HEADER.size + written * RECORD.itemsize)
+
+            chunks = list(iterate_chunks(path, chunk_size=7))
+            self.assertEqual(sum(len(targets) for _, targets in chunks), written)
+
+            # Every game starts from the standard position
+            board = BitBoard()
+            expected = [b - a for a, b in zip(board.counts(PLAYER1_PIECE_COLOR), board.counts(PLAYER2_PIECE_COLOR))]
+            self.assertEqual(chunks[0][0][0].tolist(), expected)
+            self.assertTrue(set(np.concatenate([targets for _, targets in chunks]).tolist()) <= {0.0, 0.5, 1.0})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tune the evaluation weights on self-play games.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    generate = commands.add_parser('generate', help='play self-play games and append them to a dataset')
+    generate.add_argument('--games', type=int, default=100, help='number of games to play')
+    generate.add_argument('--depth', type=int, default=2, help='search depth of the self-play engine')
+    generate.add_argument('--random-plies', type=int, default=6, help='random opening moves in each game')
+    generate.add_argument('--seed', type=int, default=0, help='seed for the random opening moves')
+    generate.add_argument('--workers', type=int, default=1, help='number of processes to play games in')
+    generate.add_argument('--output', default='selfplay.bin', help='dataset file to append to')
+    fit = commands.add_parser('fit', help='fit the evaluation weights to a dataset')
+    fit.add_argument('--data', default='selfplay.bin', help='dataset file')
+    fit.add_argument('--epochs', type=int, default=100, help='number of gradient steps')
+    fit.add_argument('--learning-rate', type=float, default=1.0, help='gradient step size')
+    fit.add_argument('--scale', type=float, default=1.0, help='score to win probability scale')
+    fit.add_argument('--chunk-size', type=int, default=1 << 16, help='positions read at a time')
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        count = generate_dataset(args.output, args.games, EngineConfig(depth=args.depth), args.random_plies,
+                                 seed=args.seed, workers=args.workers)
+        print(f'Wrote {count} positions to {args.output}')
+    else:
+        fitted, final_loss = fit_weights(lambda: iterate_chunks(args.data, args.chunk_size), epochs=args.epochs,
+                                         learning_rate=args.learning_rate, scale=args.scale, verbose=True)
+        print(f'eval_params = {tuple(round(weight, 4) for weight in fitted)}  (loss {final_loss:.6f})')
@@ -0,0 +1,66 @@
+from constants import PLAYER1_PIECE_COLOR, ROWS, COLS
+import random
+
+# A fixed seed keeps hashes identical across runs, so they can be stored on disk (e.g. in an opening book)
+_random = random.Random(20241017)
+
+# One random 64-bit key per playable square for each kind of piece: Player 1 man, Player 1 king, Player 2 man and
+# Player 2 king. Squares are indexed row * 4 + col // 2, which numbers the 32 dark squares in row-major order.
+PIECE_KEYS = [[_random.getrandbits(64) for _ in range(ROWS * COLS // 2)] for _ in range(4)]
+
+# XORed into a position's hash when Player 2 (the maximizing AI) is the side to move
+SIDE_KEY = _random.getrandbits(64)
+
+
+def piece_key(row, col, color, king):
+    """
+    Looks up the Zobrist key of a piece standing on a square.
+
+    Args:
+        row (int): The row index of the square
+        col (int): The column index of the square
+        color (tuple): The RGB color of the piece
+        king (bool): Whether the piece is a king
+
+    Returns:
+        int: The 64-bit key
+    """
+
+    kind = (0 if color == PLAYER1_PIECE_COLOR else 2) + (1 if king else 0)
+    return PIECE_KEYS[kind][row * 4 + col // 2]
+
+
+def hash_board(board):
+    """
+    Computes the Zobrist hash of a board from scratch by XOR-ing the keys of all pieces on it. Boards keep their hash
+    up to date incrementally as moves are made, so this is only needed when a board is created.
+
+    Args:
+        board (Board): The board to hash
+
+    Returns:
+        int: The 64-bit hash of the piece layout
+    """
+
+    value = 0
+    for row in range(ROWS):
+        for col in range(COLS):
+            piece = board.get_piece(row, col)
+            if piece != 0:
+                value ^= piece_key(row, col, piece.color, piece.king)
+    return value
+
+
+def position_key(board, max_player):
+    """
+    Combines a board's hash with the side to move, giving the key used for transposition table lookups.
+
+    Args:
+        board (Board): The board whose hash to use
+        max_player (bool): True if Player 2 (the maximizing AI) is to move
+
+    Returns:
+        int: The 64-bit position key
+    """
+
+    return board.hash ^ SIDE_KEY if max_player else board.hash